@@ -0,0 +1,773 @@
+#  _                     _                          _
+# | |                   | |                        | |
+# | |__   ___ _ __   ___| |__  _ __ ___   __ _ _ __| | __
+# | '_ \ / _ \ '_ \ / __| '_ \| '_ ` _ \ / _` | '__| |/ /
+# | |_) |  __/ | | | (__| | | | | | | | | (_| | |  |   <
+# |_.__/ \___|_| |_|\___|_| |_|_| |_| |_|\__,_|_|  |_|\_\
+#
+# timings for the comparator stages on synthetic data
+#
+# usage (from jubilant-robot/src):
+#   python3 insight_benchmark.py windows --hours 10000 --windows 1 10 100 2000
+#   python3 insight_benchmark.py parse --rows 1000000
+#   python3 insight_benchmark.py compressed --rows 1000000
+#   python3 insight_benchmark.py output --windows 10000000
+#   python3 insight_benchmark.py suite --hours 1000 --results results.json
+#   python3 insight_benchmark.py buffers --hours 3 --stocks-per-hour 1000000
+import gzip
+import io
+import json
+import lzma
+import multiprocessing
+import os
+import platform
+import random
+import shutil
+import string
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from argparse import ArgumentParser
+from collections import deque
+from itertools import zip_longest
+
+import insight_compression as ic
+import insight_mmap as im
+import insight_processing as ip
+import insight_reconcile as ir
+import insight_windows as iw
+from insight_comparator import ENGINES
+from insight_comparator import RECONCILERS
+from insight_metrics import get_peak_rss_mib
+
+
+def time_call(func, *args):
+    """time a single call of func
+
+    Args:
+        func (callable): function to time
+        *args: arguments for func
+
+    Returns:
+        tuple: (seconds taken, return value of func)
+    """
+    start = time.perf_counter()
+    result = func(*args)
+    return time.perf_counter() - start, result
+
+
+###############################################################################
+#           _           _
+#          (_)         | |
+# __      ___ _ __   __| | _____      _____
+# \ \ /\ / / | '_ \ / _` |/ _ \ \ /\ / / __|
+#  \ V  V /| | | | | (_| | (_) \ V  V /\__ \
+#   \_/\_/ |_|_| |_|\__,_|\___/ \_/\_/ |___/
+def make_hour_errors(num_hours, empty_ratio=0.1, seed=0):
+    """make synthetic hour errors
+
+    Args:
+        num_hours (int): number of hours, starting at hour 1
+        empty_ratio (float, optional): fraction of hours with no matched stocks
+        seed (int, optional): random seed
+
+    Returns:
+        dict: errors for each hour, same layout as process_input returns
+    """
+    rng = random.Random(seed)
+    hour_errors = {}
+    for hour in range(1, num_hours + 1):
+        if rng.random() < empty_ratio:
+            hour_errors[hour] = (0, 0)
+        else:
+            count = rng.randint(1, 100)
+            hour_errors[hour] = (round(rng.uniform(0, count * 5), 2), count)
+    return hour_errors
+
+
+def benchmark_windows(num_hours, windows):
+    """time the direct and cumulative window engines
+
+    Args:
+        num_hours (int): number of hours of synthetic data
+        windows (list of int): window sizes to time
+
+    Returns:
+        list of dict: one row per window size
+    """
+    hour_errors = make_hour_errors(num_hours)
+    rows = []
+    for window in windows:
+        window_intervals = ip.get_window_intervals(window, hour_errors)
+        direct, direct_errors = time_call(
+            ip.get_interval_errors, window_intervals, hour_errors
+        )
+        cumulative, cumulative_errors = time_call(
+            iw.get_interval_errors_cumulative, window_intervals, hour_errors
+        )
+        rows.append(
+            {
+                "window": window,
+                "direct_s": direct,
+                "cumulative_s": cumulative,
+                "speedup": direct / cumulative,
+                # only windows sitting on a .xx5 rounding boundary can differ
+                "mismatches": sum(
+                    direct_errors[i] != cumulative_errors[i] for i in direct_errors
+                ),
+            }
+        )
+    return rows
+
+
+###############################################################################
+#  _ __   __ _ _ __ ___  ___
+# | '_ \ / _` | '__/ __|/ _ \
+# | |_) | (_| | |  \__ \  __/
+# | .__/ \__,_|_|  |___/\___|
+# | |
+# |_|
+def write_feed(fn, num_hours, stocks_per_hour, seed=0):
+    """write a synthetic price feed
+
+    Args:
+        fn (str): name of file to write
+        num_hours (int): number of hours, starting at hour 1
+        stocks_per_hour (int): rows in each hour, one per stock
+        seed (int, optional): random seed
+    """
+    rng = random.Random(seed)
+    stocks = [
+        "".join(rng.choice(string.ascii_uppercase) for _ in range(6))
+        for _ in range(stocks_per_hour)
+    ]
+    with open(fn, "w") as f:
+        for hour in range(1, num_hours + 1):
+            f.writelines(
+                "{}|{}|{:.2f}\n".format(hour, stock, rng.uniform(1, 500))
+                for stock in stocks
+            )
+
+
+def benchmark_parse(num_rows, stocks_per_hour=10_000):
+    """time and trace the text, trusted text and mmap readers
+
+    Wall time is for parsing alone. Peak memory is traced while grouping the
+    rows into hours, so it includes the buffered hour, where interned stocks
+    are shared instead of being one new str per row.
+
+    Args:
+        num_rows (int): rows of synthetic data
+        stocks_per_hour (int, optional): rows in each hour
+
+    Returns:
+        list of dict: one row per reader
+    """
+    readers = {
+        "text": ir.read_file_rows,
+        "trusted": ir.read_file_rows_trusted,
+        "mmap": im.read_mmap_rows,
+    }
+    fd, fn = tempfile.mkstemp(suffix=".txt")
+    os.close(fd)
+
+    try:
+        write_feed(fn, max(num_rows // stocks_per_hour, 1), stocks_per_hour)
+        rows = []
+        for name, read_rows in readers.items():
+
+            seconds, _ = time_call(deque, read_rows(fn), 0)
+
+            tracemalloc.start()
+            deque(ir.group_hours(read_rows(fn)), 0)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+            rows.append(
+                {
+                    "reader": name,
+                    "s_per_1M_rows": seconds * 1_000_000 / num_rows,
+                    "peak_MiB": peak / 2 ** 20,
+                }
+            )
+    finally:
+        os.remove(fn)
+
+    return rows
+
+
+###############################################################################
+#                                                 _
+#                                                (_)
+#   ___ ___  _ __ ___  _ __  _ __ ___  ___ ___ _  ___  _ __
+#  / __/ _ \| '_ ` _ \| '_ \| '__/ _ \/ __/ __| |/ _ \| '_ \
+# | (_| (_) | | | | | | |_) | | |  __/\__ \__ \ | (_) | | | |
+#  \___\___/|_| |_| |_| .__/|_|  \___||___/___/_|\___/|_| |_|
+#                     | |
+#                     |_|
+def read_rows_inline(fn):
+    """parse a compressed file, decompressing on the parsing thread
+
+    Args:
+        fn (str): name of compressed file
+
+    Yields:
+        [int, str, float]: formatted line
+    """
+    opener = ic.OPENERS[ic.get_compression(fn)]
+    with io.TextIOWrapper(opener(fn)) as f:
+        yield from ir.read_lines(f)
+
+
+def benchmark_compressed(num_rows, stocks_per_hour=10_000):
+    """time parsing plain, gzip and xz files
+
+    Compressed files are parsed both with decompression on a background
+    thread (what the comparator does) and inline on the parsing thread.
+
+    Args:
+        num_rows (int): rows of synthetic data
+        stocks_per_hour (int, optional): rows in each hour
+
+    Returns:
+        list of dict: one row per file and reader
+    """
+    directory = tempfile.mkdtemp()
+    fn = os.path.join(directory, "feed.txt")
+
+    try:
+        write_feed(fn, max(num_rows // stocks_per_hour, 1), stocks_per_hour)
+        text_bytes = os.path.getsize(fn)
+
+        with open(fn, "rb") as f:
+            text = f.read()
+        with gzip.open(fn + ".gz", "wb") as f:
+            f.write(text)
+        with lzma.open(fn + ".xz", "wb", preset=1) as f:
+            f.write(text)
+
+        cases = [
+            ("plain", "text", fn, ir.read_file_rows),
+            ("gzip", "thread", fn + ".gz", ir.read_file_rows),
+            ("gzip", "inline", fn + ".gz", read_rows_inline),
+            ("xz", "thread", fn + ".xz", ir.read_file_rows),
+            ("xz", "inline", fn + ".xz", read_rows_inline),
+        ]
+        rows = []
+        for compression, reader, case_fn, read_rows in cases:
+            seconds, _ = time_call(deque, read_rows(case_fn), 0)
+            rows.append(
+                {
+                    "file": compression,
+                    "reader": reader,
+                    "file_MiB": os.path.getsize(case_fn) / 2 ** 20,
+                    "text_MiB_s": text_bytes / 2 ** 20 / seconds,
+                    "s_per_1M_rows": seconds * 1_000_000 / num_rows,
+                }
+            )
+    finally:
+        shutil.rmtree(directory)
+
+    return rows
+
+
+###############################################################################
+#              _               _
+#             | |             | |
+#   ___  _   _| |_ _ __  _   _| |_
+#  / _ \| | | | __| '_ \| | | | __|
+# | (_) | |_| | |_| |_) | |_| | |_
+#  \___/ \__,_|\__| .__/ \__,_|\__|
+#                 | |
+#                 |_|
+class WindowIntervals:
+    """window intervals computed on lookup instead of held in a list
+
+    Args:
+        num_windows (int): number of windows, the first starting at hour 1
+        window (int): length of window interval
+    """
+
+    def __init__(self, num_windows, window):
+        self.num_windows = num_windows
+        self.window = window
+
+    def __len__(self):
+        return self.num_windows
+
+    def __getitem__(self, i):
+        return range(i + 1, i + 1 + self.window)
+
+
+def generate_output_per_line(window_intervals, window_errors, output_fn):
+    """write comparison one concatenated line and one write call per window
+
+    The way generate_output used to write, kept as a baseline.
+
+    Args:
+        window_intervals (list of range()): window intervals
+        window_errors (dict): keys are index of window_interval, values are
+            interval errors
+        output_fn (str): name of file to write
+    """
+    with open(output_fn, mode="w") as f:
+        for window in window_errors:
+            error = window_errors[window]
+            interval = window_intervals[window]
+            if isinstance(error, float):
+                error_str = "{:.2f}".format(error)
+            else:
+                error_str = error
+            f.write(
+                "{}".format(interval[0])
+                + ip.DELIMITER
+                + "{}".format(interval[-1])
+                + ip.DELIMITER
+                + error_str
+                + "\n"
+            )
+
+
+def benchmark_output(num_windows, window=24, seed=0):
+    """time writing the comparison file one line at a time and in batches
+
+    Args:
+        num_windows (int): number of windows written
+        window (int, optional): length of window interval
+        seed (int, optional): random seed
+
+    Returns:
+        list of dict: one row per writer
+    """
+    rng = random.Random(seed)
+    window_intervals = WindowIntervals(num_windows, window)
+    window_errors = {
+        i: "NA" if rng.random() < 0.1 else round(rng.uniform(0, 50), 2)
+        for i in range(num_windows)
+    }
+    writers = {"per_line": generate_output_per_line, "batched": ip.generate_output}
+    directory = tempfile.mkdtemp()
+
+    try:
+        rows = []
+        for name, write in writers.items():
+            output_fn = os.path.join(directory, name + ".txt")
+            seconds, _ = time_call(write, window_intervals, window_errors, output_fn)
+            rows.append(
+                {
+                    "writer": name,
+                    "seconds": seconds,
+                    "s_per_1M_windows": seconds * 1_000_000 / num_windows,
+                    "output_MiB": os.path.getsize(output_fn) / 2 ** 20,
+                }
+            )
+        for row in rows:
+            row["speedup"] = rows[0]["seconds"] / row["seconds"]
+    finally:
+        shutil.rmtree(directory)
+
+    return rows
+
+
+###############################################################################
+#            _ _
+#           (_) |
+#  ___ _   _ _| |_ ___
+# / __| | | | | __/ _ \
+# \__ \ |_| | | ||  __/
+# |___/\__,_|_|\__\___|
+def write_feeds(
+    directory, num_hours, stocks_per_hour, coverage=0.9, missing_hours=0.0, seed=0
+):
+    """write matching synthetic "actual" and "predicted" feeds
+
+    The same arguments always give the same files.
+
+    Args:
+        directory (str): where actual.txt and predicted.txt are written
+        num_hours (int): number of hours, starting at hour 1
+        stocks_per_hour (int): "actual" rows in each hour, one per stock
+        coverage (float, optional): chance a stock is predicted in an hour
+        missing_hours (float, optional): chance an hour is in neither file,
+            the first and last hours are always kept
+        seed (int, optional): random seed
+
+    Returns:
+        tuple: actual fn, predicted fn, "actual" rows, "predicted" rows
+    """
+    rng = random.Random(seed)
+    stocks = [
+        "".join(rng.choice(string.ascii_uppercase) for _ in range(6))
+        for _ in range(stocks_per_hour)
+    ]
+    actual_fn = os.path.join(directory, "actual.txt")
+    predicted_fn = os.path.join(directory, "predicted.txt")
+    actual_rows = 0
+    predicted_rows = 0
+
+    with open(actual_fn, "w") as f_actual, open(predicted_fn, "w") as f_predicted:
+        for hour in range(1, num_hours + 1):
+
+            if 1 < hour < num_hours and rng.random() < missing_hours:
+                continue
+
+            for stock in stocks:
+                price = rng.uniform(1, 500)
+                f_actual.write("{}|{}|{:.2f}\n".format(hour, stock, price))
+                actual_rows += 1
+                if rng.random() < coverage:
+                    predicted_price = max(price + rng.gauss(0, 1), 0.01)
+                    f_predicted.write(
+                        "{}|{}|{:.2f}\n".format(hour, stock, predicted_price)
+                    )
+                    predicted_rows += 1
+
+    return actual_fn, predicted_fn, actual_rows, predicted_rows
+
+
+def get_commit():
+    """get the commit the benchmarked code is at
+
+    Returns:
+        str or None: short commit hash, None outside a git checkout
+    """
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def benchmark_suite(
+    num_hours, stocks_per_hour, coverage=0.9, missing_hours=0.0, window=24,
+    reconcile="nested", engine="direct", seed=0,
+):
+    """time each comparator stage on generated feeds
+
+    Peak RSS is the process peak once the stage has run, so it only grows
+    from stage to stage.
+
+    Args:
+        num_hours (int): number of hours
+        stocks_per_hour (int): "actual" rows in each hour
+        coverage (float, optional): chance a stock is predicted in an hour
+        missing_hours (float, optional): chance an hour is in neither file
+        window (int, optional): length of window interval
+        reconcile (str, optional): key of insight_comparator.RECONCILERS
+        engine (str, optional): key of insight_comparator.ENGINES
+        seed (int, optional): random seed
+
+    Returns:
+        list of dict: one row per stage
+    """
+    directory = tempfile.mkdtemp()
+
+    try:
+        actual_fn, predicted_fn, actual_rows, predicted_rows = write_feeds(
+            directory, num_hours, stocks_per_hour, coverage, missing_hours, seed
+        )
+        output_fn = os.path.join(directory, "comparison.txt")
+        rows = []
+
+        def add_stage(stage, seconds, num_rows):
+            rows.append(
+                {
+                    "stage": stage,
+                    "seconds": seconds,
+                    "rows": num_rows,
+                    "rows_per_s": num_rows / seconds if seconds else None,
+                    "peak_rss_MiB": get_peak_rss_mib(),
+                }
+            )
+
+        seconds, hour_errors = time_call(
+            RECONCILERS[reconcile], actual_fn, predicted_fn
+        )
+        add_stage("process_input", seconds, actual_rows + predicted_rows)
+
+        seconds, window_intervals = time_call(
+            ip.get_window_intervals, window, hour_errors
+        )
+        add_stage("get_window_intervals", seconds, len(window_intervals))
+
+        seconds, window_errors = time_call(
+            ENGINES[engine], window_intervals, hour_errors
+        )
+        add_stage("get_interval_errors", seconds, len(window_errors))
+
+        seconds, _ = time_call(
+            ip.generate_output, window_intervals, window_errors, output_fn
+        )
+        add_stage("generate_output", seconds, len(window_errors))
+    finally:
+        shutil.rmtree(directory)
+
+    return rows
+
+
+def save_results(results_fn, params, rows):
+    """append a suite run to a JSON results file
+
+    The file holds a list of runs, so runs of different commits can be
+    compared.
+
+    Args:
+        results_fn (str): name of results file, created if missing
+        params (dict): arguments of benchmark_suite
+        rows (list of dict): rows from benchmark_suite
+    """
+    runs = []
+    if os.path.exists(results_fn):
+        with open(results_fn) as f:
+            runs = json.load(f)
+
+    runs.append(
+        {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": get_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "params": params,
+            "stages": rows,
+        }
+    )
+
+    with open(results_fn, "w") as f:
+        json.dump(runs, f, indent=2)
+
+
+###############################################################################
+#  _            __  __
+# | |          / _|/ _|
+# | |__  _   _| |_| |_ ___ _ __ ___
+# | '_ \| | | |  _|  _/ _ \ '__/ __|
+# | |_) | |_| | | | ||  __/ |  \__ \
+# |_.__/ \__,_|_| |_| \___|_|  |___/
+def process_input_dicts(fn_actual, fn_predicted):
+    """reconcile with {stock: {hour: price}} dicts as process_input used to
+
+    Every row is a list from format_line, scattered into a dict per stock, and
+    processed hours are deleted from every stock's dict. Kept as a baseline.
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+
+    Returns:
+        dict: errors for each hour in "actual" file
+    """
+    with ic.open_input(fn_actual) as f_actual, ic.open_input(
+        fn_predicted
+    ) as f_predicted:
+
+        current_hour = None
+        actual = {}
+        predicted = {}
+        hour_errors = {}
+
+        for actual_line, predicted_line in zip_longest(f_actual, f_predicted):
+
+            actual_line = actual_line.strip() if actual_line else None
+
+            if actual_line:
+                actual_hour, actual_stock, actual_price = ip.format_line(actual_line)
+                if current_hour is None:
+                    current_hour = actual_hour
+                ip.add_stockline_to_dict(
+                    actual, actual_hour, actual_stock, actual_price
+                )
+
+            predicted_line = predicted_line.strip() if predicted_line else None
+
+            if predicted_line:
+                predicted_hour, predicted_stock, predicted_price = ip.format_line(
+                    predicted_line
+                )
+                ip.add_stockline_to_dict(
+                    predicted, predicted_hour, predicted_stock, predicted_price
+                )
+
+            if actual_hour > current_hour:
+                hour_errors[current_hour] = ip.get_hour_error(
+                    actual, predicted, current_hour
+                )
+                ip.del_hour_from_dict(actual, current_hour)
+                ip.del_hour_from_dict(predicted, current_hour)
+                current_hour = actual_hour
+
+        current_hour = actual_hour
+        hour_errors[current_hour] = ip.get_hour_error(actual, predicted, current_hour)
+
+    return hour_errors
+
+
+BUFFERS = {"dicts": process_input_dicts, "columns": ip.process_input}
+
+
+def run_buffers(name, actual_fn, predicted_fn):
+    """reconcile with one of BUFFERS, meant to run in a fresh process
+
+    Args:
+        name (str): key of BUFFERS, None to only import and measure
+        actual_fn (str): name of "actual" file
+        predicted_fn (str): name of "predicted" file
+
+    Returns:
+        tuple: seconds, peak RSS in MiB, hour errors
+    """
+    if name is None:
+        return 0.0, get_peak_rss_mib(), None
+    seconds, hour_errors = time_call(BUFFERS[name], actual_fn, predicted_fn)
+    return seconds, get_peak_rss_mib(), hour_errors
+
+
+def benchmark_buffers(num_hours, stocks_per_hour, coverage=0.9, seed=0):
+    """time and measure peak RSS of the hour buffers of process_input
+
+    Each reconciler runs in its own freshly spawned process so the peaks do
+    not include each other. buffers_MiB is the peak over that of a process
+    which only imported the modules.
+
+    Args:
+        num_hours (int): number of hours
+        stocks_per_hour (int): "actual" rows in each hour
+        coverage (float, optional): chance a stock is predicted in an hour
+        seed (int, optional): random seed
+
+    Returns:
+        list of dict: one row per hour buffer
+    """
+    context = multiprocessing.get_context("spawn")
+    directory = tempfile.mkdtemp()
+
+    def run(name):
+        with context.Pool(1) as pool:
+            return pool.apply(run_buffers, (name, actual_fn, predicted_fn))
+
+    try:
+        actual_fn, predicted_fn, actual_rows, predicted_rows = write_feeds(
+            directory, num_hours, stocks_per_hour, coverage, seed=seed
+        )
+        _, idle_mib, _ = run(None)
+        rows = []
+        hour_errors_true = None
+        for name in BUFFERS:
+            seconds, peak_mib, hour_errors = run(name)
+            if hour_errors_true is None:
+                hour_errors_true = hour_errors
+            rows.append(
+                {
+                    "buffers": name,
+                    "seconds": seconds,
+                    "rows_per_s": (actual_rows + predicted_rows) / seconds,
+                    "peak_rss_MiB": peak_mib,
+                    "buffers_MiB": peak_mib - idle_mib,
+                    "same_errors": hour_errors == hour_errors_true,
+                }
+            )
+    finally:
+        shutil.rmtree(directory)
+
+    return rows
+
+
+def print_rows(rows):
+    """print benchmark rows as a table
+
+    Args:
+        rows (list of dict): rows with the same keys
+    """
+    keys = list(rows[0])
+    print("  ".join("{:>12}".format(key) for key in keys))
+    for row in rows:
+        cells = []
+        for key in keys:
+            value = row[key]
+            if isinstance(value, float):
+                cells.append("{:>12.4f}".format(value))
+            else:
+                cells.append("{:>12}".format(str(value)))
+        print("  ".join(cells))
+
+
+if __name__ == "__main__":
+
+    parser = ArgumentParser()
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    windows_parser = subparsers.add_parser("windows", help="window engines")
+    windows_parser.add_argument("--hours", type=int, default=10_000)
+    windows_parser.add_argument(
+        "--windows", type=int, nargs="+", default=[1, 10, 100, 1000, 2000]
+    )
+
+    parse_parser = subparsers.add_parser("parse", help="line readers")
+    parse_parser.add_argument("--rows", type=int, default=1_000_000)
+    parse_parser.add_argument("--stocks-per-hour", type=int, default=10_000)
+
+    compressed_parser = subparsers.add_parser("compressed", help="compressed input")
+    compressed_parser.add_argument("--rows", type=int, default=1_000_000)
+    compressed_parser.add_argument("--stocks-per-hour", type=int, default=10_000)
+
+    output_parser = subparsers.add_parser("output", help="comparison writers")
+    output_parser.add_argument("--windows", type=int, default=10_000_000)
+    output_parser.add_argument("--window", type=int, default=24)
+
+    suite_parser = subparsers.add_parser("suite", help="every comparator stage")
+    suite_parser.add_argument("--hours", type=int, default=1_000)
+    suite_parser.add_argument("--stocks-per-hour", type=int, default=1_000)
+    suite_parser.add_argument("--coverage", type=float, default=0.9)
+    suite_parser.add_argument("--missing-hours", type=float, default=0.0)
+    suite_parser.add_argument("--window", type=int, default=24)
+    suite_parser.add_argument(
+        "--reconcile", choices=sorted(RECONCILERS), default="nested"
+    )
+    suite_parser.add_argument("--engine", choices=sorted(ENGINES), default="direct")
+    suite_parser.add_argument("--seed", type=int, default=0)
+    suite_parser.add_argument(
+        "--results", default=None, help="JSON file the run is appended to"
+    )
+
+    buffers_parser = subparsers.add_parser("buffers", help="process_input buffers")
+    buffers_parser.add_argument("--hours", type=int, default=3)
+    buffers_parser.add_argument("--stocks-per-hour", type=int, default=1_000_000)
+    buffers_parser.add_argument("--coverage", type=float, default=0.9)
+    buffers_parser.add_argument("--seed", type=int, default=0)
+
+    args = parser.parse_args()
+
+    if args.benchmark == "windows":
+        print_rows(benchmark_windows(args.hours, args.windows))
+    elif args.benchmark == "parse":
+        print_rows(benchmark_parse(args.rows, args.stocks_per_hour))
+    elif args.benchmark == "compressed":
+        print_rows(benchmark_compressed(args.rows, args.stocks_per_hour))
+    elif args.benchmark == "output":
+        print_rows(benchmark_output(args.windows, args.window))
+    elif args.benchmark == "suite":
+        params = {
+            "num_hours": args.hours,
+            "stocks_per_hour": args.stocks_per_hour,
+            "coverage": args.coverage,
+            "missing_hours": args.missing_hours,
+            "window": args.window,
+            "reconcile": args.reconcile,
+            "engine": args.engine,
+            "seed": args.seed,
+        }
+        rows = benchmark_suite(**params)
+        print_rows(rows)
+        if args.results:
+            save_results(args.results, params, rows)
+    elif args.benchmark == "buffers":
+        print_rows(
+            benchmark_buffers(
+                args.hours, args.stocks_per_hour, args.coverage, args.seed
+            )
+        )
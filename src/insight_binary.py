@@ -0,0 +1,370 @@
+#  _     _
+# | |   (_)
+# | |__  _ _ __   __ _ _ __ _   _
+# | '_ \| | '_ \ / _` | '__| | | |
+# | |_) | | | | | (_| | |  | |_| |
+# |_.__/|_|_| |_|\__,_|_|   \__, |
+#                            __/ |
+#                           |___/
+#
+# compact columnar binary format for parsed "actual" / "predicted" files
+#
+# A text file is converted once; every later run reads whole columns with
+# array.frombytes instead of splitting and parsing each line. Layout, all
+# little-endian:
+#
+#   header       magic, version, price places, number of stocks, hours, rows
+#   stock table  each stock as a 2 byte length and its UTF-8 bytes
+#   hour index   for each hour in file order, the hour and its first row
+#   stock ids    uint32 per row, index into the stock table
+#   prices       int64 per row, price times 10 ** places
+#
+# Rows of an hour are the rows from its first row to the next hour's first
+# row, so reading any hour range is a seek. Prices are exact: value / 10 **
+# places is the same float float() gives for the text, and with two places
+# the values are integer cents.
+import os
+import shutil
+import struct
+import sys
+import tempfile
+from array import array
+from argparse import ArgumentParser
+from bisect import bisect_left
+from bisect import bisect_right
+
+from insight_processing import split
+from insight_processing import str_to_int
+from insight_reconcile import iter_hour_errors
+from insight_reconcile import merge_hours
+
+MAGIC = b"JRCF"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIIQ")
+STOCK_LENGTH = struct.Struct("<H")
+HOUR_ENTRY = struct.Struct("<qQ")
+ID_TYPE = "I"
+PRICE_TYPE = "q"
+CHUNK_ROWS = 1 << 20
+DEFAULT_PLACES = 2
+
+
+###############################################################################
+#                                _
+#                               | |
+#   ___ ___  _ ____   _____ _ __| |_
+#  / __/ _ \| '_ \ \ / / _ \ '__| __|
+# | (_| (_) | | | \ V /  __/ |  | |_
+#  \___\___/|_| |_|\_/ \___|_|   \__|
+def get_fixed_point_price(s, places):
+    """get price value for s as an int of 10 ** -places units
+
+    Args:
+        s (str): str to convert, price in format $.cents
+        places (int): number of decimal places kept
+
+    Returns:
+        int: s times 10 ** places
+
+    Raises:
+        ValueError: Exception if s is not a price or has more than places
+            decimal places
+    """
+    sign = 1
+    if s[:1] == "-":
+        sign = -1
+        s = s[1:]
+    whole, _, fraction = s.replace("_", "").partition(".")
+    if len(fraction) <= places and (whole + fraction).isdigit():
+        fraction = int(fraction.ljust(places, "0") or 0)
+        return sign * (int(whole or 0) * 10 ** places + fraction)
+    else:
+        raise ValueError(
+            "Cannot interpret price with {} decimal places: {}".format(places, s)
+        )
+
+
+def to_little_endian(values):
+    """byteswap an array in place on big-endian machines
+
+    Args:
+        values (array): stock ids or prices
+
+    Returns:
+        array: values, little-endian
+    """
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+def convert_text_to_binary(text_fn, binary_fn, places=DEFAULT_PLACES):
+    """convert an "actual" or "predicted" text file to the binary format
+
+    The stock id and price columns are spooled to temporary files so memory
+    is bounded by the stock table and hour index, not the row count.
+
+    Args:
+        text_fn (str): name of text file
+        binary_fn (str): name of binary file to write
+        places (int, optional): decimal places kept of each price
+
+    Raises:
+        ValueError: Exception if a line cannot be parsed or hours decrease
+    """
+    stock_ids = {}
+    hour_index = []
+    num_rows = 0
+    ids = array(ID_TYPE)
+    prices = array(PRICE_TYPE)
+
+    with tempfile.TemporaryFile() as f_ids, tempfile.TemporaryFile() as f_prices:
+
+        with open(text_fn) as f:
+
+            for line in f:
+
+                line = line.strip()
+                if not line:
+                    continue
+
+                hour, stock, price = split(line)
+                hour = str_to_int(hour)
+
+                if not hour_index or hour != hour_index[-1][0]:
+                    if hour_index and hour < hour_index[-1][0]:
+                        message = "Hours must be non-decreasing, found {} after {}"
+                        raise ValueError(message.format(hour, hour_index[-1][0]))
+                    hour_index.append((hour, num_rows))
+
+                stock_id = stock_ids.get(stock)
+                if stock_id is None:
+                    stock_id = stock_ids[stock] = len(stock_ids)
+
+                ids.append(stock_id)
+                prices.append(get_fixed_point_price(price, places))
+                num_rows += 1
+
+                if len(ids) == CHUNK_ROWS:
+                    to_little_endian(ids).tofile(f_ids)
+                    to_little_endian(prices).tofile(f_prices)
+                    ids = array(ID_TYPE)
+                    prices = array(PRICE_TYPE)
+
+        to_little_endian(ids).tofile(f_ids)
+        to_little_endian(prices).tofile(f_prices)
+
+        # written next to the target and renamed, so readers never see half
+        temp_fn = binary_fn + ".tmp"
+        with open(temp_fn, "wb") as f:
+            f.write(
+                HEADER.pack(
+                    MAGIC, VERSION, places, len(stock_ids), len(hour_index), num_rows
+                )
+            )
+            for stock in stock_ids:
+                encoded = stock.encode()
+                f.write(STOCK_LENGTH.pack(len(encoded)))
+                f.write(encoded)
+            for hour, first_row in hour_index:
+                f.write(HOUR_ENTRY.pack(hour, first_row))
+            for f_column in (f_ids, f_prices):
+                f_column.seek(0)
+                shutil.copyfileobj(f_column, f)
+
+        os.replace(temp_fn, binary_fn)
+
+
+###############################################################################
+#                     _
+#                    | |
+#  _ __ ___  __ _  __| |
+# | '__/ _ \/ _` |/ _` |
+# | | |  __/ (_| | (_| |
+# |_|  \___|\__,_|\__,_|
+def is_binary_feed(fn):
+    """check if fn is in the binary format
+
+    Args:
+        fn (str): name of file
+
+    Returns:
+        bool: True if fn starts with the binary format's magic bytes
+    """
+    with open(fn, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def read_header(f):
+    """read the header, stock table and hour index of a binary file
+
+    Args:
+        f (file): binary file opened in binary mode, at its start
+
+    Returns:
+        dict: places, stocks, hours, first rows and column offsets
+
+    Raises:
+        ValueError: Exception if f is not a binary file of this version
+    """
+    magic, version, places, num_stocks, num_hours, num_rows = HEADER.unpack(
+        f.read(HEADER.size)
+    )
+    if magic != MAGIC or version != VERSION:
+        raise ValueError("Not a binary price file of version {}".format(VERSION))
+
+    stocks = []
+    for _ in range(num_stocks):
+        (length,) = STOCK_LENGTH.unpack(f.read(STOCK_LENGTH.size))
+        stocks.append(sys.intern(f.read(length).decode()))
+
+    hours = []
+    first_rows = []
+    hour_entries = f.read(HOUR_ENTRY.size * num_hours)
+    for hour, first_row in HOUR_ENTRY.iter_unpack(hour_entries):
+        hours.append(hour)
+        first_rows.append(first_row)
+    first_rows.append(num_rows)
+
+    ids_offset = f.tell()
+    prices_offset = ids_offset + num_rows * array(ID_TYPE).itemsize
+
+    return {
+        "places": places,
+        "stocks": stocks,
+        "hours": hours,
+        "first_rows": first_rows,
+        "ids_offset": ids_offset,
+        "prices_offset": prices_offset,
+    }
+
+
+def read_column(f, offset, type_code, start, end):
+    """read rows start:end of a column
+
+    Args:
+        f (file): binary file opened in binary mode
+        offset (int): offset of the column
+        type_code (str): array type code of the column
+        start (int): first row
+        end (int): row to stop before
+
+    Returns:
+        array: values of the rows
+    """
+    values = array(type_code)
+    f.seek(offset + start * values.itemsize)
+    values.frombytes(f.read((end - start) * values.itemsize))
+    return to_little_endian(values)
+
+
+def read_binary_hours(fn, cents=False, first_hour=None, last_hour=None):
+    """read hour buffers straight from a binary file
+
+    Drop-in for insight_reconcile.group_hours over the rows of a text file.
+
+    Args:
+        fn (str): name of binary file
+        cents (bool, optional): give prices as integer cents, not float
+        first_hour (int, optional): skip hours before this one
+        last_hour (int, optional): stop after this hour
+
+    Yields:
+        tuple: hour, dict of stock: price for that hour
+
+    Raises:
+        ValueError: Exception if cents is asked of prices with more than two
+            decimal places
+    """
+    with open(fn, "rb") as f:
+
+        header = read_header(f)
+        stocks = header["stocks"]
+        hours = header["hours"]
+        first_rows = header["first_rows"]
+        places = header["places"]
+
+        if cents and places > 2:
+            raise ValueError("Prices have {} decimal places, not cents".format(places))
+
+        start_index = 0 if first_hour is None else bisect_left(hours, first_hour)
+        end_index = len(hours) if last_hour is None else bisect_right(hours, last_hour)
+
+        index = start_index
+
+        while index < end_index:
+
+            # read whole hours, about CHUNK_ROWS rows at a time
+            chunk_end = bisect_right(
+                first_rows, first_rows[index] + CHUNK_ROWS, index + 1, end_index
+            )
+            start = first_rows[index]
+            end = first_rows[chunk_end]
+
+            ids = read_column(f, header["ids_offset"], ID_TYPE, start, end)
+            prices = read_column(f, header["prices_offset"], PRICE_TYPE, start, end)
+
+            if cents:
+                prices = [price * 10 ** (2 - places) for price in prices]
+            else:
+                scale = 10 ** places
+                prices = [price / scale for price in prices]
+
+            for i in range(index, chunk_end):
+                hour_start = first_rows[i] - start
+                hour_end = first_rows[i + 1] - start
+                yield hours[i], dict(
+                    zip(
+                        map(stocks.__getitem__, ids[hour_start:hour_end]),
+                        prices[hour_start:hour_end],
+                    )
+                )
+
+            index = chunk_end
+
+
+###############################################################################
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+def process_input_binary(
+    fn_actual, fn_predicted, cents=False, first_hour=None, last_hour=None
+):
+    """reconcile two binary files hour by hour
+
+    Same results as insight_reconcile.process_input_merged on the text files.
+
+    Args:
+        fn_actual (str): name of binary "actual" file
+        fn_predicted (str): name of binary "predicted" file
+        cents (bool, optional): prices as integer cents, see --cents
+        first_hour (int, optional): skip hours before this one
+        last_hour (int, optional): stop after this hour
+
+    Returns:
+        dict: errors for each hour in "actual" file
+    """
+    merged_hours = merge_hours(
+        read_binary_hours(fn_actual, cents, first_hour, last_hour),
+        read_binary_hours(fn_predicted, cents, first_hour, last_hour),
+    )
+    return dict(iter_hour_errors(merged_hours))
+
+
+parser = ArgumentParser(description="convert a text price file to binary")
+parser.add_argument("text_fn", help="path to text file")
+parser.add_argument("binary_fn", help="path of binary file to write")
+parser.add_argument(
+    "--places",
+    type=int,
+    default=DEFAULT_PLACES,
+    help="decimal places kept of each price",
+)
+
+if __name__ == "__main__":
+
+    args = parser.parse_args()
+    convert_text_to_binary(args.text_fn, args.binary_fn, args.places)
@@ -0,0 +1,230 @@
+#       _               _                _       _
+#      | |             | |              (_)     | |
+#   ___| |__   ___  ___| | ___ __   ___  _ _ __ | |_
+#  / __| '_ \ / _ \/ __| |/ / '_ \ / _ \| | '_ \| __|
+# | (__| | | |  __/ (__|   <| |_) | (_) | | | | | |_
+#  \___|_| |_|\___|\___|_|\_\ .__/ \___/|_|_| |_|\__|
+#                           | |
+#                           |_|
+#
+# incremental recomputation from a compact store of an earlier run
+#
+# A daily job's inputs only grow, so a run picks up where the last one left
+# off. The store holds the follow state of insight_follow at the last hour both
+# inputs had completed (where reading stopped in each input, the rolling window
+# accumulator, which only holds the hours of the last window, and how long the
+# output was by then) plus one digest of everything that state was built from:
+# the bytes of each input it read and the output it wrote.
+#
+# A later run hashes those bytes again, which is much cheaper than parsing
+# them. If they are unchanged it reads only the bytes after the saved offsets
+# and rolls the digest forward over them, otherwise, e.g. after an earlier hour
+# was edited, it starts from scratch.
+# Either way the output is the same as a full run of
+# insight_comparator.py --reconcile merged --engine cumulative.
+import copy
+import json
+import os
+from hashlib import blake2b
+
+from insight_follow import follow_once
+from insight_follow import make_follow_state
+from insight_processing import format_line
+from insight_windows import get_average
+
+STORE_VERSION = 2
+DIGEST_BLOCK = 1 << 20
+
+
+###############################################################################
+#      _
+#     | |
+#  ___| |_ ___  _ __ ___
+# / __| __/ _ \| '__/ _ \
+# \__ \ || (_) | | |  __/
+# |___/\__\___/|_|  \___|
+def get_store_key(window, parse=format_line, average=get_average):
+    """get what a store's results depend on besides the inputs
+
+    Args:
+        window (int): length of window interval
+        parse (callable, optional): line parser, e.g. format_line_cents
+        average (callable, optional): get_average or get_average_cents
+
+    Returns:
+        dict: window and the names of parse and average
+    """
+    return {"window": window, "parse": parse.__name__, "average": average.__name__}
+
+
+def make_store(key):
+    """make an empty store, a first run reads every hour
+
+    Args:
+        key (dict): from get_store_key
+
+    Returns:
+        dict: store
+    """
+    return {
+        "version": STORE_VERSION,
+        "key": key,
+        "digest": None,
+        "state": make_follow_state(key["window"]),
+    }
+
+
+def load_store(store_fn, key):
+    """load the store written by an earlier run
+
+    A missing store, or one written by another version or for another key,
+    gives an empty store.
+
+    Args:
+        store_fn (str): name of store file
+        key (dict): from get_store_key
+
+    Returns:
+        dict: store
+    """
+    if not os.path.exists(store_fn):
+        return make_store(key)
+
+    with open(store_fn) as f:
+        store = json.load(f)
+
+    if store.get("version") != STORE_VERSION or store.get("key") != key:
+        return make_store(key)
+
+    return store
+
+
+def save_store(store, store_fn):
+    """save store so that a crash never leaves a half written file
+
+    Args:
+        store (dict): store
+        store_fn (str): name of store file
+    """
+    temp_fn = store_fn + ".tmp"
+    with open(temp_fn, "w") as f:
+        json.dump(store, f, separators=(",", ":"))
+    os.replace(temp_fn, store_fn)
+
+
+###############################################################################
+#      _ _                 _
+#     | (_)               | |
+#   __| |_  __ _  ___  ___| |_
+#  / _` | |/ _` |/ _ \/ __| __|
+# | (_| | | (_| |  __/\__ \ |_
+#  \__,_|_|\__, |\___||___/\__|
+#           __/ |
+#          |___/
+def update_digest(digest, fn, start, end):
+    """add bytes start to end of fn to digest
+
+    Args:
+        digest (blake2b): digest, updated in place
+        fn (str): name of file
+        start (int): first byte
+        end (int): end byte
+
+    Returns:
+        bool: False if fn is missing or shorter than end
+    """
+    if not os.path.exists(fn) or os.path.getsize(fn) < end:
+        return False
+
+    with open(fn, "rb") as f:
+        f.seek(start)
+        remaining = end - start
+        while remaining:
+            block = f.read(min(DIGEST_BLOCK, remaining))
+            digest.update(block)
+            remaining -= len(block)
+
+    return True
+
+
+def get_state_sizes(state):
+    """get how much of each file a follow state covers
+
+    Args:
+        state (dict): follow state
+
+    Returns:
+        list of int: bytes of "actual", "predicted" and output
+    """
+    return [state["actual_offset"], state["predicted_offset"], state["output_size"]]
+
+
+def join_digests(digests):
+    """join one digest per file into the store's single digest
+
+    The per-file digests can still be updated afterwards, so the store's
+    digest rolls forward with the bytes each run adds.
+
+    Args:
+        digests (list of blake2b): digest of each file
+
+    Returns:
+        str: hex digest
+    """
+    return blake2b(b"".join(digest.digest() for digest in digests)).hexdigest()
+
+
+###############################################################################
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+def run_checkpointed(
+    fn_actual, fn_predicted, output_fn, store, parse=format_line, average=get_average
+):
+    """write every window, reading only what was appended since store
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        output_fn (str): name of output file
+        store (dict): store from load_store, updated in place
+        parse (callable, optional): turns a stripped line into hour, stock, price
+        average (callable, optional): get_average or get_average_cents
+
+    Returns:
+        bool: True if the run resumed from store, False if it started over
+
+    Raises:
+        ValueError: Exception if window is larger than the data breadth
+    """
+    fns = (fn_actual, fn_predicted, output_fn)
+    digests = [blake2b(digest_size=16) for fn in fns]
+    state = store["state"]
+    sizes = get_state_sizes(state)
+
+    resumed = (
+        store["digest"] is not None
+        and all(map(update_digest, digests, fns, [0] * len(fns), sizes))
+        and join_digests(digests) == store["digest"]
+    )
+
+    if not resumed:
+        digests = [blake2b(digest_size=16) for fn in fns]
+        state = make_follow_state(store["key"]["window"])
+        sizes = get_state_sizes(state)
+        open(output_fn, "w").close()
+
+    # hours both inputs have completed, the state saved for the next run
+    follow_once(state, fn_actual, fn_predicted, output_fn, False, parse, average)
+    for digest, fn, start, end in zip(digests, fns, sizes, get_state_sizes(state)):
+        update_digest(digest, fn, start, end)
+    store["state"] = copy.deepcopy(state)
+    store["digest"] = join_digests(digests)
+
+    # then the rest, which the next run reads again
+    follow_once(state, fn_actual, fn_predicted, output_fn, True, parse, average)
+
+    return resumed
@@ -0,0 +1,152 @@
+#            _
+#           | |
+#   ___ ___ | |_   _ _ __ ___  _ __  ___
+#  / __/ _ \| | | | | '_ ` _ \| '_ \/ __|
+# | (_| (_) | | |_| | | | | | | | | \__ \
+#  \___\___/|_|\__,_|_| |_| |_|_| |_|___/
+#
+# compact hour buffers for insight_processing.process_input
+#
+# Each stock is interned once into a stock table that gives it an int id in
+# the order it is first seen. A buffered hour is then two columns, one row per
+# line: an array('q') of stock ids and an array of prices, array('d') or, for
+# integer cents, array('q'). A buffered row costs 16 bytes instead of a price
+# float, a stock str and a slot in a per-stock dict, however sparse the ids.
+#
+# An hour is matched through a positions array indexed by stock id, as long as
+# the stock table and reused by every flush, so a flush only touches the rows
+# of its own hour.
+from array import array
+
+
+###############################################################################
+#  _        _     _
+# | |      | |   | |
+# | |_ __ _| |__ | | ___
+# | __/ _` | '_ \| |/ _ \
+# | || (_| | |_) | |  __/
+#  \__\__,_|_.__/|_|\___|
+def get_stock_id(stock_ids, stock):
+    """get the id of stock, interning it if it is new
+
+    Args:
+        stock_ids (dict): keys are stocks, values are ids, updated in place
+        stock (str): stock to look up
+
+    Returns:
+        int: id of stock, ids count up from 0 in first-seen order
+    """
+    stock_id = stock_ids.get(stock)
+    if stock_id is None:
+        stock_id = stock_ids[stock] = len(stock_ids)
+    return stock_id
+
+
+###############################################################################
+#            _
+#           | |
+#   ___ ___ | |_   _ _ __ ___  _ __  ___
+#  / __/ _ \| | | | | '_ ` _ \| '_ \/ __|
+# | (_| (_) | | |_| | | | | | | | | \__ \
+#  \___\___/|_|\__,_|_| |_| |_|_| |_|___/
+class HourColumns:
+    """one hour's rows in columns
+
+    Attributes:
+        ids (array): stock id of each row
+        prices (array): price of each row, array('q') for integer cents
+    """
+
+    __slots__ = ("ids", "prices")
+
+    def __init__(self, typecode="d"):
+        self.ids = array("q")
+        self.prices = array(typecode)
+
+
+EMPTY_COLUMNS = HourColumns()
+
+
+def add_stockline_to_columns(hours, hour, stock_id, price):
+    """add a stock line to the columns for its hour
+
+    The price column of a new hour is array('q') if price is an int, e.g.
+    from format_line_cents, so cents are never turned into floats.
+
+    Args:
+        hours (dict): keys are hours, values are HourColumns, updated in place
+        hour (int): hour of the line
+        stock_id (int): id of the line's stock from get_stock_id
+        price (float or int): price of the line
+
+    Raises:
+        TypeError: Exception if a float price is added to an hour of cents
+    """
+    columns = hours.get(hour)
+    if columns is None:
+        columns = hours[hour] = HourColumns("q" if isinstance(price, int) else "d")
+
+    columns.ids.append(stock_id)
+    columns.prices.append(price)
+
+
+def get_columns_error(actual, predicted, ranks, positions):
+    """get error value for one hour's columns
+
+    Same totals as insight_processing.get_hour_error when ranks holds the
+    order each stock id first appeared in the "predicted" file. As with a
+    dict, a later line for the same stock and hour replaces the price.
+
+    Args:
+        actual (HourColumns): actual prices of the hour
+        predicted (HourColumns): predicted prices of the hour
+        ranks (array): first-seen "predicted" rank of each stock id, errors
+            are added in this order
+        positions (array): scratch array('q') of 0s, one per stock id, left
+            as it was found
+
+    Returns:
+        tuple: Total hour error, number of stocks for this error
+    """
+    actual_ids, actual_prices = actual.ids, actual.prices
+    predicted_ids, predicted_prices = predicted.ids, predicted.prices
+
+    # row of each actual stock, plus 1 so that 0 means missing
+    for row, stock_id in enumerate(actual_ids, 1):
+        positions[stock_id] = row
+
+    # backwards, so a stock's last "predicted" row is the one kept
+    matched = array("q")
+    for row in range(len(predicted_ids) - 1, -1, -1):
+        stock_id = predicted_ids[row]
+        actual_row = positions[stock_id]
+        if actual_row > 0:
+            matched.append(row)
+            positions[stock_id] = -actual_row
+
+    matched.reverse()
+    errors = [
+        abs(predicted_prices[row] - actual_prices[-positions[predicted_ids[row]] - 1])
+        for row in sorted(matched, key=lambda row: ranks[predicted_ids[row]])
+    ]
+
+    for stock_id in actual_ids:
+        positions[stock_id] = 0
+
+    return sum(errors), len(errors)
+
+
+def drop_hours_before(hours, hour):
+    """drop buffers for every hour before hour
+
+    Note: deletes in place. Relies on buffers being added in hour order, which
+    holds whenever the file's hours are non-decreasing.
+
+    Args:
+        hours (dict): keys are hours, values are buffers
+        hour (int): first hour to keep
+    """
+    for buffered_hour in list(hours):
+        if buffered_hour >= hour:
+            break
+        del hours[buffered_hour]
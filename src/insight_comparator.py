@@ -1,24 +1,757 @@
-
+import os
+import sys
 from argparse import ArgumentParser
+from functools import partial
+from insight_binary import is_binary_feed
+from insight_binary import process_input_binary
+from insight_checkpoint import get_store_key
+from insight_checkpoint import load_store
+from insight_checkpoint import run_checkpointed
+from insight_checkpoint import save_store
+from insight_compression import get_compression
+from insight_error_metrics import ERROR_METRICS
+from insight_error_metrics import get_interval_errors_metric
+from insight_error_metrics import process_input_metrics
+from insight_follow import follow
+from insight_follow import follow_once
+from insight_follow import load_follow_state
+from insight_follow import save_follow_state
+from insight_index import process_input_range
+from insight_metrics import iter_input_hour_errors_counted
+from insight_metrics import make_metrics
+from insight_metrics import measure_stage
+from insight_metrics import write_metrics
+from insight_mmap import get_cents_from_bytes
+from insight_mmap import read_mmap_rows
+from insight_numpy import process_input_numpy
+from insight_parallel import process_input_parallel
+from insight_pipeline import run_pipeline
+from insight_processing import STDOUT
+from insight_processing import format_line
+from insight_processing import format_line_cents
+from insight_processing import format_line_cents_trusted
+from insight_processing import format_line_trusted
 from insight_processing import generate_output
+from insight_processing import get_cents_trusted
 from insight_processing import get_interval_errors
-from insight_processing import get_window
+from insight_processing import get_metric_output_fn
+from insight_processing import get_model_output_fn
 from insight_processing import get_window_intervals
+from insight_processing import get_window_output_fn
+from insight_processing import get_windows
 from insight_processing import process_input
+from insight_reconcile import iter_input_hour_errors
+from insight_reconcile import iter_input_hour_errors_reordered
+from insight_reconcile import make_late_rows
+from insight_reconcile import process_input_buffered
+from insight_reconcile import process_input_many
+from insight_reconcile import process_input_merged
+from insight_reconcile import process_input_reordered
+from insight_reconcile import read_file_rows
+from insight_reconcile import read_file_rows_trusted
+from insight_stocks import generate_stock_report
+from insight_stocks import get_report_fns
+from insight_stocks import iter_input_hour_errors_by_stock
+from insight_stocks import make_stock_report
+from insight_validate import validate_inputs
+from insight_windows import generate_output_runs
+from insight_windows import generate_output_stream
+from insight_windows import get_average
+from insight_windows import get_average_cents
+from insight_windows import get_interval_errors_cumulative
+from insight_windows import get_interval_errors_many
+from insight_windows import get_interval_errors_sparse
+from insight_windows import get_sparse_cumulative
+from insight_windows import iter_window_errors
+from insight_windows import iter_window_runs
+
+ENGINES = {
+    "direct": get_interval_errors,
+    "cumulative": get_interval_errors_cumulative,
+    "sparse": get_interval_errors_sparse,
+}
+RECONCILERS = {
+    "nested": process_input,
+    "buffered": process_input_buffered,
+    "merged": process_input_merged,
+    "numpy": process_input_numpy,
+}
+READERS = {"text": read_file_rows, "mmap": read_mmap_rows}
+
+# reconcilers that can parse prices into integer cents
+CENTS_RECONCILERS = {"buffered", "merged"}
 
 parser = ArgumentParser()
 parser.add_argument("filepaths", nargs="*", help="paths to files")
+parser.add_argument(
+    "--windows",
+    type=int,
+    nargs="+",
+    default=None,
+    help="window lengths to use instead of the lines of the window file",
+)
+parser.add_argument(
+    "--predicted",
+    nargs="+",
+    default=None,
+    metavar="PREDICTED_FILE",
+    help="more predicted files scored against the same actual file (merged)",
+)
+parser.add_argument(
+    "--start-hour",
+    type=int,
+    default=None,
+    help="compare only hours from this one on, seeking with a sidecar index",
+)
+parser.add_argument(
+    "--end-hour",
+    type=int,
+    default=None,
+    help="compare only hours up to and including this one",
+)
+parser.add_argument(
+    "--index-dir",
+    default=None,
+    help="keep the hour indexes of --start-hour/--end-hour here, not by the inputs",
+)
+parser.add_argument(
+    "--engine",
+    choices=sorted(ENGINES),
+    default="cumulative",
+    help="how window errors are computed",
+)
+parser.add_argument(
+    "--reconcile",
+    choices=sorted(RECONCILERS),
+    default="buffered",
+    help="how hours of the input files are buffered and matched",
+)
+parser.add_argument(
+    "--reader",
+    choices=sorted(READERS),
+    default="text",
+    help="how lines are read and parsed (--reconcile merged only)",
+)
+parser.add_argument(
+    "--workers",
+    type=int,
+    default=None,
+    help="reconcile hour-aligned shards in this many processes, 0 for one per CPU "
+    "(--reconcile merged only)",
+)
+parser.add_argument(
+    "--reorder-horizon",
+    type=int,
+    default=None,
+    metavar="HOURS",
+    help="hold hours open for rows up to this many hours late (merged)",
+)
+parser.add_argument(
+    "--trusted",
+    action="store_true",
+    help="parse lines with a single int() and float(), checking a sample first",
+)
+parser.add_argument(
+    "--validate-lines",
+    type=int,
+    default=1000,
+    help="with --trusted, first lines of each input checked with the strict parser",
+)
+parser.add_argument(
+    "--validate-every",
+    type=int,
+    default=None,
+    help="with --trusted, also check every this many lines after them",
+)
+parser.add_argument(
+    "--cents",
+    action="store_true",
+    help="parse prices into integer cents and round window errors half up",
+)
+parser.add_argument(
+    "--stream",
+    action="store_true",
+    help="write each window as soon as its last hour is reconciled (merged only)",
+)
+parser.add_argument(
+    "--pipeline",
+    action="store_true",
+    help="read, parse, reconcile and write on their own threads (merged only)",
+)
+parser.add_argument(
+    "--follow",
+    metavar="STATE_FILE",
+    default=None,
+    help="keep appending windows as the input files grow, resuming from STATE_FILE",
+)
+parser.add_argument(
+    "--poll",
+    type=float,
+    default=60,
+    help="seconds between passes of --follow",
+)
+parser.add_argument(
+    "--final",
+    action="store_true",
+    help="with --follow, run one last pass treating the inputs as finished",
+)
+parser.add_argument(
+    "--checkpoint",
+    metavar="STORE_FILE",
+    default=None,
+    help="redo only hours and windows whose input changed since STORE_FILE (merged)",
+)
+parser.add_argument(
+    "--error-metrics",
+    nargs="+",
+    choices=sorted(ERROR_METRICS),
+    default=None,
+    metavar="METRIC",
+    help="also write these metrics, e.g. rmse median, from the same read (merged)",
+)
+parser.add_argument(
+    "--top-stocks",
+    type=int,
+    default=None,
+    metavar="K",
+    help="also report the K worst stocks of each window and of the run (merged)",
+)
+parser.add_argument(
+    "--metrics",
+    metavar="METRICS_FILE",
+    default=None,
+    help="write per-stage times, row and hour counts and peak memory as JSON",
+)
+parser.add_argument(
+    "--metrics-interval",
+    type=float,
+    default=None,
+    help="also rewrite METRICS_FILE every this many seconds while reconciling",
+)
+
+
+def get_parse(args):
+    """get the line parser picked by the command line options
+
+    Args:
+        args (Namespace): parsed command line options
+
+    Returns:
+        callable: turns a stripped line into hour, stock, price
+    """
+    if args.cents:
+        return format_line_cents_trusted if args.trusted else format_line_cents
+    return format_line_trusted if args.trusted else format_line
+
+
+def get_read_rows(args):
+    """get the row reader picked by the command line options
+
+    Args:
+        args (Namespace): parsed command line options
+
+    Returns:
+        callable: yields hour, stock, price rows of a file
+    """
+    if args.reader == "mmap":
+        # both files share one stock table so equal tickers are one object
+        get_price = get_cents_from_bytes if args.cents else float
+        return partial(read_mmap_rows, stocks={}, get_price=get_price)
+
+    if args.trusted:
+        get_price = get_cents_trusted if args.cents else float
+        return partial(
+            read_file_rows_trusted, parse=get_parse(args), get_price=get_price
+        )
+
+    return partial(read_file_rows, parse=get_parse(args))
+
+
+def get_hour_errors(
+    args, actual_fn, predicted_fn, metrics=None, report=None, late=None
+):
+    """run the reconciler picked by the command line options
+
+    Args:
+        args (Namespace): parsed command line options
+        actual_fn (str): name of "actual" file
+        predicted_fn (str): name of "predicted" file
+        metrics (dict, optional): metrics from make_metrics, rows and hours of
+            the merged reconciler are counted into it
+        report (dict, optional): from make_stock_report, stocks of the merged
+            reconciler are added to it
+        late (dict, optional): with --reorder-horizon, late rows of each file
+            are counted into it, see iter_input_hour_errors_reordered
+
+    Returns:
+        dict: errors for each hour in "actual" file
+    """
+    parse = get_parse(args)
+
+    if is_binary_feed(actual_fn):
+        return process_input_binary(
+            actual_fn, predicted_fn, args.cents, args.start_hour, args.end_hour
+        )
+
+    if args.start_hour is not None or args.end_hour is not None:
+        return process_input_range(
+            actual_fn,
+            predicted_fn,
+            args.start_hour,
+            args.end_hour,
+            parse,
+            args.index_dir,
+        )
+
+    if args.workers is not None:
+        return process_input_parallel(actual_fn, predicted_fn, args.workers, parse)
+
+    if args.reorder_horizon is not None:
+        return process_input_reordered(
+            actual_fn, predicted_fn, args.reorder_horizon, late, get_read_rows(args)
+        )
+
+    if args.reconcile == "merged" and report is not None:
+        return dict(
+            iter_input_hour_errors_by_stock(
+                actual_fn, predicted_fn, report, get_read_rows(args)
+            )
+        )
+
+    if args.reconcile == "merged" and metrics is not None:
+        return dict(
+            iter_input_hour_errors_counted(
+                actual_fn, predicted_fn, metrics, get_read_rows(args)
+            )
+        )
+
+    if args.reconcile == "merged":
+        return process_input_merged(actual_fn, predicted_fn, get_read_rows(args))
+
+    if args.cents or args.trusted:
+        return RECONCILERS[args.reconcile](actual_fn, predicted_fn, parse)
+
+    return RECONCILERS[args.reconcile](actual_fn, predicted_fn)
+
+
+def report_late_rows(late, fns, metrics=None):
+    """report the rows the reorder buffers dropped as late
+
+    Args:
+        late (dict): keys "actual" and "predicted", each from make_late_rows
+        fns (dict): keys "actual" and "predicted", names of the files
+        metrics (dict, optional): metrics from make_metrics, late rows are
+            added to its row counts
+    """
+    for name in ("actual", "predicted"):
+        if late[name]["rows"]:
+            print(
+                "{}: dropped {} rows older than the watermark, up to {} hours".format(
+                    fns[name], late[name]["rows"], late[name]["max_hours_late"]
+                ),
+                file=sys.stderr,
+            )
+
+    if metrics is not None:
+        metrics["rows"]["late"] = late
+
+
+def write_metric_outputs(args, hour_summaries, windows, output_fn):
+    """compute and write every window's comparison for the extra error metrics
+
+    Args:
+        args (Namespace): parsed command line options
+        hour_summaries (dict): from process_input_metrics
+        windows (list of int): window lengths
+        output_fn (str): name of output file, suffixed by metric and window
+    """
+    # every metric summarises the same hours, so they share their intervals
+    intervals = {
+        window: get_window_intervals(window, hour_summaries["mae"])
+        for window in windows
+    }
+
+    for name in args.error_metrics:
+
+        if name == "mae":
+            continue
+
+        metric_output_fn = get_metric_output_fn(output_fn, name)
+
+        for window in windows:
+            window_intervals = intervals[window]
+            window_errors = get_interval_errors_metric(
+                name, window_intervals, hour_summaries[name]
+            )
+            if len(windows) > 1:
+                window_output_fn = get_window_output_fn(metric_output_fn, window)
+            else:
+                window_output_fn = metric_output_fn
+            generate_output(window_intervals, window_errors, window_output_fn)
+
+
+def write_window_outputs(args, hour_errors, windows, output_fn, metrics=None):
+    """compute and write every window's comparison from one set of hour errors
+
+    Args:
+        args (Namespace): parsed command line options
+        hour_errors (dict): errors for each hour in "actual" file
+        windows (list of int): window lengths
+        output_fn (str): name of output file, suffixed by window if several
+        metrics (dict, optional): metrics from make_metrics
+    """
+    average = get_average_cents if args.cents else get_average
+
+    if args.engine == "sparse":
+        # windows are computed as they are written, a run of them at a time
+        with measure_stage(metrics, "windows"):
+            cumulative = get_sparse_cumulative(hour_errors)
+        for window in windows:
+            if len(windows) > 1:
+                window_output_fn = get_window_output_fn(output_fn, window)
+            else:
+                window_output_fn = output_fn
+            window_runs = iter_window_runs(window, cumulative, average)
+            with measure_stage(metrics, "output"):
+                generate_output_runs(window, window_runs, window_output_fn)
+        return
+
+    with measure_stage(metrics, "windows"):
+        if args.engine == "cumulative":
+            results = get_interval_errors_many(windows, hour_errors, average)
+        else:
+            results = {}
+            for window in windows:
+                window_intervals = get_window_intervals(window, hour_errors)
+                window_errors = ENGINES[args.engine](window_intervals, hour_errors)
+                results[window] = window_intervals, window_errors
+
+    for window, (window_intervals, window_errors) in results.items():
+        if len(windows) > 1:
+            window_output_fn = get_window_output_fn(output_fn, window)
+        else:
+            window_output_fn = output_fn
+        with measure_stage(metrics, "output"):
+            generate_output(window_intervals, window_errors, window_output_fn)
+
+
+# guard needed so worker processes can import this module
+if __name__ == "__main__":
+
+    args = parser.parse_args()
+    filepaths = args.filepaths
+
+    if args.workers is not None and args.workers < 0:
+        parser.error("--workers needs at least 0, 0 for one per CPU")
+    if args.workers is not None and args.reconcile != "merged":
+        # shards are summed in merged order, other reconcilers add differently
+        parser.error("--workers needs --reconcile merged")
+    if args.stream and (args.reconcile != "merged" or args.workers is not None):
+        parser.error("--stream needs --reconcile merged and no --workers")
+    if args.pipeline and (
+        args.reconcile != "merged"
+        or args.reader != "text"
+        or args.workers is not None
+        or args.stream
+        or args.follow
+        or args.checkpoint
+        or args.predicted
+        or args.start_hour is not None
+        or args.end_hour is not None
+    ):
+        parser.error("--pipeline needs --reconcile merged and the text reader only")
+    if args.reader != "text" and args.reconcile != "merged":
+        parser.error("--reader {} needs --reconcile merged".format(args.reader))
+    if args.cents and args.reconcile not in CENTS_RECONCILERS:
+        parser.error("--cents does not work with --reconcile " + args.reconcile)
+    if args.cents and args.engine == "direct":
+        parser.error("--cents needs --engine cumulative or sparse")
+    if args.follow and (args.stream or args.workers is not None):
+        parser.error("--follow does not work with --stream or --workers")
+    if args.checkpoint and (args.stream or args.follow or args.workers is not None):
+        parser.error("--checkpoint does not work with --stream, --follow or --workers")
+    if args.final and not args.follow:
+        parser.error("--final needs --follow")
+    if args.index_dir is not None and not os.path.isdir(args.index_dir):
+        parser.error("--index-dir must be an existing directory")
+    # these paths always reconcile as merged, so they need to be asked for it
+    if args.follow and (args.reconcile != "merged" or args.reader != "text"):
+        parser.error("--follow needs --reconcile merged and the text reader")
+    if args.checkpoint and (args.reconcile != "merged" or args.reader != "text"):
+        parser.error("--checkpoint needs --reconcile merged and the text reader")
+    if args.checkpoint and args.engine == "direct":
+        # windows roll forward with the exact sums of the cumulative engine
+        parser.error("--checkpoint needs --engine cumulative or sparse")
+    if (args.start_hour is not None or args.end_hour is not None) and (
+        args.reconcile != "merged" or args.reader != "text"
+    ):
+        parser.error(
+            "--start-hour and --end-hour need --reconcile merged and the text reader"
+        )
+    if (args.start_hour is not None or args.end_hour is not None) and (
+        args.workers is not None
+        or args.stream
+        or args.follow
+        or args.checkpoint
+        or args.predicted
+    ):
+        parser.error("--start-hour and --end-hour only work with the batch path")
+    if (
+        args.start_hour is not None
+        and args.end_hour is not None
+        and args.start_hour > args.end_hour
+    ):
+        parser.error("--start-hour must not be after --end-hour")
+    if args.predicted and (
+        args.reconcile != "merged"
+        or args.workers is not None
+        or args.stream
+        or args.follow
+        or args.checkpoint
+    ):
+        parser.error("--predicted needs --reconcile merged and the batch path")
+    if args.metrics and (args.follow or args.checkpoint or args.predicted):
+        parser.error("--metrics only works with the batch path and --stream")
+    if args.top_stocks is not None and (
+        args.reconcile != "merged"
+        or args.workers is not None
+        or args.pipeline
+        or args.follow
+        or args.checkpoint
+        or args.predicted
+        or args.metrics
+        or args.start_hour is not None
+        or args.end_hour is not None
+    ):
+        parser.error("--top-stocks needs --reconcile merged, as a batch or --stream")
+    if args.error_metrics and args.cents:
+        parser.error("--error-metrics does not work with --cents")
+    if args.error_metrics and (
+        args.reconcile != "merged"
+        or args.workers is not None
+        or args.stream
+        or args.pipeline
+        or args.follow
+        or args.checkpoint
+        or args.predicted
+        or args.top_stocks is not None
+        or args.start_hour is not None
+        or args.end_hour is not None
+    ):
+        parser.error("--error-metrics needs --reconcile merged and the batch path")
+    if args.top_stocks is not None and args.top_stocks < 1:
+        parser.error("--top-stocks needs at least 1 stock")
+    if args.metrics_interval is not None and not args.metrics:
+        parser.error("--metrics-interval needs --metrics")
+    if args.trusted and (args.reader != "text" or args.reconcile == "numpy"):
+        parser.error("--trusted needs the text reader and not --reconcile numpy")
+    if args.validate_every is not None and args.validate_every < 1:
+        parser.error("--validate-every needs at least 1")
+    if args.reorder_horizon is not None and args.reorder_horizon < 0:
+        parser.error("--reorder-horizon needs at least 0")
+    if args.reorder_horizon is not None and (
+        args.reconcile != "merged"
+        or args.workers is not None
+        or args.pipeline
+        or args.follow
+        or args.checkpoint
+        or args.predicted
+        or args.error_metrics
+        or args.top_stocks is not None
+        or args.start_hour is not None
+        or args.end_hour is not None
+    ):
+        parser.error("--reorder-horizon needs --reconcile merged, batch or --stream")
+
+    window_fn = filepaths[0]  # "./input/window.txt"
+    actual_fn = filepaths[1]  # "./input/actual.txt"
+    predicted_fn = filepaths[2]  # "./input/predicted.txt"
+    output_fn = filepaths[3]  # "./output/comparison.txt", or "-" for stdout
+
+    if args.windows:
+        windows = list(dict.fromkeys(args.windows))
+    else:
+        windows = get_windows(window_fn)
+    window = windows[0]
+
+    if args.predicted:
+        predicted_fns = [predicted_fn] + args.predicted
+        model_output_fns = [get_model_output_fn(output_fn, fn) for fn in predicted_fns]
+        if len(set(model_output_fns)) < len(model_output_fns):
+            parser.error("predicted files need different names for their outputs")
+
+    if is_binary_feed(actual_fn) or is_binary_feed(predicted_fn):
+        if not (is_binary_feed(actual_fn) and is_binary_feed(predicted_fn)):
+            parser.error("both input files must be binary, or neither")
+        if (
+            args.stream
+            or args.error_metrics
+            or args.top_stocks is not None
+            or args.pipeline
+            or args.follow
+            or args.checkpoint
+            or args.predicted
+            or args.reorder_horizon is not None
+        ):
+            parser.error("binary inputs only work with the batch path")
+        if args.trusted:
+            parser.error("--trusted only works with text inputs")
+        if (
+            args.reconcile != "merged"
+            or args.reader != "text"
+            or args.workers is not None
+        ):
+            parser.error("binary inputs need --reconcile merged and no --workers")
+
+    input_fns = [actual_fn, predicted_fn] + (args.predicted or [])
+    if any(get_compression(fn) for fn in input_fns) and (
+        args.reader != "text"
+        or args.reconcile == "numpy"
+        or args.workers is not None
+        or args.start_hour is not None
+        or args.end_hour is not None
+        or args.follow
+        or args.checkpoint
+    ):
+        parser.error("compressed inputs need the text reader and no byte offsets")
+
+    if output_fn == STDOUT and (
+        len(windows) > 1
+        or args.predicted
+        or args.follow
+        or args.checkpoint
+        or args.top_stocks is not None
+        or set(args.error_metrics or ()) - {"mae"}
+    ):
+        parser.error("only a single comparison can be written to stdout")
+
+    if len(windows) > 1 and (
+        args.stream
+        or args.pipeline
+        or args.follow
+        or args.checkpoint
+        or args.top_stocks is not None
+    ):
+        parser.error("several windows only work with the batch path and --predicted")
+
+    if args.trusted:
+        # malformed lines the trusted parser would let through stop the run
+        malformed = validate_inputs(
+            input_fns,
+            format_line_cents if args.cents else format_line,
+            args.validate_lines,
+            args.validate_every,
+        )
+        if malformed:
+            parser.exit(1, "\n".join(["malformed input lines:"] + malformed) + "\n")
+
+    average = get_average_cents if args.cents else get_average
+
+    if args.metrics:
+        metrics = make_metrics(args.metrics, args.metrics_interval)
+    else:
+        metrics = None
+
+    if args.top_stocks is not None:
+        stocks_fn, window_stocks_fn = get_report_fns(output_fn)
+        report = make_stock_report(
+            window, args.top_stocks, window_stocks_fn, 100 if args.cents else 1
+        )
+    else:
+        report = None
+
+    if args.reorder_horizon is not None:
+        late = {"actual": make_late_rows(), "predicted": make_late_rows()}
+    else:
+        late = None
+
+    if args.follow and args.final:
+        state = load_follow_state(args.follow, window)
+        parse = get_parse(args)
+        follow_once(state, actual_fn, predicted_fn, output_fn, True, parse, average)
+        save_follow_state(state, args.follow)
+    elif args.follow:
+        parse = get_parse(args)
+        follow(
+            window, actual_fn, predicted_fn, output_fn, args.follow, args.poll, parse,
+            average,
+        )
+    elif args.checkpoint:
+        parse = get_parse(args)
+        store = load_store(args.checkpoint, get_store_key(window, parse, average))
+        run_checkpointed(actual_fn, predicted_fn, output_fn, store, parse, average)
+        save_store(store, args.checkpoint)
+    elif args.pipeline:
+        parse = get_parse(args)
+        with measure_stage(metrics, "pipeline"):
+            run_pipeline(window, actual_fn, predicted_fn, output_fn, parse, average)
+    elif args.stream:
+        if late is not None:
+            hour_errors = iter_input_hour_errors_reordered(
+                actual_fn, predicted_fn, args.reorder_horizon, late, get_read_rows(args)
+            )
+        elif report is not None:
+            hour_errors = iter_input_hour_errors_by_stock(
+                actual_fn, predicted_fn, report, get_read_rows(args)
+            )
+        elif metrics is not None:
+            hour_errors = iter_input_hour_errors_counted(
+                actual_fn, predicted_fn, metrics, get_read_rows(args)
+            )
+        else:
+            hour_errors = iter_input_hour_errors(
+                actual_fn, predicted_fn, get_read_rows(args)
+            )
+        window_errors = iter_window_errors(window, hour_errors, average)
+        # reconciling, windows and writing are interleaved, so one stage
+        with measure_stage(metrics, "stream"):
+            generate_output_stream(window_errors, output_fn)
+    elif args.error_metrics:
+        # every metric is summarised from the same read of the inputs
+        names = list(dict.fromkeys(["mae"] + args.error_metrics))
+        with measure_stage(metrics, "reconcile"):
+            hour_summaries = process_input_metrics(
+                actual_fn, predicted_fn, names, get_read_rows(args)
+            )
+        write_window_outputs(args, hour_summaries["mae"], windows, output_fn, metrics)
+        with measure_stage(metrics, "error_metrics"):
+            write_metric_outputs(args, hour_summaries, windows, output_fn)
+    elif args.predicted:
+        # "actual" is parsed once and shared by every "predicted" file
+        hour_errors_list = process_input_many(
+            actual_fn, predicted_fns, get_read_rows(args)
+        )
+        for model_output_fn, hour_errors in zip(model_output_fns, hour_errors_list):
+            write_window_outputs(args, hour_errors, windows, model_output_fn)
+    else:
+        # input is reconciled once however many windows there are
+        with measure_stage(metrics, "reconcile"):
+            hour_errors = get_hour_errors(
+                args, actual_fn, predicted_fn, metrics, report, late
+            )
+        if not hour_errors and (
+            args.start_hour is not None or args.end_hour is not None
+        ):
+            parser.exit(
+                1,
+                "{} has no hours from {} to {}\n".format(
+                    actual_fn,
+                    "the start" if args.start_hour is None else args.start_hour,
+                    "the end" if args.end_hour is None else args.end_hour,
+                ),
+            )
+        if metrics is not None:
+            # reconcilers without counting wrappers still give their hours
+            metrics["hours"]["flushed"] = len(hour_errors)
+        write_window_outputs(args, hour_errors, windows, output_fn, metrics)
 
-args = parser.parse_args()
-filepaths = args.filepaths
+    if report is not None:
+        generate_stock_report(report, stocks_fn)
 
-window_fn = filepaths[0]  # "./input/window.txt"
-actual_fn = filepaths[1]  # "./input/actual.txt"
-predicted_fn = filepaths[2]  # "./input/predicted.txt"
-output_fn = filepaths[3]  # "./output/comparison.txt"
+    if late is not None:
+        report_late_rows(
+            late, {"actual": actual_fn, "predicted": predicted_fn}, metrics
+        )
 
-window = get_window(window_fn)
-hour_errors = process_input(actual_fn, predicted_fn)
-window_intervals = get_window_intervals(window, hour_errors)
-window_errors = get_interval_errors(window_intervals, hour_errors)
-generate_output(window_intervals, window_errors, output_fn)
+    if metrics is not None:
+        write_metrics(metrics, done=True)
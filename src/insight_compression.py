@@ -0,0 +1,181 @@
+#                                                 _
+#                                                (_)
+#   ___ ___  _ __ ___  _ __  _ __ ___  ___ ___ _  ___  _ __
+#  / __/ _ \| '_ ` _ \| '_ \| '__/ _ \/ __/ __| |/ _ \| '_ \
+# | (_| (_) | | | | | | |_) | | |  __/\__ \__ \ | (_) | | | |
+#  \___\___/|_| |_| |_| .__/|_|  \___||___/___/_|\___/|_| |_|
+#                     | |
+#                     |_|
+#
+# transparent reading of gzip, xz and zstd compressed input files
+#
+# Compression is detected from the first bytes of a file, not its name.
+# Compressed files are decompressed in large blocks on a background thread
+# (zlib and lzma release the GIL while they work) and handed over through a
+# small bounded queue, so decompressing the next block overlaps with parsing
+# the current one and memory stays at a few blocks.
+#
+# zstd needs the optional zstandard package; gzip and xz are in the standard
+# library. Uncompressed files are opened with plain open() as before.
+import gzip
+import lzma
+import queue
+import threading
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGICS = {
+    "gzip": b"\x1f\x8b",
+    "xz": b"\xfd7zXZ\x00",
+    "zstd": b"\x28\xb5\x2f\xfd",
+}
+BLOCK_SIZE = 1 << 18
+PREFETCH_BLOCKS = 4
+NEWLINE = b"\n"
+
+
+def get_compression(fn):
+    """get the compression of fn from its magic bytes
+
+    Args:
+        fn (str): name of file
+
+    Returns:
+        str or None: "gzip", "xz" or "zstd", None if fn is not compressed
+    """
+    with open(fn, "rb") as f:
+        head = f.read(max(len(magic) for magic in MAGICS.values()))
+
+    for compression, magic in MAGICS.items():
+        if head.startswith(magic):
+            return compression
+
+    return None
+
+
+def open_zstd(fn):
+    """open a zstd compressed file for binary reading
+
+    Args:
+        fn (str): name of file
+
+    Returns:
+        file: decompressing reader
+
+    Raises:
+        ValueError: Exception if the zstandard package is not installed
+    """
+    if zstandard is None:
+        raise ValueError("Reading zstd files needs the zstandard package")
+
+    return zstandard.ZstdDecompressor().stream_reader(
+        open(fn, "rb"), read_across_frames=True, closefd=True
+    )
+
+
+OPENERS = {"gzip": gzip.open, "xz": lzma.open, "zstd": open_zstd}
+
+
+class BackgroundLineReader:
+    """iterate the text lines of a compressed file decompressed on a thread
+
+    Used like a file opened with open(fn): as a context manager, and as an
+    iterable of lines that keep their newline.
+
+    Args:
+        fn (str): name of file
+        opener (callable): opens fn for binary reading, decompressing
+        block_size (int, optional): decompressed bytes read at a time
+        prefetch_blocks (int, optional): blocks decompressed ahead of parsing
+    """
+
+    def __init__(
+        self, fn, opener, block_size=BLOCK_SIZE, prefetch_blocks=PREFETCH_BLOCKS
+    ):
+        self.fn = fn
+        self.opener = opener
+        self.block_size = block_size
+        self.blocks = queue.Queue(prefetch_blocks)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.decompress, daemon=True)
+        self.thread.start()
+
+    def decompress(self):
+        """read decompressed blocks into the queue, None marks the end"""
+        try:
+            with self.opener(self.fn) as f:
+                while not self.stop.is_set():
+                    block = f.read(self.block_size)
+                    if not block:
+                        break
+                    self.put(block)
+        except Exception as error:
+            self.put(error)
+        self.put(None)
+
+    def put(self, item):
+        """put item in the queue unless the reader was closed
+
+        Args:
+            item (bytes, Exception or None): block, error or end marker
+        """
+        while not self.stop.is_set():
+            try:
+                self.blocks.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        tail = b""
+
+        while True:
+
+            block = self.blocks.get()
+
+            if isinstance(block, Exception):
+                raise block
+
+            if block is None:
+                if tail:
+                    yield tail.decode()
+                return
+
+            # split at the last newline so no character is cut in two
+            block = tail + block
+            cut = block.rfind(NEWLINE) + 1
+            tail = block[cut:]
+
+            if cut:
+                yield from block[:cut].decode().splitlines(keepends=True)
+
+    def close(self):
+        """stop the background thread"""
+        self.stop.set()
+        self.thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def open_input(fn):
+    """open an input file for reading text lines, compressed or not
+
+    Args:
+        fn (str): name of file
+
+    Returns:
+        file or BackgroundLineReader: iterable of lines, and context manager
+    """
+    compression = get_compression(fn)
+
+    if compression is None:
+        return open(fn)
+
+    return BackgroundLineReader(fn, OPENERS[compression])
@@ -0,0 +1,396 @@
+#                                          _        _
+#                                         | |      (_)
+#   ___ _ __ _ __ ___  _ __   _ __ ___   ___| |_ _ __ _  ___ ___
+#  / _ \ '__| '__/ _ \| '__| | '_ ` _ \ / _ \ __| '__| |/ __/ __|
+# |  __/ |  | | | (_) | |    | | | | | |  __/ |_| |  | | (__\__ \
+#  \___|_|  |_|  \___/|_|    |_| |_| |_|\___|\__|_|  |_|\___|___/
+#
+# registry of window error metrics computed in one pass over the inputs
+#
+# Every matched stock of an hour is looked at once, and each metric keeps a
+# summary of the hour that windows are built from:
+#
+#   sum      (total, count) of a per-stock value, slid through windows with
+#            the exact cumulative sums of insight_windows like the mean
+#            absolute error always was: mae, rmse, mape, bias
+#   max      (largest value, count), windows take the largest of their hours
+#   sketch   (bins, count) of a log-bucketed quantile sketch, mergeable and
+#            subtractable so windows slide by adding and removing hours
+#
+# Before rounding to 2 places, the median from the sketch is within
+# SKETCH_ACCURACY of the true median, relative to it.
+import math
+from collections import deque
+
+from insight_reconcile import group_hours
+from insight_reconcile import merge_hours
+from insight_reconcile import read_file_rows
+from insight_windows import get_average
+from insight_windows import get_interval_errors_cumulative
+
+SKETCH_ACCURACY = 0.01
+SKETCH_GAMMA = (1 + SKETCH_ACCURACY) / (1 - SKETCH_ACCURACY)
+LOG_SKETCH_GAMMA = math.log(SKETCH_GAMMA)
+ZERO_BIN = None
+
+
+###############################################################################
+#             _
+#            | |
+# __   ____ _| |_   _  ___  ___
+# \ \ / / _` | | | | |/ _ \/ __|
+#  \ V / (_| | | |_| |  __/\__ \
+#   \_/ \__,_|_|\__,_|\___||___/
+def get_absolute_error(actual, predicted):
+    """get |predicted - actual|
+
+    Args:
+        actual (float or int): actual price
+        predicted (float or int): predicted price
+
+    Returns:
+        float or int: absolute error
+    """
+    return abs(predicted - actual)
+
+
+def get_squared_error(actual, predicted):
+    """get (predicted - actual) squared
+
+    Args:
+        actual (float or int): actual price
+        predicted (float or int): predicted price
+
+    Returns:
+        float or int: squared error
+    """
+    return (predicted - actual) * (predicted - actual)
+
+
+def get_percentage_error(actual, predicted):
+    """get |predicted - actual| as a percentage of |actual|
+
+    Args:
+        actual (float or int): actual price
+        predicted (float or int): predicted price
+
+    Returns:
+        float or None: absolute percentage error, None if actual is 0
+    """
+    if actual == 0:
+        return None
+    return abs(predicted - actual) / abs(actual) * 100
+
+
+def get_signed_error(actual, predicted):
+    """get predicted - actual, positive when the prediction is too high
+
+    Args:
+        actual (float or int): actual price
+        predicted (float or int): predicted price
+
+    Returns:
+        float or int: signed error
+    """
+    return predicted - actual
+
+
+def get_root_mean(error, count, scale=1):
+    """get the rounded root of the mean of a window's squared errors
+
+    Args:
+        error (int): total squared error times scale
+        count (int): number of stocks in the window, not 0
+        scale (int, optional): fixed point scale of error
+
+    Returns:
+        float: root mean squared error rounded to 2 places
+    """
+    return round(math.sqrt(error / scale / count), 2)
+
+
+ERROR_METRICS = {
+    "mae": {"kind": "sum", "value": get_absolute_error, "average": get_average},
+    "rmse": {"kind": "sum", "value": get_squared_error, "average": get_root_mean},
+    "mape": {"kind": "sum", "value": get_percentage_error, "average": get_average},
+    "bias": {"kind": "sum", "value": get_signed_error, "average": get_average},
+    "max": {"kind": "max", "value": get_absolute_error},
+    "median": {"kind": "sketch", "value": get_absolute_error},
+}
+
+
+###############################################################################
+#      _        _       _
+#     | |      | |     | |
+#  ___| | _____| |_ ___| |__
+# / __| |/ / _ \ __/ __| '_ \
+# \__ \   <  __/ || (__| | | |
+# |___/_|\_\___|\__\___|_| |_|
+def get_sketch_bin(value):
+    """get the bin of a value, each bin spans a ratio of SKETCH_GAMMA
+
+    Args:
+        value (float or int): value, not negative
+
+    Returns:
+        int or None: bin, ZERO_BIN for 0
+    """
+    if value <= 0:
+        return ZERO_BIN
+    return math.ceil(math.log(value) / LOG_SKETCH_GAMMA)
+
+
+def get_bin_value(sketch_bin):
+    """get the value a bin stands for
+
+    Args:
+        sketch_bin (int or None): bin from get_sketch_bin
+
+    Returns:
+        float: value within SKETCH_ACCURACY of every value in the bin
+    """
+    if sketch_bin is ZERO_BIN:
+        return 0.0
+    return 2 * SKETCH_GAMMA ** sketch_bin / (SKETCH_GAMMA + 1)
+
+
+def add_sketch(bins, other, sign=1):
+    """add, or with sign -1 remove, the counts of one sketch to another
+
+    Args:
+        bins (dict): keys are bins, values are counts, updated in place
+        other (dict): keys are bins, values are counts
+        sign (int, optional): -1 to remove other instead
+    """
+    for sketch_bin, count in other.items():
+        count = bins.get(sketch_bin, 0) + sign * count
+        if count:
+            bins[sketch_bin] = count
+        else:
+            del bins[sketch_bin]
+
+
+def get_sketch_quantile(bins, count, quantile=0.5):
+    """get a quantile of the values in a sketch
+
+    For an even count the lower of the two middle values is the median.
+
+    Args:
+        bins (dict): keys are bins, values are counts
+        count (int): number of values in bins, not 0
+        quantile (float, optional): quantile wanted
+
+    Returns:
+        float: value of the bin holding the quantile
+    """
+    rank = int(quantile * (count - 1))
+    seen = 0
+
+    if ZERO_BIN in bins:
+        seen = bins[ZERO_BIN]
+        if rank < seen:
+            return 0.0
+
+    for sketch_bin in sorted(b for b in bins if b is not ZERO_BIN):
+        seen += bins[sketch_bin]
+        if rank < seen:
+            return get_bin_value(sketch_bin)
+
+
+###############################################################################
+#  _
+# | |
+# | |__   ___  _   _ _ __ ___
+# | '_ \ / _ \| | | | '__/ __|
+# | | | | (_) | |_| | |  \__ \
+# |_| |_|\___/ \__,_|_|  |___/
+def get_hour_summary(kind, values):
+    """get the summary of one hour's values that windows are built from
+
+    Args:
+        kind (str): "sum", "max" or "sketch"
+        values (list): per-stock values of the hour
+
+    Returns:
+        tuple: total, largest value or sketch bins, and the number of values
+    """
+    if kind == "sum":
+        return sum(values), len(values)
+
+    if kind == "max":
+        return max(values, default=0), len(values)
+
+    bins = {}
+    for value in values:
+        sketch_bin = get_sketch_bin(value)
+        bins[sketch_bin] = bins.get(sketch_bin, 0) + 1
+    return bins, len(values)
+
+
+def iter_hour_summaries(merged_hours, names):
+    """get every metric's summary of each merged hour
+
+    The "mae" summary is the same as insight_reconcile.get_buffer_error.
+
+    Args:
+        merged_hours (iterable): hour, "actual" buffer, "predicted" buffer
+        names (list of str): keys of ERROR_METRICS
+
+    Yields:
+        tuple: hour, dict of metric name: hour summary
+    """
+    metrics = [(name, ERROR_METRICS[name]) for name in names]
+
+    for hour, actual, predicted in merged_hours:
+
+        pairs = [
+            (actual[stock], price)
+            for stock, price in predicted.items()
+            if stock in actual
+        ]
+
+        summaries = {}
+        for name, metric in metrics:
+            values = [metric["value"](a, p) for a, p in pairs]
+            values = [value for value in values if value is not None]
+            summaries[name] = get_hour_summary(metric["kind"], values)
+
+        yield hour, summaries
+
+
+def process_input_metrics(fn_actual, fn_predicted, names, read_rows=read_file_rows):
+    """reconcile both files once, summarising each hour for every metric
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        names (list of str): keys of ERROR_METRICS
+        read_rows (callable, optional): yields hour, stock, price rows of a file
+
+    Returns:
+        dict: keys are metric names, values are dicts of hour: summary for
+            each hour in "actual" file
+    """
+    merged_hours = merge_hours(
+        group_hours(read_rows(fn_actual)), group_hours(read_rows(fn_predicted))
+    )
+    hour_summaries = {name: {} for name in names}
+
+    for hour, summaries in iter_hour_summaries(merged_hours, names):
+        for name, summary in summaries.items():
+            hour_summaries[name][hour] = summary
+
+    return hour_summaries
+
+
+###############################################################################
+#           _           _
+#          (_)         | |
+# __      ___ _ __   __| | _____      _____
+# \ \ /\ / / | '_ \ / _` |/ _ \ \ /\ / / __|
+#  \ V  V /| | | | | (_| | (_) \ V  V /\__ \
+#   \_/\_/ |_|_| |_|\__,_|\___/ \_/\_/ |___/
+def get_interval_errors_max(window_intervals, hour_summaries):
+    """get the largest value of each interval from a sliding max
+
+    A deque holds the hours of the interval whose value is larger than that
+    of every later hour in it, so its first hour has the largest value and
+    each hour is added and removed once.
+
+    Args:
+        window_intervals (list of range()): window intervals in increasing
+            order, as from get_window_intervals
+        hour_summaries (dict): "max" summary of each hour
+
+    Returns:
+        dict: keys are index of window_interval, values are interval errors
+    """
+    window_errors = {}
+    hours = sorted(hour for hour, (value, count) in hour_summaries.items() if count)
+    largest = deque()
+    end = 0
+
+    for i, interval in enumerate(window_intervals):
+
+        while end < len(hours) and hours[end] <= interval[-1]:
+            value = hour_summaries[hours[end]][0]
+            while largest and hour_summaries[largest[-1]][0] <= value:
+                largest.pop()
+            largest.append(hours[end])
+            end += 1
+
+        while largest and largest[0] < interval[0]:
+            largest.popleft()
+
+        if largest:
+            window_errors[i] = round(hour_summaries[largest[0]][0], 2)
+        else:
+            window_errors[i] = "NA"
+
+    return window_errors
+
+
+def get_interval_errors_median(window_intervals, hour_summaries):
+    """get the median of each interval from a sliding quantile sketch
+
+    Hours entering an interval are added to the sketch and hours leaving it
+    removed, so each hour is added and removed once.
+
+    Args:
+        window_intervals (list of range()): window intervals in increasing
+            order, as from get_window_intervals
+        hour_summaries (dict): "sketch" summary of each hour
+
+    Returns:
+        dict: keys are index of window_interval, values are interval errors
+    """
+    window_errors = {}
+    bins = {}
+    count = 0
+    hours = sorted(hour_summaries)
+    first = end = 0
+
+    for i, interval in enumerate(window_intervals):
+
+        while end < len(hours) and hours[end] <= interval[-1]:
+            hour_bins, hour_count = hour_summaries[hours[end]]
+            add_sketch(bins, hour_bins)
+            count += hour_count
+            end += 1
+
+        while first < end and hours[first] < interval[0]:
+            hour_bins, hour_count = hour_summaries[hours[first]]
+            add_sketch(bins, hour_bins, -1)
+            count -= hour_count
+            first += 1
+
+        if count == 0:
+            window_errors[i] = "NA"
+        else:
+            window_errors[i] = round(get_sketch_quantile(bins, count), 2)
+
+    return window_errors
+
+
+def get_interval_errors_metric(name, window_intervals, hour_summaries):
+    """get the error of each interval for one metric
+
+    Args:
+        name (str): key of ERROR_METRICS
+        window_intervals (list of range()): window intervals
+        hour_summaries (dict): summary of each hour for the metric
+
+    Returns:
+        dict: keys are index of window_interval, values are interval errors
+    """
+    metric = ERROR_METRICS[name]
+
+    if metric["kind"] == "sum":
+        return get_interval_errors_cumulative(
+            window_intervals, hour_summaries, metric["average"]
+        )
+
+    if metric["kind"] == "max":
+        return get_interval_errors_max(window_intervals, hour_summaries)
+
+    return get_interval_errors_median(window_intervals, hour_summaries)
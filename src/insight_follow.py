@@ -0,0 +1,297 @@
+#   __       _ _
+#  / _|     | | |
+# | |_ ___  | | | _____      __
+# |  _/ _ \ | | |/ _ \ \ /\ / /
+# | || (_) || | | (_) \ V  V /
+# |_| \___/ |_|_|\___/ \_/\_/
+#
+# follow mode for "actual" and "predicted" files that keep being appended to
+#
+# Each pass reads only the bytes appended since the last one, reconciles the
+# hours that are now complete, and appends the windows they complete to the
+# output file. Everything needed to carry on is saved in a JSON state file:
+# where to start reading each input, the rolling window accumulator, and how
+# long the output file was. A restarted run resumes from there.
+#
+# An hour is complete once both files have a line for a later hour; hours are
+# non-decreasing in both files, so nothing more can arrive for it. Until then
+# its lines are read again on the next pass. A partly written last line is
+# left for the next pass too.
+#
+# Waiting for both files is deliberate: "predicted" rows of an hour may still
+# arrive after "actual" has moved on, and would be missed if the hour were
+# completed from "actual" alone. So while the "predicted" file is empty, or
+# lags behind, no window is written until it catches up or a final pass is run.
+import json
+import os
+import time
+
+from insight_processing import DELIMITER
+from insight_processing import format_interval_error
+from insight_processing import format_line
+from insight_processing import str_to_int
+from insight_reconcile import group_hours
+from insight_reconcile import iter_hour_errors
+from insight_reconcile import merge_hours
+from insight_windows import add_hour_to_window
+from insight_windows import check_window_state
+from insight_windows import get_average
+from insight_windows import make_window_state
+
+BINARY_DELIMITER = DELIMITER.encode()
+NEWLINE = b"\n"
+
+
+###############################################################################
+#      _        _
+#     | |      | |
+#  ___| |_ __ _| |_ ___
+# / __| __/ _` | __/ _ \
+# \__ \ || (_| | ||  __/
+# |___/\__\__,_|\__\___|
+def make_follow_state(window):
+    """make the state of a follow run that has not read anything yet
+
+    Args:
+        window (int): length of window interval
+
+    Returns:
+        dict: follow state
+    """
+    return {
+        "actual_offset": 0,
+        "predicted_offset": 0,
+        "output_size": 0,
+        "windows": make_window_state(window),
+    }
+
+
+def load_follow_state(state_fn, window):
+    """load the state saved by an earlier run, or make a new one
+
+    Args:
+        state_fn (str): name of state file
+        window (int): length of window interval
+
+    Returns:
+        dict: follow state
+
+    Raises:
+        ValueError: Exception if the saved state is for another window
+    """
+    if not os.path.exists(state_fn):
+        return make_follow_state(window)
+
+    with open(state_fn) as f:
+        state = json.load(f)
+
+    if state["windows"]["window"] != window:
+        raise ValueError("State file was written for a different window")
+
+    return state
+
+
+def save_follow_state(state, state_fn):
+    """save state so that a crash never leaves a half written file
+
+    Args:
+        state (dict): follow state
+        state_fn (str): name of state file
+    """
+    temp_fn = state_fn + ".tmp"
+    with open(temp_fn, "w") as f:
+        json.dump(state, f)
+    os.replace(temp_fn, state_fn)
+
+
+###############################################################################
+#                     _
+#                    | |
+#  _ __ ___  __ _  __| |
+# | '__/ _ \/ _` |/ _` |
+# | | |  __/ (_| | (_| |
+# |_|  \___|\__,_|\__,_|
+def get_last_hour(fn, offset):
+    """get the hour of the last complete line of fn after offset
+
+    Hours are non-decreasing, so this is the highest hour written so far.
+
+    Args:
+        fn (str): name of file
+        offset (int): offset to look from
+
+    Returns:
+        int or None: hour, None if there is no complete line after offset
+    """
+    with open(fn, "rb") as f:
+
+        size = f.seek(0, 2)
+        block_size = 1 << 12
+
+        # look back from the end, widening until a whole line is found
+        while True:
+            start = max(offset, size - block_size)
+            f.seek(start)
+            lines = f.read(size - start).split(NEWLINE)[:-1]
+            if start > offset:
+                lines = lines[1:]
+            for line in reversed(lines):
+                if line.strip():
+                    return str_to_int(line.split(BINARY_DELIMITER, 1)[0].decode())
+            if start == offset:
+                return None
+            block_size *= 2
+
+
+def read_new_rows(f, offset, stop_hour, offsets, name, parse=format_line):
+    """read the complete lines of f after offset with hours before stop_hour
+
+    Args:
+        f (file): file opened in binary mode
+        offset (int): where the previous pass stopped
+        stop_hour (int or None): first hour not to read, None to read all
+        offsets (dict): where reading stopped is stored under name
+        name (str): key for offsets
+        parse (callable, optional): turns a stripped line into hour, stock, price
+
+    Yields:
+        [int, str, float]: formatted line
+    """
+    f.seek(offset)
+    offsets[name] = offset
+
+    for line in f:
+
+        # a line still being written is left for the next pass
+        if not line.endswith(NEWLINE):
+            break
+
+        stripped = line.strip()
+        if stripped:
+            row = parse(stripped.decode())
+            if stop_hour is not None and row[0] >= stop_hour:
+                break
+            yield row
+
+        offset += len(line)
+        offsets[name] = offset
+
+
+###############################################################################
+#   __       _ _
+#  / _|     | | |
+# | |_ ___  | | | _____      __
+# |  _/ _ \ | | |/ _ \ \ /\ / /
+# | || (_) || | | (_) \ V  V /
+# |_| \___/ |_|_|\___/ \_/\_/
+def follow_once(
+    state, fn_actual, fn_predicted, output_fn, final=False, parse=format_line,
+    average=get_average,
+):
+    """reconcile newly completed hours and append the windows they complete
+
+    Only hours before the last hour of both files are completed, so a pass
+    writes nothing while either file has no complete line past them.
+
+    Args:
+        state (dict): follow state, updated in place
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        output_fn (str): name of output file
+        final (bool, optional): inputs are finished, complete every hour
+        parse (callable, optional): turns a stripped line into hour, stock, price
+        average (callable, optional): get_average or get_average_cents
+
+    Returns:
+        int: number of windows written
+
+    Raises:
+        ValueError: Exception if an input is shorter than already read, or at
+            the final pass if window is larger than the data breadth
+    """
+    for name, fn in (("actual", fn_actual), ("predicted", fn_predicted)):
+        if os.path.getsize(fn) < state[name + "_offset"]:
+            raise ValueError(
+                "{} is shorter than already read, remove the state file".format(fn)
+            )
+
+    if final:
+        stop_hour = None
+    else:
+        last_hours = [
+            get_last_hour(fn_actual, state["actual_offset"]),
+            get_last_hour(fn_predicted, state["predicted_offset"]),
+        ]
+        if None in last_hours:
+            return 0
+        stop_hour = min(last_hours)
+
+    offsets = {}
+    written = 0
+
+    with open(fn_actual, "rb") as f_actual, open(fn_predicted, "rb") as f_predicted:
+
+        actual_rows = read_new_rows(
+            f_actual, state["actual_offset"], stop_hour, offsets, "actual", parse
+        )
+        predicted_rows = read_new_rows(
+            f_predicted, state["predicted_offset"], stop_hour, offsets, "predicted",
+            parse,
+        )
+        merged_hours = merge_hours(
+            group_hours(actual_rows), group_hours(predicted_rows)
+        )
+
+        # drop a crashed pass's windows that were written but not saved
+        with open(output_fn, "a") as f_output:
+            f_output.truncate(state["output_size"])
+            # truncate does not move the position, which tell() reports below
+            f_output.seek(0, os.SEEK_END)
+
+            for hour, (error, count) in iter_hour_errors(merged_hours):
+                window_errors = add_hour_to_window(
+                    state["windows"], hour, error, count, average
+                )
+                for interval, window_error in window_errors:
+                    f_output.write(format_interval_error(window_error, interval))
+                written += len(window_errors)
+
+            state["output_size"] = f_output.tell()
+
+        # "predicted" hours with no "actual" hour left to match are skipped
+        for _ in predicted_rows:
+            pass
+
+    state["actual_offset"] = offsets["actual"]
+    state["predicted_offset"] = offsets["predicted"]
+
+    if final:
+        check_window_state(state["windows"])
+
+    return written
+
+
+def follow(
+    window, fn_actual, fn_predicted, output_fn, state_fn, poll_seconds=60,
+    parse=format_line, average=get_average,
+):
+    """keep reconciling appended hours until interrupted
+
+    Args:
+        window (int): length of window interval
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        output_fn (str): name of output file
+        state_fn (str): name of state file, resumed from if it exists
+        poll_seconds (float, optional): time between passes
+        parse (callable, optional): turns a stripped line into hour, stock, price
+        average (callable, optional): get_average or get_average_cents
+    """
+    state = load_follow_state(state_fn, window)
+
+    while True:
+        follow_once(
+            state, fn_actual, fn_predicted, output_fn, parse=parse, average=average
+        )
+        save_follow_state(state, state_fn)
+        time.sleep(poll_seconds)
@@ -0,0 +1,213 @@
+#  _           _
+# (_)         | |
+#  _ _ __   __| | _____  __
+# | | '_ \ / _` |/ _ \ \/ /
+# | | | | | (_| |  __/>  <
+# |_|_| |_|\__,_|\___/_/\_\
+#
+# sidecar hour -> byte offset index for hour range queries
+#
+# The first query on a file scans it once for the offset where each hour
+# starts (no parsing beyond the hour) and saves that next to it as
+# "<file>.idx". Later queries load the index, seek straight to the first hour
+# wanted and read only up to the last one, so their cost follows the size of
+# the range rather than of the file. An index whose file has changed size or
+# modification time since it was built is rebuilt. Indexes can be kept in
+# another directory instead, and where the index cannot be saved, e.g. next to
+# a read-only input, it is built and used in memory only.
+import json
+import os
+from bisect import bisect_left
+from bisect import bisect_right
+
+from insight_parallel import process_byte_ranges
+from insight_processing import DELIMITER
+from insight_processing import format_line
+from insight_processing import str_to_int
+
+BINARY_DELIMITER = DELIMITER.encode()
+INDEX_SUFFIX = ".idx"
+
+
+###############################################################################
+#  _           _ _     _
+# | |         (_) |   | |
+# | |__  _   _ _| | __| |
+# | '_ \| | | | | |/ _` |
+# | |_) | |_| | | | (_| |
+# |_.__/ \__,_|_|_|\__,_|
+def build_hour_index(fn):
+    """scan fn for the byte offset where each hour starts
+
+    Blank lines belong to the hour after them.
+
+    Args:
+        fn (str): name of file
+
+    Returns:
+        dict: file size, modification time, hours and their start offsets
+
+    Raises:
+        ValueError: Exception if hours decrease
+    """
+    stat = os.stat(fn)
+    hours = []
+    offsets = []
+    offset = 0
+    start = 0
+
+    with open(fn, "rb") as f:
+
+        for line in f:
+
+            stripped = line.strip()
+
+            if stripped:
+                hour = str_to_int(stripped.split(BINARY_DELIMITER, 1)[0].decode())
+
+                if not hours or hour != hours[-1]:
+                    if hours and hour < hours[-1]:
+                        message = "Hours must be non-decreasing, found {} after {}"
+                        raise ValueError(message.format(hour, hours[-1]))
+                    hours.append(hour)
+                    offsets.append(start)
+
+                start = offset + len(line)
+
+            offset += len(line)
+
+    return {
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "hours": hours,
+        "offsets": offsets,
+    }
+
+
+def is_index_current(index, fn):
+    """check if index was built from fn as it is now
+
+    Args:
+        index (dict): index from build_hour_index
+        fn (str): name of file
+
+    Returns:
+        bool: True if fn has the same size and modification time
+    """
+    stat = os.stat(fn)
+    return index["size"] == stat.st_size and index["mtime_ns"] == stat.st_mtime_ns
+
+
+def get_index_fn(fn, index_dir=None):
+    """get the name of the sidecar index of fn
+
+    Args:
+        fn (str): name of file
+        index_dir (str, optional): directory of the index, next to fn if None
+
+    Returns:
+        str: name of index file
+    """
+    if index_dir is None:
+        return fn + INDEX_SUFFIX
+    return os.path.join(index_dir, os.path.basename(fn) + INDEX_SUFFIX)
+
+
+def load_hour_index(fn, index_dir=None):
+    """load the sidecar index of fn, building and saving it if needed
+
+    An index that cannot be saved is still returned, so the query goes on
+    with an index built for it alone.
+
+    Args:
+        fn (str): name of file
+        index_dir (str, optional): directory of the index, next to fn if None
+
+    Returns:
+        dict: index from build_hour_index
+    """
+    index_fn = get_index_fn(fn, index_dir)
+
+    if os.path.exists(index_fn):
+        with open(index_fn) as f:
+            index = json.load(f)
+        if is_index_current(index, fn):
+            return index
+
+    index = build_hour_index(fn)
+
+    temp_fn = index_fn + ".tmp"
+    try:
+        with open(temp_fn, "w") as f:
+            json.dump(index, f, separators=(",", ":"))
+        os.replace(temp_fn, index_fn)
+    except OSError:
+        pass
+
+    return index
+
+
+###############################################################################
+#  _ __ __ _ _ __   __ _  ___
+# | '__/ _` | '_ \ / _` |/ _ \
+# | | | (_| | | | | (_| |  __/
+# |_|  \__,_|_| |_|\__, |\___|
+#                   __/ |
+#                  |___/
+def get_hour_range(index, first_hour=None, last_hour=None):
+    """get the byte range holding hours first_hour to last_hour
+
+    Args:
+        index (dict): index from build_hour_index
+        first_hour (int, optional): first hour wanted, None for the start
+        last_hour (int, optional): last hour wanted, None for the end
+
+    Returns:
+        tuple: start offset, end offset, equal if no hour is in range
+    """
+    hours = index["hours"]
+    offsets = index["offsets"] + [index["size"]]
+
+    first = 0 if first_hour is None else bisect_left(hours, first_hour)
+    end = len(hours) if last_hour is None else bisect_right(hours, last_hour)
+
+    if end <= first:
+        return 0, 0
+
+    return offsets[first], offsets[end]
+
+
+def process_input_range(
+    fn_actual,
+    fn_predicted,
+    first_hour=None,
+    last_hour=None,
+    parse=format_line,
+    index_dir=None,
+):
+    """reconcile only hours first_hour to last_hour of both files
+
+    Same results for those hours as insight_reconcile.process_input_merged.
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        first_hour (int, optional): first hour wanted, None for the start
+        last_hour (int, optional): last hour wanted, None for the end
+        parse (callable, optional): turns a stripped line into hour, stock, price
+        index_dir (str, optional): directory of the indexes, next to the
+            files if None
+
+    Returns:
+        dict: errors for each hour of "actual" file in range
+    """
+    actual_range = get_hour_range(
+        load_hour_index(fn_actual, index_dir), first_hour, last_hour
+    )
+    predicted_range = get_hour_range(
+        load_hour_index(fn_predicted, index_dir), first_hour, last_hour
+    )
+
+    return process_byte_ranges(
+        (fn_actual, actual_range, fn_predicted, predicted_range, parse)
+    )
@@ -0,0 +1,263 @@
+#                 _        _
+#                | |      (_)
+#  _ __ ___   ___| |_ _ __ _  ___ ___
+# | '_ ` _ \ / _ \ __| '__| |/ __/ __|
+# | | | | | |  __/ |_| |  | | (__\__ \
+# |_| |_| |_|\___|\__|_|  |_|\___|___/
+#
+# opt-in per-stage metrics for insight_comparator.py --metrics
+#
+# Each stage records its wall and CPU time and the process's peak memory once
+# it is done. The merged reconciler can also be run with counting wrappers
+# around its row and hour iterators, giving rows parsed, hours flushed,
+# matched and unmatched stocks and the most stocks buffered at once.
+#
+# Nothing here is called unless --metrics is given: the hot loops are the
+# same functions either way, and the counters are only wrapped around them
+# when asked for. Counts that were never collected stay None and are written
+# as null rather than as a misleading 0. Metrics are written as JSON at the end
+# of a run, and with an interval also every so many seconds while hours are
+# being reconciled.
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from contextlib import nullcontext
+
+from insight_reconcile import group_hours
+from insight_reconcile import iter_hour_errors
+from insight_reconcile import merge_hours
+from insight_reconcile import read_file_rows
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+HOUR_COUNTS = (
+    "flushed",
+    "matched_stocks",
+    "unmatched_actual_stocks",
+    "unmatched_predicted_stocks",
+    "max_unmatched_per_hour",
+    "peak_buffered_stocks",
+)
+
+
+###############################################################################
+#                             _
+#                            | |
+#  _ __ ___ _ __   ___  _ __| |_
+# | '__/ _ \ '_ \ / _ \| '__| __|
+# | | |  __/ |_) | (_) | |  | |_
+# |_|  \___| .__/ \___/|_|   \__|
+#          | |
+#          |_|
+def make_metrics(metrics_fn, interval=None):
+    """make an empty set of metrics
+
+    Row and hour counts are None until a counter or the comparator sets them.
+
+    Args:
+        metrics_fn (str): name of JSON file the metrics are written to
+        interval (float, optional): seconds between writes while hours are
+            reconciled, None to write only at the end
+
+    Returns:
+        dict: metrics
+    """
+    return {
+        "fn": metrics_fn,
+        "interval": interval,
+        "started": time.perf_counter(),
+        "written": time.perf_counter(),
+        "stages": {},
+        "rows": {"actual": None, "predicted": None},
+        "hours": dict.fromkeys(HOUR_COUNTS),
+    }
+
+
+def get_peak_rss_mib():
+    """get the peak resident set size of this process so far
+
+    Returns:
+        float or None: MiB, None where the resource module is missing
+    """
+    if resource is None:
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # bytes on macOS, kilobytes elsewhere
+    if sys.platform == "darwin":
+        return peak / 2 ** 20
+    return peak / 2 ** 10
+
+
+def get_report(metrics, done=False):
+    """get the metrics in the form they are written
+
+    Args:
+        metrics (dict): metrics from make_metrics
+        done (bool, optional): the run has finished
+
+    Returns:
+        dict: report
+    """
+    return {
+        "done": done,
+        "elapsed_s": time.perf_counter() - metrics["started"],
+        "peak_rss_MiB": get_peak_rss_mib(),
+        "stages": metrics["stages"],
+        "rows": metrics["rows"],
+        "hours": metrics["hours"],
+    }
+
+
+def write_metrics(metrics, done=False):
+    """write the metrics so that a reader never sees a half written file
+
+    Args:
+        metrics (dict): metrics from make_metrics
+        done (bool, optional): the run has finished
+    """
+    temp_fn = metrics["fn"] + ".tmp"
+    with open(temp_fn, "w") as f:
+        json.dump(get_report(metrics, done), f, indent=2)
+    os.replace(temp_fn, metrics["fn"])
+    metrics["written"] = time.perf_counter()
+
+
+###############################################################################
+#      _
+#     | |
+#  ___| |_ __ _  __ _  ___  ___
+# / __| __/ _` |/ _` |/ _ \/ __|
+# \__ \ || (_| | (_| |  __/\__ \
+# |___/\__\__,_|\__, |\___||___/
+#                __/ |
+#               |___/
+@contextmanager
+def record_stage(metrics, stage):
+    """record wall time, CPU time and peak memory of the block it wraps
+
+    A stage recorded twice, e.g. once per window, adds up its times.
+
+    Args:
+        metrics (dict): metrics from make_metrics
+        stage (str): name of stage
+    """
+    wall = time.perf_counter()
+    cpu = time.process_time()
+
+    yield
+
+    record = metrics["stages"].setdefault(
+        stage, {"calls": 0, "wall_s": 0.0, "cpu_s": 0.0}
+    )
+    record["calls"] += 1
+    record["wall_s"] += time.perf_counter() - wall
+    record["cpu_s"] += time.process_time() - cpu
+    record["peak_rss_MiB"] = get_peak_rss_mib()
+
+
+def measure_stage(metrics, stage):
+    """record a stage if metrics are on
+
+    Args:
+        metrics (dict or None): metrics from make_metrics, None if off
+        stage (str): name of stage
+
+    Returns:
+        context manager: record_stage, or one that does nothing
+    """
+    if metrics is None:
+        return nullcontext()
+    return record_stage(metrics, stage)
+
+
+###############################################################################
+#  _
+# | |
+# | |__   ___  _   _ _ __ ___
+# | '_ \ / _ \| | | | '__/ __|
+# | | | | (_) | |_| | |  \__ \
+# |_| |_|\___/ \__,_|_|  |___/
+def count_rows(metrics, name, rows):
+    """count the rows parsed from a file as they pass
+
+    Args:
+        metrics (dict): metrics from make_metrics
+        name (str): "actual" or "predicted"
+        rows (iterable): hour, stock, price rows
+
+    Yields:
+        tuple: the same rows
+    """
+    counts = metrics["rows"]
+    counts[name] = 0
+    for row in rows:
+        counts[name] += 1
+        yield row
+
+
+def count_hours(metrics, merged_hours):
+    """count matched and unmatched stocks of each merged hour as it passes
+
+    "predicted" hours with no "actual" hour are never merged, so their
+    stocks are not counted as unmatched.
+
+    Args:
+        metrics (dict): metrics from make_metrics
+        merged_hours (iterable): hour, "actual" buffer, "predicted" buffer
+
+    Yields:
+        tuple: the same hours
+    """
+    counts = metrics["hours"]
+    counts.update(dict.fromkeys(HOUR_COUNTS, 0))
+    interval = metrics["interval"]
+
+    for hour, actual, predicted in merged_hours:
+
+        matched = len(actual.keys() & predicted.keys())
+        unmatched = len(actual) - matched
+
+        counts["flushed"] += 1
+        counts["matched_stocks"] += matched
+        counts["unmatched_actual_stocks"] += unmatched
+        counts["unmatched_predicted_stocks"] += len(predicted) - matched
+        counts["max_unmatched_per_hour"] = max(
+            counts["max_unmatched_per_hour"], unmatched
+        )
+        counts["peak_buffered_stocks"] = max(
+            counts["peak_buffered_stocks"], len(actual) + len(predicted)
+        )
+
+        if interval and time.perf_counter() - metrics["written"] >= interval:
+            write_metrics(metrics)
+
+        yield hour, actual, predicted
+
+
+def iter_input_hour_errors_counted(
+    fn_actual, fn_predicted, metrics, read_rows=read_file_rows
+):
+    """insight_reconcile.iter_input_hour_errors with its rows and hours counted
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        metrics (dict): metrics from make_metrics
+        read_rows (callable, optional): yields hour, stock, price rows of a file
+
+    Returns:
+        iterator: hour, (total hour error, number of stocks) in hour order
+    """
+    merged_hours = merge_hours(
+        group_hours(count_rows(metrics, "actual", read_rows(fn_actual))),
+        group_hours(count_rows(metrics, "predicted", read_rows(fn_predicted))),
+    )
+
+    return iter_hour_errors(count_hours(metrics, merged_hours))
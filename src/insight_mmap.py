@@ -0,0 +1,122 @@
+#  _ __ ___  _ __ ___   __ _ _ __
+# | '_ ` _ \| '_ ` _ \ / _` | '_ \
+# | | | | | | | | | | | (_| | |_) |
+# |_| |_| |_|_| |_| |_|\__,_| .__/
+#                           | |
+#                           |_|
+#
+# memory-mapped reader that parses hour, stock and price straight from bytes
+#
+# The text path decodes every line, then strip / split / replace / isdigit
+# make several throwaway strings per row before int() and float() run. Here the
+# file is mapped and split into lines a block at a time, and int() / float()
+# read the byte fields directly. Stocks are decoded once per distinct ticker and
+# interned, so every row of a ticker shares one str object.
+#
+# Fields are checked only as far as int() and float() check them, so this
+# accepts a few things get_price rejects (e.g. "1e3"); malformed lines still
+# raise ValueError.
+import mmap
+import sys
+
+from insight_processing import DELIMITER
+from insight_processing import VALS_PER_LINE
+from insight_processing import get_cents
+
+BINARY_DELIMITER = DELIMITER.encode()
+NEWLINE = b"\n"
+BLOCK_SIZE = 1 << 16
+
+
+def get_stock(stocks, key):
+    """get the interned str for a stock's bytes
+
+    Args:
+        stocks (dict): keys are stock bytes, values are interned str
+        key (bytes): stock field of a line
+
+    Returns:
+        str: interned stock
+    """
+    stock = stocks.get(key)
+    if stock is None:
+        stock = stocks[key] = sys.intern(key.decode())
+    return stock
+
+
+def get_cents_from_bytes(b):
+    """get price value for b in integer cents
+
+    Args:
+        b (bytes): price field of a line
+
+    Returns:
+        int: price in cents, see insight_processing.get_cents
+    """
+    return get_cents(b.decode().strip())
+
+
+def iter_blocks(m, block_size=BLOCK_SIZE):
+    """split m into blocks of whole lines
+
+    Args:
+        m (mmap or bytes): mapped file
+        block_size (int, optional): rough size of each block in bytes
+
+    Yields:
+        bytes: block ending at a newline, or at the end of m
+    """
+    size = len(m)
+    start = 0
+
+    while start < size:
+        end = m.find(NEWLINE, min(start + block_size, size) - 1)
+        end = size if end == -1 else end + 1
+        yield m[start:end]
+        start = end
+
+
+def read_mmap_rows(fn, stocks=None, get_price=float):
+    """parse each non-blank line of fn through a memory map
+
+    Drop-in for insight_reconcile.read_file_rows.
+
+    Args:
+        fn (str): name of file
+        stocks (dict, optional): stock table to share between files
+        get_price (callable, optional): float, or get_cents_from_bytes
+
+    Yields:
+        tuple: hour, stock, price
+
+    Raises:
+        ValueError: Exception if a line cannot be parsed
+    """
+    if stocks is None:
+        stocks = {}
+
+    with open(fn, "rb") as f:
+
+        # an empty file cannot be mapped
+        if f.seek(0, 2) == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+
+            for block in iter_blocks(m):
+                for line in block.split(NEWLINE):
+
+                    fields = line.split(BINARY_DELIMITER)
+
+                    if len(fields) != VALS_PER_LINE:
+                        if line.strip():
+                            raise ValueError(
+                                "Split failed for unknown reason, wrong delimiter?"
+                            )
+                        continue
+
+                    stock = stocks.get(fields[1])
+                    if stock is None:
+                        stock = get_stock(stocks, fields[1])
+
+                    yield int(fields[0]), stock, get_price(fields[2])
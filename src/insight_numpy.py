@@ -0,0 +1,348 @@
+#  _ __  _   _ _ __ ___  _ __  _   _
+# | '_ \| | | | '_ ` _ \| '_ \| | | |
+# | | | | |_| | | | | | | |_) | |_| |
+# |_| |_|\__,_|_| |_| |_| .__/ \__, |
+#                       | |     __/ |
+#                       |_|    |___/
+#
+# optional NumPy backend for large backfills
+#
+# Both files are read in blocks that are parsed into columns (hour as int64,
+# stock as an int64 code shared by both files, price as float64), cut so every
+# chunk holds whole hours. For each "actual" chunk the "predicted" rows of the
+# same hours are joined to it with a sort / searchsorted on (hour, stock code),
+# and per-hour error sums and counts come from np.bincount.
+#
+# NumPy is not a requirement; without it process_input_numpy falls back to
+# insight_reconcile.process_input_merged. Errors within an hour are summed in
+# stock order rather than read order, so totals can differ from the other
+# reconcilers in the last bits.
+from collections import defaultdict
+
+from insight_processing import DELIMITER
+from insight_processing import VALS_PER_LINE
+from insight_reconcile import process_input_merged
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BINARY_DELIMITER = DELIMITER.encode()
+NEWLINE = b"\n"
+CHUNK_BYTES = 1 << 24
+
+
+###############################################################################
+#            _
+#           | |
+#   ___ ___ | |_   _ _ __ ___  _ __  ___
+#  / __/ _ \| | | | | '_ ` _ \| '_ \/ __|
+# | (_| (_) | | |_| | | | | | | | | \__ \
+#  \___\___/|_|\__,_|_| |_| |_|_| |_|___/
+def make_stock_codes():
+    """make a table that gives each new stock the next int code
+
+    Returns:
+        defaultdict: keys are stock bytes, values are int codes
+    """
+    stock_codes = defaultdict()
+    stock_codes.default_factory = stock_codes.__len__
+    return stock_codes
+
+
+def split_lines(block):
+    """split a block into its non-blank lines
+
+    Args:
+        block (bytes): lines of a file
+
+    Returns:
+        list of bytes: lines that are not blank
+    """
+    # whitespace only ever separates lines, split() also drops blank ones
+    if b" " not in block and b"\t" not in block:
+        return block.split()
+    return [line for line in block.split(NEWLINE) if line.strip()]
+
+
+def parse_block(block, stock_codes):
+    """parse a block of whole lines into columns
+
+    Args:
+        block (bytes): lines of a file, blank lines allowed
+        stock_codes (defaultdict): table from make_stock_codes
+
+    Returns:
+        tuple of arrays: hours (int64), stock codes (int64), prices (float64)
+
+    Raises:
+        ValueError: Exception if a line does not split into three values
+    """
+    lines = split_lines(block)
+    fields = BINARY_DELIMITER.join(lines).split(BINARY_DELIMITER)
+    num_rows = len(lines)
+
+    if lines and len(fields) != VALS_PER_LINE * num_rows:
+        raise ValueError("Split failed for unknown reason, wrong delimiter?")
+
+    hours = np.fromiter(map(int, fields[0::3]), dtype=np.int64, count=num_rows)
+    codes = np.fromiter(
+        map(stock_codes.__getitem__, fields[1::3]), dtype=np.int64, count=num_rows
+    )
+    prices = np.fromiter(map(float, fields[2::3]), dtype=np.float64, count=num_rows)
+
+    return hours, codes, prices
+
+
+def concat_columns(first, second):
+    """join two sets of columns end to end
+
+    Args:
+        first (tuple of arrays): hours, codes, prices
+        second (tuple of arrays): hours, codes, prices
+
+    Returns:
+        tuple of arrays: hours, codes, prices
+    """
+    return tuple(np.concatenate(pair) for pair in zip(first, second))
+
+
+def slice_columns(columns, start, end=None):
+    """take rows start:end of every column
+
+    Args:
+        columns (tuple of arrays): hours, codes, prices
+        start (int): first row
+        end (int, optional): row to stop before
+
+    Returns:
+        tuple of arrays: hours, codes, prices
+    """
+    return tuple(column[start:end] for column in columns)
+
+
+def read_column_chunks(fn, stock_codes, chunk_bytes=CHUNK_BYTES):
+    """read fn in blocks of whole lines, parsed into columns
+
+    Args:
+        fn (str): name of file
+        stock_codes (defaultdict): table from make_stock_codes
+        chunk_bytes (int, optional): bytes read at a time
+
+    Yields:
+        tuple of arrays: hours, codes, prices
+    """
+    with open(fn, "rb") as f:
+
+        tail = b""
+
+        while True:
+
+            block = f.read(chunk_bytes)
+
+            if not block:
+                if tail.strip():
+                    yield parse_block(tail, stock_codes)
+                break
+
+            block = tail + block
+            cut = block.rfind(NEWLINE) + 1
+            tail = block[cut:]
+
+            if cut:
+                yield parse_block(block[:cut], stock_codes)
+
+
+def iter_hour_chunks(chunks):
+    """regroup column chunks so no hour is split between two of them
+
+    Args:
+        chunks (iterable): hours, codes, prices columns in file order
+
+    Yields:
+        tuple of arrays: hours, codes, prices, holding whole hours
+
+    Raises:
+        ValueError: Exception if hours decrease
+    """
+    carry = None
+
+    for columns in chunks:
+
+        if carry is not None:
+            columns = concat_columns(carry, columns)
+
+        hours = columns[0]
+
+        if not len(hours):
+            continue
+
+        if np.any(hours[1:] < hours[:-1]):
+            raise ValueError("Hours must be non-decreasing")
+
+        # rows of the last hour may continue in the next block
+        cut = np.searchsorted(hours, hours[-1], side="left")
+
+        if cut:
+            yield slice_columns(columns, 0, cut)
+
+        carry = slice_columns(columns, cut)
+
+    if carry is not None and len(carry[0]):
+        yield carry
+
+
+###############################################################################
+#    _       _
+#   (_)     (_)
+#    _  ___  _ _ __
+#   | |/ _ \| | '_ \
+#   | | (_) | | | | |
+#   | |\___/|_|_| |_|
+#  _/ |
+# |__/
+def get_keys(hours, codes, first_hour, width):
+    """combine hour and stock code into one int64 key
+
+    Args:
+        hours (array): int64 hours, none before first_hour
+        codes (array): int64 stock codes, all below width
+        first_hour (int): first hour of the chunk
+        width (int): number of stock codes
+
+    Returns:
+        array: int64 keys, ordered by hour then stock
+    """
+    return (hours - first_hour) * width + codes
+
+
+def dedupe_last(keys, prices):
+    """sort rows by key, keeping the last row of each repeated key
+
+    A repeated stock within an hour overwrites the earlier price in every
+    other reconciler, so the last one read wins here too.
+
+    Args:
+        keys (array): int64 keys from get_keys
+        prices (array): float64 prices
+
+    Returns:
+        tuple of arrays: keys, prices
+    """
+    # stable, so repeated keys stay in read order
+    order = np.argsort(keys, kind="stable")
+    keys, prices = keys[order], prices[order]
+
+    last = np.ones(len(keys), dtype=bool)
+    last[:-1] = keys[1:] != keys[:-1]
+
+    return keys[last], prices[last]
+
+
+def get_join_errors(actual, predicted, width):
+    """get error values for every hour of an "actual" chunk
+
+    Args:
+        actual (tuple of arrays): hours, codes, prices of whole hours
+        predicted (tuple of arrays): hours, codes, prices of the same hours
+        width (int): number of stock codes
+
+    Returns:
+        dict: errors for each hour in actual
+    """
+    actual_hours, actual_codes, actual_prices = actual
+    predicted_hours, predicted_codes, predicted_prices = predicted
+
+    first_hour = actual_hours[0]
+    num_hours = int(actual_hours[-1] - first_hour) + 1
+
+    # "predicted" hours before the chunk cannot match anything
+    keep = predicted_hours >= first_hour
+    predicted_hours = predicted_hours[keep]
+    predicted_codes = predicted_codes[keep]
+    predicted_prices = predicted_prices[keep]
+
+    actual_keys, actual_prices = dedupe_last(
+        get_keys(actual_hours, actual_codes, first_hour, width), actual_prices
+    )
+    predicted_keys, predicted_prices = dedupe_last(
+        get_keys(predicted_hours, predicted_codes, first_hour, width),
+        predicted_prices,
+    )
+
+    index = np.searchsorted(actual_keys, predicted_keys)
+    index = np.minimum(index, len(actual_keys) - 1)
+    matched = actual_keys[index] == predicted_keys
+
+    errors = np.abs(predicted_prices[matched] - actual_prices[index[matched]])
+    offsets = predicted_keys[matched] // width
+
+    error_sums = np.bincount(offsets, weights=errors, minlength=num_hours)
+    counts = np.bincount(offsets, minlength=num_hours)
+
+    hour_errors = {}
+    for hour in np.unique(actual_hours):
+        offset = hour - first_hour
+        hour_errors[int(hour)] = (float(error_sums[offset]), int(counts[offset]))
+
+    return hour_errors
+
+
+###############################################################################
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+def process_input_numpy(fn_actual, fn_predicted, chunk_bytes=CHUNK_BYTES):
+    """reconcile the files a chunk of whole hours at a time with NumPy
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        chunk_bytes (int, optional): bytes of each file read at a time
+
+    Returns:
+        dict: errors for each hour in "actual" file
+    """
+    if np is None:
+        return process_input_merged(fn_actual, fn_predicted)
+
+    hour_errors = {}
+    stock_codes = make_stock_codes()
+
+    actual_chunks = iter_hour_chunks(
+        read_column_chunks(fn_actual, stock_codes, chunk_bytes)
+    )
+    predicted_chunks = iter_hour_chunks(
+        read_column_chunks(fn_predicted, stock_codes, chunk_bytes)
+    )
+    pending = None
+    predicted_done = False
+
+    for actual in actual_chunks:
+
+        last_hour = actual[0][-1]
+
+        # read "predicted" until it is past this chunk's hours
+        while not predicted_done and (pending is None or pending[0][-1] <= last_hour):
+            columns = next(predicted_chunks, None)
+            if columns is None:
+                predicted_done = True
+            elif pending is None:
+                pending = columns
+            else:
+                pending = concat_columns(pending, columns)
+
+        if pending is None:
+            predicted = slice_columns(actual, 0, 0)
+        else:
+            cut = np.searchsorted(pending[0], last_hour, side="right")
+            predicted = slice_columns(pending, 0, cut)
+            pending = slice_columns(pending, cut) if cut < len(pending[0]) else None
+
+        hour_errors.update(get_join_errors(actual, predicted, len(stock_codes)))
+
+    return hour_errors
@@ -0,0 +1,239 @@
+#                        _ _      _
+#                       | | |    | |
+#  _ __   __ _ _ __ __ _| | | ___| |
+# | '_ \ / _` | '__/ _` | | |/ _ \ |
+# | |_) | (_| | | | (_| | | |  __/ |
+# | .__/ \__,_|_|  \__,_|_|_|\___|_|
+# | |
+# |_|
+#
+# sharded comparison over hour-aligned byte ranges of the input files
+#
+# Hours are non-decreasing in both files, so a file can be cut into byte ranges
+# that each hold whole hours. Each pair of ranges is reconciled in its own
+# process with the same merge-join as insight_reconcile.process_input_merged,
+# so the per-hour results, and the output, are identical to that serial path.
+import os
+from multiprocessing import Pool
+
+from insight_processing import DELIMITER
+from insight_processing import format_line
+from insight_processing import str_to_int
+from insight_reconcile import group_hours
+from insight_reconcile import iter_hour_errors
+from insight_reconcile import merge_hours
+from insight_reconcile import read_lines
+
+BINARY_DELIMITER = DELIMITER.encode()
+
+
+###############################################################################
+#       _                   _
+#      | |                 | |
+#  ___ | |__   __ _ _ __ __| |___
+# / __|| '_ \ / _` | '__/ _` / __|
+# \__ \| | | | (_| | | | (_| \__ \
+# |___/|_| |_|\__,_|_|  \__,_|___/
+def get_line_start(f, offset):
+    """get the offset of the first line starting at or after offset
+
+    Args:
+        f (file): file opened in binary mode
+        offset (int): any byte offset in f
+
+    Returns:
+        int: offset of the start of a line, or the end of f
+    """
+    if offset == 0:
+        return 0
+    f.seek(offset - 1)
+    f.readline()
+    return f.tell()
+
+
+def get_hour_at(f, offset):
+    """get the hour of the first non-blank line starting at offset
+
+    Args:
+        f (file): file opened in binary mode
+        offset (int): offset of the start of a line
+
+    Returns:
+        int or None: hour of the line, None at the end of f
+    """
+    f.seek(offset)
+    for line in f:
+        line = line.strip()
+        if line:
+            return str_to_int(line.split(BINARY_DELIMITER, 1)[0].decode())
+    return None
+
+
+def find_hour_offset(f, hour, size):
+    """binary search for the first line whose hour is at least hour
+
+    Args:
+        f (file): file opened in binary mode, hours non-decreasing
+        hour (int): hour to search for
+        size (int): size of f in bytes
+
+    Returns:
+        int: offset of the start of that line, or size if there is none
+    """
+    low = 0
+    high = size
+
+    while low < high:
+        middle = (low + high) // 2
+        line_hour = get_hour_at(f, get_line_start(f, middle))
+        if line_hour is None or line_hour >= hour:
+            high = middle
+        else:
+            low = middle + 1
+
+    return get_line_start(f, low)
+
+
+def get_hour_boundaries(fn, num_shards):
+    """get hours at which fn can be cut into num_shards roughly equal ranges
+
+    Args:
+        fn (str): name of file with non-decreasing hours
+        num_shards (int): number of ranges wanted
+
+    Returns:
+        list of int: first hour of every range but the first, increasing
+    """
+    size = os.path.getsize(fn)
+    boundaries = []
+
+    with open(fn, "rb") as f:
+        for i in range(1, num_shards):
+
+            offset = get_line_start(f, size * i // num_shards)
+            hour = get_hour_at(f, offset)
+
+            if hour is None:
+                break
+
+            # the range must start at the next hour, not part way through one
+            hour += 1
+            if not boundaries or hour > boundaries[-1]:
+                boundaries.append(hour)
+
+    return boundaries
+
+
+def get_byte_ranges(fn, boundaries):
+    """get the byte range of fn holding each span of hours
+
+    Args:
+        fn (str): name of file with non-decreasing hours
+        boundaries (list of int): from get_hour_boundaries
+
+    Returns:
+        list of tuple: (start, end) offsets, one more than there are boundaries
+    """
+    size = os.path.getsize(fn)
+
+    with open(fn, "rb") as f:
+        offsets = [find_hour_offset(f, hour, size) for hour in boundaries]
+
+    starts = [0] + offsets
+    ends = offsets + [size]
+
+    return list(zip(starts, ends))
+
+
+###############################################################################
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+def read_byte_range(f, start, end):
+    """read the lines of f between two line-aligned offsets
+
+    Args:
+        f (file): file opened in binary mode
+        start (int): offset of the first line
+        end (int): offset just past the last line
+
+    Yields:
+        str: decoded line
+    """
+    f.seek(start)
+    position = start
+    while position < end:
+        line = f.readline()
+        if not line:
+            break
+        position += len(line)
+        yield line.decode()
+
+
+def process_byte_ranges(shard):
+    """reconcile one shard of both files
+
+    Args:
+        shard (tuple): fn_actual, actual range, fn_predicted, predicted range,
+            line parser
+
+    Returns:
+        dict: errors for each hour of "actual" in this shard
+    """
+    fn_actual, actual_range, fn_predicted, predicted_range, parse = shard
+
+    with open(fn_actual, "rb") as f_actual, open(fn_predicted, "rb") as f_predicted:
+
+        actual_lines = read_byte_range(f_actual, *actual_range)
+        predicted_lines = read_byte_range(f_predicted, *predicted_range)
+
+        merged_hours = merge_hours(
+            group_hours(read_lines(actual_lines, parse)),
+            group_hours(read_lines(predicted_lines, parse)),
+        )
+
+        return dict(iter_hour_errors(merged_hours))
+
+
+def process_input_parallel(fn_actual, fn_predicted, workers=None, parse=format_line):
+    """reconcile hour-aligned shards of both files in a process pool
+
+    Output is identical to insight_reconcile.process_input_merged.
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        workers (int, optional): number of processes, one per CPU if None or 0
+        parse (callable, optional): module level line parser, e.g. format_line
+
+    Returns:
+        dict: errors for each hour in "actual" file
+    """
+    workers = workers or os.cpu_count()
+
+    boundaries = get_hour_boundaries(fn_actual, workers)
+    shards = zip(
+        get_byte_ranges(fn_actual, boundaries),
+        get_byte_ranges(fn_predicted, boundaries),
+    )
+    shards = [
+        (fn_actual, actual_range, fn_predicted, predicted_range, parse)
+        for actual_range, predicted_range in shards
+    ]
+
+    hour_errors = {}
+
+    if workers == 1:
+        results = map(process_byte_ranges, shards)
+    else:
+        with Pool(workers) as pool:
+            results = pool.map(process_byte_ranges, shards)
+
+    # shards hold increasing, disjoint hours so updating keeps hour order
+    for shard_hour_errors in results:
+        hour_errors.update(shard_hour_errors)
+
+    return hour_errors
@@ -0,0 +1,249 @@
+#        _            _ _
+#       (_)          | (_)
+#  _ __  _ _ __   ___| |_ _ __   ___
+# | '_ \| | '_ \ / _ \ | | '_ \ / _ \
+# | |_) | | |_) |  __/ | | | | |  __/
+# | .__/|_| .__/ \___|_|_|_| |_|\___|
+# | |     | |
+# |_|     |_|
+#
+# threaded pipeline with bounded queues between reading, parsing, reconciling
+# and writing
+#
+#   read "actual"    -> parse "actual"    \
+#                                          -> reconcile hours -> window writer
+#   read "predicted" -> parse "predicted" /
+#
+# Each arrow is a bounded queue and each stage but the writer runs on its own
+# thread, so a stage that gets ahead blocks until the next one catches up and
+# memory stays at a few blocks per queue. Reads and decompression release the
+# GIL, so waiting on slow storage overlaps with parsing and reconciling;
+# parsing and reconciling still share the GIL with each other.
+#
+# Reconciling is the merge-join of insight_reconcile.process_input_merged and
+# windows come from insight_windows.iter_window_errors, so the output is the
+# same as insight_comparator.py --reconcile merged --stream.
+import queue
+import threading
+from itertools import chain
+
+from insight_compression import OPENERS
+from insight_compression import get_compression
+from insight_processing import format_interval_error
+from insight_processing import format_line
+from insight_processing import open_output
+from insight_reconcile import group_hours
+from insight_reconcile import iter_hour_errors
+from insight_reconcile import merge_hours
+from insight_windows import get_average
+from insight_windows import iter_window_errors
+
+BLOCK_SIZE = 1 << 18
+QUEUE_SIZE = 4
+HOUR_QUEUE_SIZE = 1 << 10
+NEWLINE = b"\n"
+END = object()
+
+
+###############################################################################
+#      _
+#     | |
+#  ___| |_ __ _  __ _  ___
+# / __| __/ _` |/ _` |/ _ \
+# \__ \ || (_| | (_| |  __/
+# |___/\__\__,_|\__, |\___|
+#                __/ |
+#               |___/
+class Stage:
+    """iterate items on a thread, handing them over through a bounded queue
+
+    Used as an iterable of the same items; an exception raised on the thread
+    is raised again where the items are read.
+
+    Args:
+        items (iterable): items to produce, e.g. a generator over another Stage
+        maxsize (int, optional): most items waiting in the queue
+    """
+
+    def __init__(self, items, maxsize=QUEUE_SIZE):
+        self.items = items
+        self.queue = queue.Queue(maxsize)
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+        self.thread.start()
+
+    def run(self):
+        """put every item in the queue, END marks the end"""
+        try:
+            for item in self.items:
+                if self.stop.is_set():
+                    return
+                self.put(item)
+        except Exception as error:
+            self.put(error)
+        self.put(END)
+
+    def put(self, item):
+        """put item in the queue unless the stage was closed
+
+        Args:
+            item (object): item, error or END
+        """
+        while not self.stop.is_set():
+            try:
+                self.queue.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def __iter__(self):
+        while not self.stop.is_set():
+
+            try:
+                item = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+
+            if item is END:
+                return
+
+            if isinstance(item, Exception):
+                raise item
+
+            yield item
+
+    def close(self):
+        """stop the thread without waiting for it"""
+        self.stop.set()
+
+
+###############################################################################
+#                     _
+#                    | |
+#  _ __ ___  __ _  __| |
+# | '__/ _ \/ _` |/ _` |
+# | | |  __/ (_| | (_| |
+# |_|  \___|\__,_|\__,_|
+def read_blocks(fn, block_size=BLOCK_SIZE):
+    """read fn in blocks of whole lines, decompressing if needed
+
+    Args:
+        fn (str): name of file
+        block_size (int, optional): bytes read at a time
+
+    Yields:
+        bytes: lines of fn, the last one may lack its newline
+    """
+    compression = get_compression(fn)
+    if compression is None:
+        f = open(fn, "rb")
+    else:
+        f = OPENERS[compression](fn)
+
+    with f:
+
+        tail = b""
+
+        while True:
+
+            block = f.read(block_size)
+            if not block:
+                break
+
+            # split at the last newline so no line is cut in two
+            block = tail + block
+            cut = block.rfind(NEWLINE) + 1
+            tail = block[cut:]
+
+            if cut:
+                yield block[:cut]
+
+        if tail:
+            yield tail
+
+
+def parse_blocks(blocks, parse=format_line):
+    """parse every non-blank line of each block
+
+    Args:
+        blocks (iterable): bytes of whole lines
+        parse (callable, optional): turns a stripped line into hour, stock, price
+
+    Yields:
+        list: hour, stock, price rows of a block
+    """
+    for block in blocks:
+        rows = []
+        for line in block.decode().split("\n"):
+            line = line.strip()
+            if line:
+                rows.append(parse(line))
+        yield rows
+
+
+###############################################################################
+#        _            _ _
+#       (_)          | (_)
+#  _ __  _ _ __   ___| |_ _ __   ___
+# | '_ \| | '_ \ / _ \ | | '_ \ / _ \
+# | |_) | | |_) |  __/ | | | | |  __/
+# | .__/|_| .__/ \___|_|_|_| |_|\___|
+# | |     | |
+# |_|     |_|
+def start_input_stages(fn, stages, parse=format_line, block_size=BLOCK_SIZE):
+    """start the read and parse stages of one input file
+
+    Args:
+        fn (str): name of file
+        stages (list): started stages are added to it
+        parse (callable, optional): turns a stripped line into hour, stock, price
+        block_size (int, optional): bytes read at a time
+
+    Returns:
+        iterator: hour, stock, price rows of fn
+    """
+    blocks = Stage(read_blocks(fn, block_size))
+    stages.append(blocks)
+    rows = Stage(parse_blocks(blocks, parse))
+    stages.append(rows)
+
+    return chain.from_iterable(rows)
+
+
+def run_pipeline(
+    window, fn_actual, fn_predicted, output_fn, parse=format_line,
+    average=get_average, block_size=BLOCK_SIZE,
+):
+    """compare two files with every stage on its own thread
+
+    Args:
+        window (int): length of window interval
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        output_fn (str): name of output file, "-" for stdout
+        parse (callable, optional): turns a stripped line into hour, stock, price
+        average (callable, optional): get_average or get_average_cents
+        block_size (int, optional): bytes read at a time from each file
+
+    Raises:
+        ValueError: Exception if a line cannot be parsed, hours decrease, or
+            window is 0 or larger than the data breadth
+    """
+    stages = []
+
+    try:
+        actual_rows = start_input_stages(fn_actual, stages, parse, block_size)
+        predicted_rows = start_input_stages(fn_predicted, stages, parse, block_size)
+
+        merged_hours = merge_hours(
+            group_hours(actual_rows), group_hours(predicted_rows)
+        )
+        hour_errors = Stage(iter_hour_errors(merged_hours), HOUR_QUEUE_SIZE)
+        stages.append(hour_errors)
+
+        with open_output(output_fn) as f:
+            for interval, error in iter_window_errors(window, hour_errors, average):
+                f.write(format_interval_error(error, interval))
+    finally:
+        for stage in stages:
+            stage.close()
@@ -6,11 +6,31 @@
 # |_|_| |_|___/_|\__, |_| |_|\__|
 #                 __/ |          
 #                |___/   
+import os
+import sys
+from array import array
+from decimal import Decimal
+from itertools import islice
 from itertools import zip_longest
 
+from insight_columns import EMPTY_COLUMNS
+from insight_columns import add_stockline_to_columns
+from insight_columns import drop_hours_before
+from insight_columns import get_columns_error
+from insight_columns import get_stock_id
+from insight_compression import open_input
+
 DELIMITER = "|"
 VALS_PER_LINE = 3
 
+# start, end and error of a window, error as 2 places or as given
+NUMBER_LINE = "{}" + DELIMITER + "{}" + DELIMITER + "{:.2f}\n"
+FLOAT_LINE = "%d" + DELIMITER + "%d" + DELIMITER + "%.2f\n"
+TEXT_LINE = "{}" + DELIMITER + "{}" + DELIMITER + "{}\n"
+OUTPUT_BATCH = 1 << 14
+OUTPUT_BUFFER = 1 << 20
+STDOUT = "-"
+
 ###############################################################################
 #   __                           _   
 #  / _|                         | |  
@@ -84,6 +104,54 @@ def get_price(s):
         raise ValueError("Cannot interpret price as float")
 
 
+def get_cents(s):
+    """get price value for s in integer cents
+
+    Assumes s is price in format $.cents, with at most two places of cents
+
+    Args:
+        s (str): str to convert to cents
+
+    Returns:
+        int: s converted from str to cents
+
+    Raises:
+        ValueError: Exception if s cannot be interpreted as a price in cents
+    """
+    sign = 1
+    if s[:1] == "-":
+        sign = -1
+        s = s[1:]
+    dollars, _, cents = s.replace("_", "").partition(".")
+    if len(cents) <= 2 and (dollars + cents).isdigit():
+        return sign * (int(dollars or 0) * 100 + int(cents.ljust(2, "0")))
+    else:
+        raise ValueError("Cannot interpret price as cents")
+
+
+def get_cents_trusted(s):
+    """get price value for s in integer cents, trusting s to be well formed
+
+    float() rounded to cents, which is exact for prices with at most two
+    places of cents below 2 ** 51 cents. A price with more places would be
+    rounded half to even without notice, so it is rejected like get_cents does.
+
+    Args:
+        s (str): str to convert to cents, may end in a newline
+
+    Returns:
+        int: s converted from str to cents
+
+    Raises:
+        ValueError: Exception if s has more than two places of cents or
+            float() cannot convert s
+    """
+    point = s.rfind(".")
+    if point >= 0 and len(s.rstrip()) - point > 3:
+        raise ValueError("Cannot interpret price as cents")
+    return round(float(s) * 100)
+
+
 def format_line(line):
     """formats line for processing
 
@@ -103,6 +171,62 @@ def format_line(line):
     return line
 
 
+def format_line_cents(line):
+    """formats line for processing, with the price in integer cents
+
+    Args:
+        line (str): item to process
+
+    Returns:
+        [int, str, int]: formatted line
+    """
+    line = split(line)
+    line[0] = str_to_int(line[0])
+    line[2] = get_cents(line[2])
+
+    return line
+
+
+def format_line_trusted(line):
+    """formats line for processing, trusting it to be well formed
+
+    One split and a single int() and float() conversion. A line they cannot
+    convert is parsed again by format_line, which raises the same error it
+    always did. int() and float() also take a few forms format_line rejects,
+    e.g. "nan", "1e3" or a leading "+"; check untrusted inputs with
+    insight_validate first.
+
+    Args:
+        line (str): item to process
+
+    Returns:
+        [int, str, float]: formatted line
+    """
+    try:
+        hour, stock, price = line.split(DELIMITER)
+        return [int(hour), stock, float(price)]
+    except ValueError:
+        return format_line(line)
+
+
+def format_line_cents_trusted(line):
+    """formats line for processing with the price in integer cents, trusting it
+
+    Lines that do not convert are parsed again by format_line_cents.
+
+    Args:
+        line (str): item to process
+
+    Returns:
+        [int, str, int]: formatted line
+    """
+    try:
+        hour, stock, price = line.split(DELIMITER)
+        return [int(hour), stock, get_cents_trusted(price)]
+    except ValueError:
+        return format_line_cents(line)
+
+
 ###############################################################################                                   
 #  _ __  _ __ ___   ___ ___  ___ ___ 
 # | '_ \| '__/ _ \ / __/ _ \/ __/ __|
@@ -162,75 +286,105 @@ def del_hour_from_dict(d, hour):
             del d[stock][hour]
 
 
-def process_input(fn_actual, fn_predicted):
-    """loads files line by line into dicts of dicts, computes error hour by hour.
-    Deletes subdicts as it goes to reduce memory footprint
-    
+def process_input(fn_actual, fn_predicted, parse=format_line):
+    """loads files line by line into compact hour columns, computes error hour by hour.
+    Drops hours as it goes to reduce memory footprint
+
+    Each stock is interned once, and a buffered hour is an array of stock ids and
+    an array of prices, one row per line (see insight_columns). Errors are added
+    in the order stocks first appeared in the "predicted" file, as
+    get_hour_error adds them.
+
     Assumes "predicted" file has less than or same number of lines as "actual" file.
     Assumes order of hours in increasing in both files.
 
     Args:
         fn_actual (str): name of "actual" file
         fn_predicted (str): name of "predicted" file
+        parse (callable, optional): turns a stripped line into hour, stock, price,
+            e.g. format_line_trusted
     
     Returns:
-        dict: errors for each hour in "predicted" file
+        dict: errors for each hour in "actual" file
     """
 
-    with open(fn_actual) as f_actual, open(fn_predicted) as f_predicted:
+    with open_input(fn_actual) as f_actual, open_input(fn_predicted) as f_predicted:
 
         current_hour = None
 
         actual = {}
         predicted = {}
+        stock_ids = {}
+        ranks = array("q")
+        positions = array("q")
+        num_predicted_stocks = 0
         hour_errors = {}
 
         # itertools.zip_longest appends None to the shorter list until they are equal length
 
         for actual_line, predicted_line in zip_longest(f_actual, f_predicted):
 
-            actual_line = actual_line.strip()
+            actual_line = actual_line.strip() if actual_line else None
 
             if actual_line:
 
-                actual_hour, actual_stock, actual_price = format_line(actual_line)
+                actual_hour, actual_stock, actual_price = parse(actual_line)
 
                 # do not assume the starting hour is anything in particular
                 if current_hour is None:
                     current_hour = actual_hour
 
-                add_stockline_to_dict(actual, actual_hour, actual_stock, actual_price)
+                stock_id = get_stock_id(stock_ids, actual_stock)
+                if stock_id == len(ranks):
+                    ranks.append(-1)
+                    positions.append(0)
+
+                add_stockline_to_columns(actual, actual_hour, stock_id, actual_price)
 
             # likely that f_predicted is shorter than f_actual so check for line before stripping
             predicted_line = predicted_line.strip() if predicted_line else None
 
             if predicted_line:
 
-                predicted_hour, predicted_stock, predicted_price = format_line(
+                predicted_hour, predicted_stock, predicted_price = parse(
                     predicted_line
                 )
+                stock_id = get_stock_id(stock_ids, predicted_stock)
+                if stock_id == len(ranks):
+                    ranks.append(-1)
+                    positions.append(0)
 
-                add_stockline_to_dict(
-                    predicted, predicted_hour, predicted_stock, predicted_price
+                add_stockline_to_columns(
+                    predicted, predicted_hour, stock_id, predicted_price
                 )
 
+                if ranks[stock_id] < 0:
+                    ranks[stock_id] = num_predicted_stocks
+                    num_predicted_stocks += 1
+
             # process data on hour switch
             if actual_hour > current_hour:
 
-                hour_errors[current_hour] = get_hour_error(
-                    actual, predicted, current_hour
+                hour_errors[current_hour] = get_columns_error(
+                    actual.get(current_hour, EMPTY_COLUMNS),
+                    predicted.get(current_hour, EMPTY_COLUMNS),
+                    ranks,
+            positions,
                 )
 
-                # remove processed hour from dicts to save on RAM
-                # (for 200MB files this cuts RAM by >75% on my system)
-                del_hour_from_dict(actual, current_hour)
-                del_hour_from_dict(predicted, current_hour)
-
+                # later hours can never flush an earlier one, drop them whole
                 current_hour = actual_hour
+                drop_hours_before(actual, current_hour)
+                drop_hours_before(predicted, current_hour)
 
         # must process the last hour separately
         current_hour = actual_hour
-        hour_errors[current_hour] = get_hour_error(actual, predicted, current_hour)
+        hour_errors[current_hour] = get_columns_error(
+            actual.get(current_hour, EMPTY_COLUMNS),
+            predicted.get(current_hour, EMPTY_COLUMNS),
+            ranks,
+            positions,
+        )
 
         del actual, predicted
 
@@ -247,7 +401,7 @@ def process_input(fn_actual, fn_predicted):
 #                 |_|             
 def get_window(window_fn):
     window = None
-    with open(window_fn) as f:
+    with open_input(window_fn) as f:
         for line in f:
             line = line.strip()
             if line:
@@ -260,6 +414,77 @@ def get_window(window_fn):
         raise ValueError("Bad window")
 
 
+def get_windows(window_fn):
+    """get every window length in window_fn, one per non-blank line
+
+    Args:
+        window_fn (str): name of window file
+
+    Returns:
+        list of int: window lengths, in file order without repeats
+
+    Raises:
+        ValueError: Exception if window_fn holds no window
+    """
+    windows = []
+    with open_input(window_fn) as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                window = str_to_int(line)
+                if window not in windows:
+                    windows.append(window)
+
+    if windows:
+        return windows
+    else:
+        raise ValueError("Bad window")
+
+
+def get_window_output_fn(output_fn, window):
+    """get the output file name for one of several windows
+
+    Args:
+        output_fn (str): output file name given for the comparison
+        window (int): window length
+
+    Returns:
+        str: e.g. "comparison_24.txt" for "comparison.txt" and window 24
+    """
+    root, ext = os.path.splitext(output_fn)
+    return "{}_{}{}".format(root, window, ext)
+
+
+def get_model_output_fn(output_fn, predicted_fn):
+    """get the output file name for one of several "predicted" files
+
+    Args:
+        output_fn (str): output file name given for the comparison
+        predicted_fn (str): name of "predicted" file
+
+    Returns:
+        str: e.g. "comparison_model_a.txt" for "comparison.txt" and
+            "model_a.txt"
+    """
+    root, ext = os.path.splitext(output_fn)
+    model = os.path.splitext(os.path.basename(predicted_fn))[0]
+    return "{}_{}{}".format(root, model, ext)
+
+
+def get_metric_output_fn(output_fn, metric):
+    """get the output file name for an extra error metric
+
+    Args:
+        output_fn (str): output file name given for the comparison
+        metric (str): name of error metric
+
+    Returns:
+        str: e.g. "comparison_rmse.txt" for "comparison.txt" and "rmse"
+    """
+    root, ext = os.path.splitext(output_fn)
+    return "{}_{}{}".format(root, metric, ext)
+
+
 def get_window_intervals(window, hour_errors):
     """get all the window intervals for a given window  size and range of hours
     
@@ -279,12 +504,9 @@ def get_window_intervals(window, hour_errors):
     min_hour = min(hours)
 
     if window <= (max_hour - min_hour + 1):
-        all_hours = range(min_hour, max_hour + 1)
-        window_hours = [
-            range(hour, hour + window)
-            for hour in all_hours
-            if hour + window - 1 in all_hours
-        ]
+        # last window must end on max_hour
+        start_hours = range(min_hour, max_hour - window + 2)
+        window_hours = [range(hour, hour + window) for hour in start_hours]
         return window_hours
     else:
         raise ValueError("Window is larger than data breadth")
@@ -324,44 +546,89 @@ def format_interval_error(error, interval):
     """format interval error for writing
     
     Args:
-        error (float or str): error for this interval
+        error (float, Decimal or str): error for this interval
         interval (range()): interval for this error
     
     Returns:
         str: interval error formatted for writing
     """
-    if isinstance(error, float) or isinstance(error, int):
-        error_str = "{:.2f}".format(error)
-
+    if isinstance(error, (float, int, Decimal)):
+        return NUMBER_LINE.format(interval[0], interval[-1], error)
     else:
-        error_str = error
-
-    line = (
-        "{}".format(interval[0])
-        + DELIMITER
-        + "{}".format(interval[-1])
-        + DELIMITER
-        + error_str
-        + "\n"
-    )
-    return line
+        return TEXT_LINE.format(interval[0], interval[-1], error)
 
 
-def generate_output(window_intervals, window_errors, output_fn):
-    """format comparison and write to file
-    
+def format_interval_errors(window_intervals, window_errors, windows):
+    """format a batch of interval errors as one str
+
+    Same lines as format_interval_error, joined.
+
     Args:
-        window_intervals (TYPE): Description
-        window_errors (TYPE): Description
-        output_fn (TYPE): Description
+        window_intervals (list of range()): window intervals
+        window_errors (dict): keys are index of window_interval, values are
+            interval errors
+        windows (iterable): keys of window_errors to format, in order
+
+    Returns:
+        str: interval errors formatted for writing
     """
-    with open(output_fn, mode="w") as f:
+    number_line = NUMBER_LINE.format
+    text_line = TEXT_LINE.format
+    lines = []
+
+    for window in windows:
+        error = window_errors[window]
+        interval = window_intervals[window]
+        # %-formatting is the quickest way to print the usual float errors
+        if type(error) is float:
+            lines.append(FLOAT_LINE % (interval[0], interval[-1], error))
+        elif isinstance(error, (float, int, Decimal)):
+            lines.append(number_line(interval[0], interval[-1], error))
+        else:
+            lines.append(text_line(interval[0], interval[-1], error))
 
-        for window in window_errors:
+    return "".join(lines)
 
-            error = window_errors[window]
-            interval = window_intervals[window]
 
-            line = format_interval_error(error, interval)
+def open_output(output_fn, buffering=OUTPUT_BUFFER):
+    """open output_fn for writing, "-" for stdout
 
-            f.write(line)
+    Args:
+        output_fn (str): name of file, or "-"
+        buffering (int, optional): size of write buffer in bytes
+
+    Returns:
+        file: text file, closing it leaves stdout open
+    """
+    if output_fn == STDOUT:
+        # anything already printed must come first
+        sys.stdout.flush()
+        return open(sys.stdout.fileno(), mode="w", buffering=buffering, closefd=False)
+
+    return open(output_fn, mode="w", buffering=buffering)
+
+
+def generate_output(window_intervals, window_errors, output_fn, batch=OUTPUT_BATCH):
+    """format comparison and write to file
+
+    Windows are formatted a batch at a time and each batch is written with one
+    call into a large buffer.
+
+    Args:
+        window_intervals (list of range()): window intervals
+        window_errors (dict): keys are index of window_interval, values are
+            interval errors
+        output_fn (str): name of file to write, "-" for stdout
+        batch (int, optional): windows formatted per write
+    """
+    windows = iter(window_errors)
+
+    with open_output(output_fn) as f:
+
+        while True:
+            lines = format_interval_errors(
+                window_intervals, window_errors, islice(windows, batch)
+            )
+            if not lines:
+                break
+            f.write(lines)
@@ -0,0 +1,548 @@
+#                                  _ _
+#                                 (_) |
+#  _ __ ___  ___ ___  _ __   ___ _| | ___
+# | '__/ _ \/ __/ _ \| '_ \ / __| | |/ _ \
+# | | |  __/ (_| (_) | | | | (__| | |  __/
+# |_|  \___|\___\___/|_| |_|\___|_|_|\___|
+#
+# hour reconciliation that only ever holds the rows of buffered hours
+#
+# insight_processing.process_input keeps {stock: {hour: price}} and walks every
+# stock ever seen on each hour flush. Here rows are kept as
+# {hour: {stock: price}}, so a flush looks at the rows of one hour and then
+# drops that hour's buffer whole.
+#
+# process_input_merged goes further and reads each file with its own hour
+# grouping iterator, merge-joining the two streams by hour, so at most one hour
+# of each file is held at a time.
+#
+# process_input_reordered tolerates rows that arrive a few hours late: each file
+# keeps its last horizon + 1 hours open and an hour is only finalized once the
+# watermark, the latest hour seen minus the horizon, has passed it. Rows older
+# than the watermark are counted and dropped.
+from itertools import islice
+from itertools import zip_longest
+
+from insight_columns import drop_hours_before
+from insight_compression import open_input
+from insight_processing import DELIMITER
+from insight_processing import format_line
+from insight_processing import format_line_trusted
+
+TRUSTED_LINES = 1 << 12
+
+
+###############################################################################
+#  _            __  __
+# | |          / _|/ _|
+# | |__  _   _| |_| |_ ___ _ __
+# | '_ \| | | |  _|  _/ _ \ '__|
+# | |_) | |_| | | | ||  __/ |
+# |_.__/ \__,_|_| |_| \___|_|
+def add_stockline_to_hours(hours, hour, stock, price):
+    """add a stock line to the buffer for its hour
+
+    Args:
+        hours (dict of dicts): keys are hours, subkeys are stocks
+        hour (int): hour of the line
+        stock (str): stock of the line
+        price (float): price of the line
+    """
+    if hour not in hours:
+        hours[hour] = {stock: price}
+    else:
+        hours[hour][stock] = price
+
+
+def get_buffer_error(actual, predicted, stock_ranks=None):
+    """get error value for one hour's buffers
+
+    Same totals as insight_processing.get_hour_error, but only the stocks of a
+    single hour are looked at.
+
+    Float addition is not associative, so the order errors are added in shows
+    up in the last bits of the total. get_hour_error adds them in the order
+    each stock first appeared in the "predicted" file; pass that order as
+    stock_ranks to reproduce its totals exactly, otherwise errors are added in
+    the order the hour's "predicted" rows were read.
+
+    Args:
+        actual (dict): keys are stocks, values are actual prices
+        predicted (dict): keys are stocks, values are predicted prices
+        stock_ranks (dict, optional): keys are stocks, values are first-seen rank
+
+    Returns:
+        tuple: Total hour error, number of stocks for this error
+    """
+    stocks = [stock for stock in predicted if stock in actual]
+
+    if stock_ranks is not None:
+        stocks.sort(key=stock_ranks.__getitem__)
+
+    error = sum(abs(predicted[stock] - actual[stock]) for stock in stocks)
+
+    return error, len(stocks)
+
+
+###############################################################################
+#  _ __ ___   ___ _ __ __ _  ___
+# | '_ ` _ \ / _ \ '__/ _` |/ _ \
+# | | | | | |  __/ | | (_| |  __/
+# |_| |_| |_|\___|_|  \__, |\___|
+#                      __/ |
+#                     |___/
+def read_lines(f, parse=format_line):
+    """parse each non-blank line of f
+
+    Args:
+        f (iterable of str): open file, or any other iterable of lines
+        parse (callable, optional): turns a stripped line into hour, stock, price
+
+    Yields:
+        [int, str, float]: formatted line
+    """
+    for line in f:
+        line = line.strip()
+        if line:
+            yield parse(line)
+
+
+def read_file_rows(fn, parse=format_line):
+    """parse each non-blank line of the file named fn
+
+    Args:
+        fn (str): name of file
+        parse (callable, optional): turns a stripped line into hour, stock, price
+
+    Yields:
+        [int, str, float]: formatted line
+    """
+    with open_input(fn) as f:
+        yield from read_lines(f, parse)
+
+
+def read_lines_trusted(f, parse=format_line_trusted, get_price=float):
+    """parse lines of f a block at a time, trusting them to be well formed
+
+    A block of lines is joined and split at the delimiter once, and its hour
+    and price columns converted with map(int) and map(get_price), so no
+    Python code runs per row. If the block does not split into exactly three
+    fields per line, with each line's newline in its price, or a column does
+    not convert (e.g. a blank line), its lines are parsed one at a time with
+    parse instead, which raises the usual error for a malformed line.
+
+    Args:
+        f (iterable of str): open file, or any other iterable of lines
+        parse (callable, optional): turns a stripped line into hour, stock, price
+        get_price (callable, optional): turns a price field, which may end in
+            a newline, into a price
+
+    Yields:
+        tuple: hour, stock, price
+    """
+    f = iter(f)
+    while True:
+
+        lines = list(islice(f, TRUSTED_LINES))
+        if not lines:
+            return
+
+        block = DELIMITER.join(lines)
+        fields = block.split(DELIMITER)
+        prices = fields[2::3]
+
+        aligned = len(fields) == 3 * len(lines)
+        if aligned and "".join(prices).count("\n") == block.count("\n"):
+            try:
+                hours = list(map(int, fields[0::3]))
+                prices = list(map(get_price, prices))
+            except ValueError:
+                pass
+            else:
+                yield from zip(hours, fields[1::3], prices)
+                continue
+
+        for line in lines:
+            line = line.strip()
+            if line:
+                yield parse(line)
+
+
+def read_file_rows_trusted(fn, parse=format_line_trusted, get_price=float):
+    """parse each non-blank line of the file named fn with read_lines_trusted
+
+    Args:
+        fn (str): name of file
+        parse (callable, optional): turns a stripped line into hour, stock, price
+        get_price (callable, optional): turns a price field into a price
+
+    Yields:
+        tuple: hour, stock, price
+    """
+    with open_input(fn) as f:
+        yield from read_lines_trusted(f, parse, get_price)
+
+
+def group_hours(rows):
+    """group consecutive rows of the same hour
+
+    Args:
+        rows (iterable): hour, stock, price rows with non-decreasing hours
+
+    Yields:
+        tuple: hour, dict of stock: price for that hour
+
+    Raises:
+        ValueError: Exception if an hour is lower than the one before it
+    """
+    current_hour = None
+    buffer = {}
+
+    for hour, stock, price in rows:
+
+        if hour != current_hour:
+
+            if current_hour is not None:
+                if hour < current_hour:
+                    raise ValueError(
+                        "Hours must be non-decreasing, found {} after {}".format(
+                            hour, current_hour
+                        )
+                    )
+                yield current_hour, buffer
+
+            current_hour = hour
+            buffer = {}
+
+        buffer[stock] = price
+
+    if current_hour is not None:
+        yield current_hour, buffer
+
+
+def make_late_rows():
+    """make empty counts of the rows reorder_hours drops as late
+
+    Returns:
+        dict: "rows" dropped, and "max_hours_late", the most hours one of them
+            was behind the watermark
+    """
+    return {"rows": 0, "max_hours_late": 0}
+
+
+def reorder_hours(rows, horizon, late=None):
+    """group rows by hour, holding hours open for rows up to horizon hours late
+
+    The watermark is the latest hour seen minus horizon. Hours are buffered
+    until the watermark passes them and are then yielded in increasing order,
+    so at most horizon + 1 hours are held at a time. A row older than the
+    watermark belongs to an hour that is already finalized; it is dropped and
+    counted into late. With a horizon of 0 hours are grouped as by group_hours,
+    except that a row for an earlier hour is dropped instead of raising.
+
+    Args:
+        rows (iterable): hour, stock, price rows, hours at most horizon late
+        horizon (int): hours a row may arrive after a later hour's rows
+        late (dict, optional): from make_late_rows, late rows are counted into it
+
+    Yields:
+        tuple: hour, dict of stock: price for that hour
+    """
+    hours = {}
+    watermark = None
+
+    for hour, stock, price in rows:
+
+        if watermark is None or hour - horizon > watermark:
+
+            watermark = hour - horizon
+
+            if watermark > min(hours, default=watermark):
+                for done_hour in sorted(hours):
+                    if done_hour >= watermark:
+                        break
+                    yield done_hour, hours.pop(done_hour)
+
+        elif hour < watermark:
+
+            if late is not None:
+                late["rows"] += 1
+                late["max_hours_late"] = max(late["max_hours_late"], watermark - hour)
+            continue
+
+        add_stockline_to_hours(hours, hour, stock, price)
+
+    for hour in sorted(hours):
+        yield hour, hours[hour]
+
+
+def merge_hours(actual_hours, predicted_hours):
+    """merge-join two hour streams by hour
+
+    Every "actual" hour is yielded, with an empty "predicted" buffer when that
+    file has no rows for it. "predicted" hours missing from "actual" are
+    skipped, as they can never match a stock.
+
+    Args:
+        actual_hours (iterable): hour, buffer pairs in increasing hour order
+        predicted_hours (iterable): hour, buffer pairs in increasing hour order
+
+    Yields:
+        tuple: hour, "actual" buffer, "predicted" buffer
+    """
+    for hour, actual, (predicted,) in merge_hours_many(actual_hours, [predicted_hours]):
+        yield hour, actual, predicted
+
+
+def merge_hours_many(actual_hours, predicted_hours_list):
+    """merge-join one "actual" hour stream with several "predicted" ones
+
+    Each "actual" hour is read once and shared by every "predicted" stream.
+
+    Args:
+        actual_hours (iterable): hour, buffer pairs in increasing hour order
+        predicted_hours_list (list of iterable): hour, buffer pairs in
+            increasing hour order, one per "predicted" file
+
+    Yields:
+        tuple: hour, "actual" buffer, list of "predicted" buffers
+    """
+    predicted_hours_list = [iter(hours) for hours in predicted_hours_list]
+    heads = [next(hours, (None, {})) for hours in predicted_hours_list]
+
+    for actual_hour, actual in actual_hours:
+
+        predicted_buffers = []
+
+        for i, predicted_hours in enumerate(predicted_hours_list):
+
+            predicted_hour, predicted = heads[i]
+
+            while predicted_hour is not None and predicted_hour < actual_hour:
+                predicted_hour, predicted = next(predicted_hours, (None, {}))
+
+            heads[i] = predicted_hour, predicted
+
+            if predicted_hour == actual_hour:
+                predicted_buffers.append(predicted)
+            else:
+                predicted_buffers.append({})
+
+        yield actual_hour, actual, predicted_buffers
+
+
+def iter_hour_errors(merged_hours):
+    """get error value for each merged hour
+
+    Args:
+        merged_hours (iterable): hour, "actual" buffer, "predicted" buffer
+
+    Yields:
+        tuple: hour, (total hour error, number of stocks for this error)
+    """
+    for hour, actual, predicted in merged_hours:
+        yield hour, get_buffer_error(actual, predicted)
+
+
+###############################################################################
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+def process_input_buffered(fn_actual, fn_predicted, parse=format_line):
+    """loads files line by line into per-hour buffers, computes error hour by hour
+
+    Reads the files exactly like insight_processing.process_input (lockstep,
+    flushing when the "actual" hour increments) and returns the same totals.
+    The only state kept across hours is the first-seen rank of each
+    "predicted" stock, needed to add errors up in the same order.
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        parse (callable, optional): turns a stripped line into hour, stock, price
+
+    Returns:
+        dict: errors for each hour in "actual" file
+    """
+
+    with open_input(fn_actual) as f_actual, open_input(fn_predicted) as f_predicted:
+
+        current_hour = None
+
+        actual = {}
+        predicted = {}
+        stock_ranks = {}
+        hour_errors = {}
+
+        for actual_line, predicted_line in zip_longest(f_actual, f_predicted):
+
+            actual_line = actual_line.strip() if actual_line else None
+
+            if actual_line:
+
+                actual_hour, actual_stock, actual_price = parse(actual_line)
+
+                if current_hour is None:
+                    current_hour = actual_hour
+
+                add_stockline_to_hours(actual, actual_hour, actual_stock, actual_price)
+
+            predicted_line = predicted_line.strip() if predicted_line else None
+
+            if predicted_line:
+
+                predicted_hour, predicted_stock, predicted_price = parse(
+                    predicted_line
+                )
+
+                add_stockline_to_hours(
+                    predicted, predicted_hour, predicted_stock, predicted_price
+                )
+
+                if predicted_stock not in stock_ranks:
+                    stock_ranks[predicted_stock] = len(stock_ranks)
+
+            # process data on hour switch
+            if actual_hour > current_hour:
+
+                hour_errors[current_hour] = get_buffer_error(
+                    actual.get(current_hour, {}),
+                    predicted.get(current_hour, {}),
+                    stock_ranks,
+                )
+
+                # later hours can never flush an earlier one, drop them whole
+                current_hour = actual_hour
+                drop_hours_before(actual, current_hour)
+                drop_hours_before(predicted, current_hour)
+
+        # must process the last hour separately
+        current_hour = actual_hour
+        hour_errors[current_hour] = get_buffer_error(
+            actual.get(current_hour, {}), predicted.get(current_hour, {}), stock_ranks
+        )
+
+    return hour_errors
+
+
+def iter_input_hour_errors(fn_actual, fn_predicted, read_rows=read_file_rows):
+    """reads each file hour by hour, giving each hour's error once it is done
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        read_rows (callable, optional): yields hour, stock, price rows of a file
+
+    Returns:
+        iterator: hour, (total hour error, number of stocks) in hour order
+    """
+    merged_hours = merge_hours(
+        group_hours(read_rows(fn_actual)), group_hours(read_rows(fn_predicted))
+    )
+
+    return iter_hour_errors(merged_hours)
+
+
+def process_input_merged(fn_actual, fn_predicted, read_rows=read_file_rows):
+    """reads each file hour by hour and merge-joins the two by hour
+
+    Unlike process_input the files are not read in lockstep, so memory is
+    bounded by the largest single hour of each file no matter how the row
+    counts of the two files compare. Errors within an hour are added in the
+    order the "predicted" rows were read.
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        read_rows (callable, optional): yields hour, stock, price rows of a file
+
+    Returns:
+        dict: errors for each hour in "actual" file
+    """
+    return dict(iter_input_hour_errors(fn_actual, fn_predicted, read_rows))
+
+
+def iter_input_hour_errors_reordered(
+    fn_actual, fn_predicted, horizon, late=None, read_rows=read_file_rows
+):
+    """like iter_input_hour_errors, for files whose rows may be a few hours late
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        horizon (int): hours a row may arrive late, see reorder_hours
+        late (dict, optional): keys "actual" and "predicted", each from
+            make_late_rows, late rows of each file are counted into them
+        read_rows (callable, optional): yields hour, stock, price rows of a file
+
+    Returns:
+        iterator: hour, (total hour error, number of stocks) in hour order
+    """
+    if late is None:
+        late = {"actual": None, "predicted": None}
+
+    merged_hours = merge_hours(
+        reorder_hours(read_rows(fn_actual), horizon, late["actual"]),
+        reorder_hours(read_rows(fn_predicted), horizon, late["predicted"]),
+    )
+
+    return iter_hour_errors(merged_hours)
+
+
+def process_input_reordered(
+    fn_actual, fn_predicted, horizon, late=None, read_rows=read_file_rows
+):
+    """reads each file with a reorder buffer and merge-joins the two by hour
+
+    Same results as process_input_merged for files in hour order, with memory
+    bounded by horizon + 1 hours of each file. Rows that arrive more than
+    horizon hours late are dropped and counted into late.
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        horizon (int): hours a row may arrive late, see reorder_hours
+        late (dict, optional): as for iter_input_hour_errors_reordered
+        read_rows (callable, optional): yields hour, stock, price rows of a file
+
+    Returns:
+        dict: errors for each hour in "actual" file
+    """
+    return dict(
+        iter_input_hour_errors_reordered(
+            fn_actual, fn_predicted, horizon, late, read_rows
+        )
+    )
+
+
+def process_input_many(fn_actual, fn_predicted_list, read_rows=read_file_rows):
+    """reconcile one "actual" file against several "predicted" files in one scan
+
+    "actual" is read and parsed once; every "predicted" file is merge-joined
+    with the same hour buffers, so the work grows with the "predicted" bytes
+    rather than with the number of files times the "actual" bytes. Each result
+    is the same as process_input_merged for that pair of files.
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted_list (list of str): names of "predicted" files
+        read_rows (callable, optional): yields hour, stock, price rows of a file
+
+    Returns:
+        list of dict: errors for each hour in "actual" file, one dict per
+            "predicted" file
+    """
+    merged_hours = merge_hours_many(
+        group_hours(read_rows(fn_actual)),
+        [group_hours(read_rows(fn)) for fn in fn_predicted_list],
+    )
+    hour_errors_list = [{} for fn in fn_predicted_list]
+
+    for hour, actual, predicted_buffers in merged_hours:
+        for hour_errors, predicted in zip(hour_errors_list, predicted_buffers):
+            hour_errors[hour] = get_buffer_error(actual, predicted)
+
+    return hour_errors_list
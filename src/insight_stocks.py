@@ -0,0 +1,312 @@
+#      _             _
+#     | |           | |
+#  ___| |_ ___   ___| | _____
+# / __| __/ _ \ / __| |/ / __|
+# \__ \ || (_) | (__|   <\__ \
+# |___/\__\___/ \___|_|\_\___/
+#
+# per-stock error report with the top K worst stocks per window and overall
+#
+# The hour errors are computed per stock once, in the same order as
+# insight_reconcile.get_buffer_error adds them, so the hour totals passed on
+# are identical. The per-stock errors then feed:
+#
+#   a stock table   total error, count and max error of every stock seen, in
+#                   arrays indexed by the stock's first-seen rank
+#   a rolling window
+#                   per-stock totals of the hours of the current window, so
+#                   the K worst stocks of each window are picked from them
+#                   with a heap as the window completes
+#
+# Only the hours of one window are held, and the inputs are read once.
+import heapq
+import os
+from array import array
+from collections import deque
+
+from insight_reconcile import group_hours
+from insight_reconcile import merge_hours
+from insight_reconcile import read_file_rows
+
+REPORT_LINE = "%s|%.2f|%d|%.2f\n"
+WINDOW_LINE = "%d|%d|%s|%.2f\n"
+
+
+###############################################################################
+#  _        _     _
+# | |      | |   | |
+# | |_ __ _| |__ | | ___
+# | __/ _` | '_ \| |/ _ \
+# | || (_| | |_) | |  __/
+#  \__\__,_|_.__/|_|\___|
+def make_stock_report(window, top, window_report_fn, scale=1):
+    """make an empty per-stock report
+
+    Args:
+        window (int): length of window interval
+        top (int): number of worst stocks kept per window and overall
+        window_report_fn (str): name of file the windows' worst stocks are
+            written to as they complete
+        scale (int, optional): 100 for errors in integer cents
+
+    Returns:
+        dict: report
+
+    Raises:
+        ValueError: Exception if window is 0
+    """
+    if window == 0:
+        raise ValueError("Window cannot be 0")
+
+    return {
+        "window": window,
+        "top": top,
+        "scale": scale,
+        "window_report_fn": window_report_fn,
+        "ranks": {},
+        "stocks": [],
+        "errors": array("d"),
+        "counts": array("q"),
+        "max_errors": array("d"),
+        "held": deque(),
+        "totals": {},
+        "next_end": None,
+        "lines": [],
+    }
+
+
+def add_to_stock_table(report, stock_errors):
+    """add one hour's per-stock errors to the totals of the whole run
+
+    Args:
+        report (dict): from make_stock_report, updated in place
+        stock_errors (dict): keys are stocks, values are errors
+    """
+    ranks = report["ranks"]
+    errors = report["errors"]
+    counts = report["counts"]
+    max_errors = report["max_errors"]
+
+    for stock, error in stock_errors.items():
+        rank = ranks.get(stock)
+        if rank is None:
+            rank = ranks[stock] = len(report["stocks"])
+            report["stocks"].append(stock)
+            errors.append(0)
+            counts.append(0)
+            max_errors.append(0)
+        errors[rank] += error
+        counts[rank] += 1
+        if error > max_errors[rank]:
+            max_errors[rank] = error
+
+
+def get_top_stocks(report):
+    """get the stocks with the largest total error over the whole run
+
+    Args:
+        report (dict): from make_stock_report
+
+    Returns:
+        list of tuple: stock, total error, count, max error, worst first
+    """
+    ranks = heapq.nlargest(
+        report["top"], range(len(report["stocks"])), key=report["errors"].__getitem__
+    )
+    return [
+        (
+            report["stocks"][rank],
+            report["errors"][rank],
+            report["counts"][rank],
+            report["max_errors"][rank],
+        )
+        for rank in ranks
+    ]
+
+
+###############################################################################
+#           _           _
+#          (_)         | |
+# __      ___ _ __   __| | _____      _____
+# \ \ /\ / / | '_ \ / _` |/ _ \ \ /\ / / __|
+#  \ V  V /| | | | | (_| | (_) \ V  V /\__ \
+#   \_/\_/ |_|_| |_|\__,_|\___/ \_/\_/ |___/
+def add_window_lines(report, end):
+    """add the worst stocks of the window ending at end to the lines to write
+
+    Hours before the window are dropped from its per-stock totals first.
+
+    Args:
+        report (dict): from make_stock_report, updated in place
+        end (int): last hour of the window
+    """
+    start = end - report["window"] + 1
+    held = report["held"]
+    totals = report["totals"]
+
+    while held and held[0][0] < start:
+        _, stock_errors = held.popleft()
+        for stock, error in stock_errors.items():
+            total = totals[stock]
+            total[1] -= 1
+            if total[1]:
+                total[0] -= error
+            else:
+                del totals[stock]
+
+    worst = heapq.nlargest(
+        report["top"], ((total[0], stock) for stock, total in totals.items())
+    )
+    scale = report["scale"]
+    report["lines"].extend(
+        WINDOW_LINE % (start, end, stock, error / scale) for error, stock in worst
+    )
+
+
+def add_hour_to_stock_report(report, hour, stock_errors):
+    """add one hour's per-stock errors to the report
+
+    Windows this hour completes are added to the lines to write, as in
+    insight_windows.add_hour_to_window.
+
+    Args:
+        report (dict): from make_stock_report, updated in place
+        hour (int): hour, higher than every hour added before
+        stock_errors (dict): keys are stocks, values are errors
+    """
+    add_to_stock_table(report, stock_errors)
+
+    if report["next_end"] is None:
+        report["next_end"] = hour + report["window"] - 1
+
+    # windows ending before this hour cannot change any more
+    while report["next_end"] < hour:
+        add_window_lines(report, report["next_end"])
+        report["next_end"] += 1
+
+    report["held"].append((hour, stock_errors))
+    totals = report["totals"]
+    for stock, error in stock_errors.items():
+        total = totals.get(stock)
+        if total is None:
+            totals[stock] = [error, 1]
+        else:
+            total[0] += error
+            total[1] += 1
+
+    if report["next_end"] == hour:
+        add_window_lines(report, hour)
+        report["next_end"] += 1
+
+
+###############################################################################
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+def get_stock_errors(actual, predicted):
+    """get the error of every stock in both of one hour's buffers
+
+    In the order insight_reconcile.get_buffer_error adds them.
+
+    Args:
+        actual (dict): keys are stocks, values are actual prices
+        predicted (dict): keys are stocks, values are predicted prices
+
+    Returns:
+        dict: keys are stocks, values are absolute errors
+    """
+    return {
+        stock: abs(price - actual[stock])
+        for stock, price in predicted.items()
+        if stock in actual
+    }
+
+
+def iter_hour_errors_by_stock(merged_hours, report):
+    """get error value for each merged hour, adding its stocks to report
+
+    Same hour errors as insight_reconcile.iter_hour_errors. The lines of the
+    windows each hour completes are written to the report's window file.
+
+    Args:
+        merged_hours (iterable): hour, "actual" buffer, "predicted" buffer
+        report (dict): from make_stock_report, updated in place
+
+    Yields:
+        tuple: hour, (total hour error, number of stocks for this error)
+    """
+    with open(report["window_report_fn"], "w") as f:
+
+        for hour, actual, predicted in merged_hours:
+
+            stock_errors = get_stock_errors(actual, predicted)
+            add_hour_to_stock_report(report, hour, stock_errors)
+
+            if report["lines"]:
+                f.write("".join(report["lines"]))
+                report["lines"] = []
+
+            yield hour, (sum(stock_errors.values()), len(stock_errors))
+
+
+def iter_input_hour_errors_by_stock(
+    fn_actual, fn_predicted, report, read_rows=read_file_rows
+):
+    """insight_reconcile.iter_input_hour_errors, keeping a per-stock report
+
+    Args:
+        fn_actual (str): name of "actual" file
+        fn_predicted (str): name of "predicted" file
+        report (dict): from make_stock_report, updated in place
+        read_rows (callable, optional): yields hour, stock, price rows of a file
+
+    Returns:
+        iterator: hour, (total hour error, number of stocks) in hour order
+    """
+    merged_hours = merge_hours(
+        group_hours(read_rows(fn_actual)), group_hours(read_rows(fn_predicted))
+    )
+
+    return iter_hour_errors_by_stock(merged_hours, report)
+
+
+###############################################################################
+#              _               _
+#             | |             | |
+#   ___  _   _| |_ _ __  _   _| |_
+#  / _ \| | | | __| '_ \| | | | __|
+# | (_) | |_| | |_| |_) | |_| | |_
+#  \___/ \__,_|\__| .__/ \__,_|\__|
+#                 | |
+#                 |_|
+def get_report_fns(output_fn):
+    """get the file names of the per-stock reports
+
+    Args:
+        output_fn (str): output file name given for the comparison
+
+    Returns:
+        tuple: e.g. "comparison_stocks.txt" for the whole run and
+            "comparison_window_stocks.txt" for each window
+    """
+    root, ext = os.path.splitext(output_fn)
+    return root + "_stocks" + ext, root + "_window_stocks" + ext
+
+
+def generate_stock_report(report, report_fn):
+    """write the worst stocks of the whole run
+
+    Each line is stock|total error|count|max error, worst first.
+
+    Args:
+        report (dict): from make_stock_report
+        report_fn (str): name of file to write
+    """
+    scale = report["scale"]
+
+    with open(report_fn, "w") as f:
+        for stock, error, count, max_error in get_top_stocks(report):
+            f.write(REPORT_LINE % (stock, error / scale, count, max_error / scale))
@@ -0,0 +1,27 @@
+#  _            _   _
+# | |          | | (_)
+# | |_ ___  ___| |_ _ _ __   __ _
+# | __/ _ \/ __| __| | '_ \ / _` |
+# | |_  __/\__ \ |_| | | | | (_| |
+#  \__\___||___/\__|_|_| |_|\__, |
+#                            __/ |
+#                           |___/
+#
+# helpers shared by the test modules
+#
+# The tests run from src/ and read the inputs of the bundled insight_testsuite
+# tests, e.g. fixture("test_1", "actual").
+TESTSUITE = "../insight_testsuite/tests/{}/input/{}.txt"
+
+
+def fixture(test, name):
+    """get the path of an input file of a bundled test
+
+    Args:
+        test (str): name of test, e.g. "test_1"
+        name (str): "actual", "predicted" or "window"
+
+    Returns:
+        str: path of input file
+    """
+    return TESTSUITE.format(test, name)
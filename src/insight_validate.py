@@ -0,0 +1,130 @@
+#             _ _     _       _
+#            | (_)   | |     | |
+# __   ____ _| |_  __| | __ _| |_ ___
+# \ \ / / _` | | |/ _` |/ _` | __/ _ \
+#  \ V / (_| | | | (_| | (_| | ||  __/
+#   \_/ \__,_|_|_|\__,_|\__,_|\__\___|
+#
+# validation pass for inputs read with the trusted parsers
+#
+# format_line_trusted converts each line with a single int() and float() call,
+# so it lets through a few forms format_line rejects, e.g. "nan", "1e3" or
+# "+5". Instead of checking every row on the hot loop, the first lines of each
+# input, and optionally every Kth line after them, are checked once with the
+# strict parser and malformed lines are reported with file and line number.
+#
+# usage (from jubilant-robot/src):
+#   python3 insight_validate.py actual.txt predicted.txt --lines 1000 --every 100
+import sys
+from argparse import ArgumentParser
+
+from insight_compression import open_input
+from insight_processing import format_line
+from insight_processing import format_line_cents
+
+REPORT_LIMIT = 10
+
+
+def iter_malformed_lines(fn, parse=format_line, first_lines=None, every=None):
+    """check lines of fn with a strict parser
+
+    Blank lines are skipped, as the readers skip them.
+
+    Args:
+        fn (str): name of file
+        parse (callable, optional): strict parser, raises ValueError for a
+            malformed stripped line
+        first_lines (int, optional): check only this many first lines, every
+            line if None
+        every (int, optional): after first_lines, also check every line whose
+            number is a multiple of this
+
+    Yields:
+        tuple: line number counting from 1, stripped line, error message
+    """
+    with open_input(fn) as f:
+        for line_number, line in enumerate(f, 1):
+
+            if first_lines is not None and line_number > first_lines:
+                if every is None:
+                    break
+                if line_number % every:
+                    continue
+
+            line = line.strip()
+            if not line:
+                continue
+
+            try:
+                parse(line)
+            except ValueError as e:
+                yield line_number, line, str(e)
+
+
+def validate_inputs(fns, parse=format_line, first_lines=None, every=None):
+    """report malformed lines of several files
+
+    Args:
+        fns (list of str): names of files
+        parse (callable, optional): strict parser, as for iter_malformed_lines
+        first_lines (int, optional): check only this many first lines
+        every (int, optional): after first_lines, also check every Kth line
+
+    Returns:
+        list of str: "file:line: message: line" for the first REPORT_LIMIT
+            malformed lines of each file, then a count of the rest
+    """
+    report = []
+
+    for fn in fns:
+        malformed = 0
+        for line_number, line, message in iter_malformed_lines(
+            fn, parse, first_lines, every
+        ):
+            malformed += 1
+            if malformed <= REPORT_LIMIT:
+                report.append("{}:{}: {}: {!r}".format(fn, line_number, message, line))
+
+        if malformed > REPORT_LIMIT:
+            report.append(
+                "{}: {} more malformed lines".format(fn, malformed - REPORT_LIMIT)
+            )
+
+    return report
+
+
+parser = ArgumentParser(description="report malformed lines of price files")
+parser.add_argument("fns", nargs="+", help="paths to files")
+parser.add_argument(
+    "--lines",
+    type=int,
+    default=None,
+    help="check only this many first lines of each file (default every line)",
+)
+parser.add_argument(
+    "--every",
+    type=int,
+    default=None,
+    help="after --lines, also check every this many lines",
+)
+parser.add_argument(
+    "--cents",
+    action="store_true",
+    help="check prices have at most two places of cents",
+)
+
+if __name__ == "__main__":
+
+    args = parser.parse_args()
+    if args.every is not None and args.every < 1:
+        parser.error("--every needs at least 1")
+
+    report = validate_inputs(
+        args.fns,
+        format_line_cents if args.cents else format_line,
+        args.lines,
+        args.every,
+    )
+    for line in report:
+        print(line)
+    sys.exit(1 if report else 0)
@@ -0,0 +1,579 @@
+#           _           _
+#          (_)         | |
+# __      ___ _ __   __| | _____      _____
+# \ \ /\ / / | '_ \ / _` |/ _ \ \ /\ / / __|
+#  \ V  V /| | | | | (_| | (_) \ V  V /\__ \
+#   \_/\_/ |_|_| |_|\__,_|\___/ \_/\_/ |___/
+#
+# window engines that compute the same window errors as
+# insight_processing.get_interval_errors without re-summing every hour of
+# every window
+from bisect import bisect_left
+from bisect import bisect_right
+from decimal import Decimal
+
+from insight_processing import DELIMITER
+from insight_processing import OUTPUT_BATCH
+from insight_processing import format_interval_error
+from insight_processing import get_window_intervals
+from insight_processing import open_output
+
+
+###############################################################################
+#                                   _       _   _
+#                                  | |     | | (_)
+#   ___ _   _ _ __ ___  _   _ _   _| | __ _| |_ ___   _____
+#  / __| | | | '_ ` _ \| | | | | | | |/ _` | __| \ \ / / _ \
+# | (__| |_| | | | | | | |_| | |_| | | (_| | |_| |\ V /  __/
+#  \___|\__,_|_| |_| |_|\__,_|\__,_|_|\__,_|\__|_| \_/ \___|
+def get_fixed_point_shift(values):
+    """get the number of binary places needed to hold every value exactly
+
+    Every float is a dyadic rational n / 2**k, so scaling all of them by the
+    largest 2**k turns them into ints that can be summed without rounding.
+
+    Args:
+        values (iterable of float or int): values to be summed
+
+    Returns:
+        int: power of two to scale values by
+    """
+    shift = 0
+    for value in values:
+        denominator = value.as_integer_ratio()[1]
+        shift = max(shift, denominator.bit_length() - 1)
+    return shift
+
+
+def to_fixed_point(value, shift):
+    """scale value by 2**shift into an exact int
+
+    Args:
+        value (float or int): value to scale
+        shift (int): power of two from get_fixed_point_shift
+
+    Returns:
+        int: value * 2**shift, exact
+    """
+    numerator, denominator = value.as_integer_ratio()
+    return (numerator << shift) // denominator
+
+
+def get_cumulative_errors(hour_errors, min_hour, max_hour):
+    """build cumulative error and count arrays over min_hour..max_hour
+
+    Index i of each array holds the total of all hours before min_hour + i, so
+    the total for hours a..b is cum[b - min_hour + 1] - cum[a - min_hour].
+
+    Errors are accumulated as exact fixed point ints (see
+    get_fixed_point_shift); subtracting two large float totals would otherwise
+    lose the low digits of a small window.
+
+    Args:
+        hour_errors (dict): errors for each hour in "predicted" file
+        min_hour (int): first hour of the arrays
+        max_hour (int): last hour of the arrays
+
+    Returns:
+        tuple: (cumulative errors, cumulative counts, shift)
+    """
+    shift = get_fixed_point_shift(error for error, count in hour_errors.values())
+
+    cum_errors = [0]
+    cum_counts = [0]
+    error_total = 0
+    count_total = 0
+
+    for hour in range(min_hour, max_hour + 1):
+        if hour in hour_errors:
+            error, count = hour_errors[hour]
+            error_total += to_fixed_point(error, shift)
+            count_total += count
+        cum_errors.append(error_total)
+        cum_counts.append(count_total)
+
+    return cum_errors, cum_counts, shift
+
+
+def get_average(error, count, scale=1):
+    """get the rounded mean error of a window
+
+    Same value as insight_processing.get_interval_errors gives.
+
+    Args:
+        error (int): total window error times scale
+        count (int): number of stocks in the window, not 0
+        scale (int, optional): fixed point scale of error
+
+    Returns:
+        float: mean error rounded to 2 places
+    """
+    return round(error / scale / count, 2)
+
+
+def get_average_cents(error, count, scale=1):
+    """get the mean error of a window of cents, rounded half up
+
+    Integer arithmetic only, so the result does not depend on how the total
+    was added up.
+
+    Args:
+        error (int): total window error in cents times scale, not negative
+        count (int): number of stocks in the window, not 0
+        scale (int, optional): fixed point scale of error
+
+    Returns:
+        Decimal: mean error in dollars with 2 places
+    """
+    cents = (2 * error + count * scale) // (2 * count * scale)
+    return Decimal(cents).scaleb(-2)
+
+
+def get_interval_errors_cumulative(window_intervals, hour_errors, average=get_average):
+    """get the error for each interval from cumulative sums
+
+    Drop-in replacement for insight_processing.get_interval_errors. Builds the
+    cumulative arrays once, then each window costs O(1) regardless of its size.
+
+    Args:
+        window_intervals (list of range()): window intervals
+        hour_errors (dict):  errors for each hour in "predicted" file
+        average (callable, optional): get_average, or get_average_cents for
+            hour errors in integer cents
+
+    Returns:
+        dict: keys are index of window_interval, values are interval errors
+    """
+    if not window_intervals:
+        return {}
+
+    min_hour = window_intervals[0][0]
+    max_hour = window_intervals[-1][-1]
+    cumulative = get_cumulative_errors(hour_errors, min_hour, max_hour)
+
+    return get_errors_from_cumulative(window_intervals, cumulative, min_hour, average)
+
+
+def get_errors_from_cumulative(window_intervals, cumulative, min_hour, average):
+    """get the error for each interval from arrays of get_cumulative_errors
+
+    Args:
+        window_intervals (list of range()): window intervals, none before
+            min_hour or past the end of the arrays
+        cumulative (tuple): cumulative errors, cumulative counts, shift
+        min_hour (int): first hour of the arrays
+        average (callable): get_average or get_average_cents
+
+    Returns:
+        dict: keys are index of window_interval, values are interval errors
+    """
+    cum_errors, cum_counts, shift = cumulative
+    scale = 1 << shift
+    window_errors = {}
+
+    for i, hours in enumerate(window_intervals):
+
+        start = hours[0] - min_hour
+        end = hours[-1] - min_hour + 1
+
+        count = cum_counts[end] - cum_counts[start]
+
+        if count == 0:
+            window_errors[i] = "NA"
+        else:
+            error = cum_errors[end] - cum_errors[start]
+            window_errors[i] = average(error, count, scale)
+
+    return window_errors
+
+
+def get_interval_errors_many(windows, hour_errors, average=get_average):
+    """get intervals and errors for several window lengths at once
+
+    The cumulative arrays are built once and shared, so each extra window
+    only costs its own O(1) per interval lookups.
+
+    Args:
+        windows (list of int): window lengths
+        hour_errors (dict): errors for each hour in "predicted" file
+        average (callable, optional): get_average or get_average_cents
+
+    Returns:
+        dict: keys are windows, values are (window_intervals, window_errors)
+
+    Raises:
+        ValueError: Exception if a window is larger than the data breadth
+    """
+    min_hour = min(hour_errors)
+    max_hour = max(hour_errors)
+    cumulative = get_cumulative_errors(hour_errors, min_hour, max_hour)
+
+    results = {}
+    for window in windows:
+        window_intervals = get_window_intervals(window, hour_errors)
+        results[window] = (
+            window_intervals,
+            get_errors_from_cumulative(window_intervals, cumulative, min_hour, average),
+        )
+
+    return results
+
+
+###############################################################################
+#      _                            _
+#     | |                          (_)
+#  ___| |_ _ __ ___  __ _ _ __ ___  _ _ __   __ _
+# / __| __| '__/ _ \/ _` | '_ ` _ \| | '_ \ / _` |
+# \__ \ |_| | |  __/ (_| | | | | | | | | | | (_| |
+# |___/\__|_|  \___|\__,_|_| |_| |_|_|_| |_|\__, |
+#                                            __/ |
+#                                           |___/
+def add_fixed_point(total, shift, value, sign=1):
+    """add value to a fixed point total, widening the total if value needs it
+
+    Args:
+        total (int): total times 2**shift
+        shift (int): power of two of total
+        value (float or int): value to add
+        sign (int, optional): -1 to subtract value instead
+
+    Returns:
+        tuple: (new total, new shift)
+    """
+    value_shift = get_fixed_point_shift((value,))
+    if value_shift > shift:
+        total <<= value_shift - shift
+        shift = value_shift
+    return total + sign * to_fixed_point(value, shift), shift
+
+
+def make_window_state(window):
+    """make the state of a rolling window accumulator
+
+    Only holds plain ints, floats and lists, so it can be saved as JSON.
+
+    Args:
+        window (int): length of window interval
+
+    Returns:
+        dict: state for add_hour_to_window
+
+    Raises:
+        ValueError: Exception if window is 0
+    """
+    if window == 0:
+        raise ValueError("Window cannot be 0")
+
+    return {
+        "window": window,
+        "first_end": None,
+        "next_end": None,
+        "held": [],
+        "error_total": 0,
+        "shift": 0,
+        "count_total": 0,
+    }
+
+
+def get_window_error(state, end, average):
+    """get the error of the window ending at end, dropping hours before it
+
+    Args:
+        state (dict): from make_window_state
+        end (int): last hour of the window
+        average (callable): get_average or get_average_cents
+
+    Returns:
+        tuple: window interval (range), window error
+    """
+    start = end - state["window"] + 1
+    held = state["held"]
+
+    expired = 0
+    while expired < len(held) and held[expired][0] < start:
+        _, error, count = held[expired]
+        state["error_total"], state["shift"] = add_fixed_point(
+            state["error_total"], state["shift"], error, -1
+        )
+        state["count_total"] -= count
+        expired += 1
+    del held[:expired]
+
+    interval = range(start, end + 1)
+    if state["count_total"] == 0:
+        return interval, "NA"
+    else:
+        scale = 1 << state["shift"]
+        return interval, average(state["error_total"], state["count_total"], scale)
+
+
+def add_hour_to_window(state, hour, error, count, average=get_average):
+    """add the next hour to a rolling window accumulator
+
+    Args:
+        state (dict): from make_window_state, updated in place
+        hour (int): hour, higher than every hour added before
+        error (float or int): total hour error
+        count (int): number of stocks for this error
+        average (callable, optional): get_average or get_average_cents
+
+    Returns:
+        list of tuple: window interval, window error for every window this
+            hour completes, in order
+    """
+    window_errors = []
+
+    if state["next_end"] is None:
+        state["first_end"] = state["next_end"] = hour + state["window"] - 1
+
+    # windows ending before this hour cannot change any more
+    while state["next_end"] < hour:
+        window_errors.append(get_window_error(state, state["next_end"], average))
+        state["next_end"] += 1
+
+    state["held"].append([hour, error, count])
+    state["error_total"], state["shift"] = add_fixed_point(
+        state["error_total"], state["shift"], error
+    )
+    state["count_total"] += count
+
+    if state["next_end"] == hour:
+        window_errors.append(get_window_error(state, hour, average))
+        state["next_end"] += 1
+
+    return window_errors
+
+
+def check_window_state(state):
+    """check a finished rolling window accumulator produced a window
+
+    Args:
+        state (dict): from make_window_state
+
+    Raises:
+        ValueError: Exception if window is larger than the data breadth
+    """
+    if state["next_end"] is None or state["next_end"] == state["first_end"]:
+        raise ValueError("Window is larger than data breadth")
+
+
+def iter_window_errors(window, hour_errors, average=get_average):
+    """get each window's error as soon as its last hour is known
+
+    Rolling version of get_window_intervals + get_interval_errors_cumulative:
+    hour_errors is consumed in hour order and only the hours of the current
+    window are held. Window errors are the same as the cumulative engine's.
+
+    Args:
+        window (int): length of window interval
+        hour_errors (iterable): hour, (error, count) pairs in increasing hour order
+        average (callable, optional): get_average or get_average_cents
+
+    Yields:
+        tuple: window interval (range), window error
+
+    Raises:
+        ValueError: Exception if window is 0 or larger than the data breadth
+    """
+    state = make_window_state(window)
+
+    for hour, (error, count) in hour_errors:
+        yield from add_hour_to_window(state, hour, error, count, average)
+
+    check_window_state(state)
+
+
+def generate_output_stream(window_errors, output_fn):
+    """write each window error as soon as it is available
+
+    The file is line buffered, so every line reaches readers of output_fn
+    when it is written.
+
+    Args:
+        window_errors (iterable): window interval, window error pairs
+        output_fn (str): name of file to write, "-" for stdout
+    """
+    with open_output(output_fn, buffering=1) as f:
+        for interval, error in window_errors:
+            f.write(format_interval_error(error, interval))
+
+
+###############################################################################
+#  ___ _ __   __ _ _ __ ___  ___
+# / __| '_ \ / _` | '__/ __|/ _ \
+# \__ \ |_) | (_| | |  \__ \  __/
+# |___/ .__/ \__,_|_|  |___/\___|
+#     | |
+#     |_|
+def get_sparse_cumulative(hour_errors):
+    """build cumulative error and count arrays over the hours present only
+
+    Like get_cumulative_errors, but index i holds the total of the first i
+    hours of the sorted hours, so gaps between hours cost nothing.
+
+    Args:
+        hour_errors (dict): errors for each hour in "predicted" file
+
+    Returns:
+        tuple: (sorted hours, cumulative errors, cumulative counts, shift)
+    """
+    hours = sorted(hour_errors)
+    shift = get_fixed_point_shift(error for error, count in hour_errors.values())
+
+    cum_errors = [0]
+    cum_counts = [0]
+    error_total = 0
+    count_total = 0
+
+    for hour in hours:
+        error, count = hour_errors[hour]
+        error_total += to_fixed_point(error, shift)
+        count_total += count
+        cum_errors.append(error_total)
+        cum_counts.append(count_total)
+
+    return hours, cum_errors, cum_counts, shift
+
+
+def get_interval_errors_sparse(window_intervals, hour_errors, average=get_average):
+    """get the error for each interval by bisecting the hours present
+
+    Drop-in replacement for insight_processing.get_interval_errors with the
+    same results as get_interval_errors_cumulative, but memory follows the
+    number of hours present rather than the span from first to last hour.
+
+    Args:
+        window_intervals (list of range()): window intervals
+        hour_errors (dict):  errors for each hour in "predicted" file
+        average (callable, optional): get_average or get_average_cents
+
+    Returns:
+        dict: keys are index of window_interval, values are interval errors
+    """
+    hours, cum_errors, cum_counts, shift = get_sparse_cumulative(hour_errors)
+    scale = 1 << shift
+    window_errors = {}
+
+    for i, interval in enumerate(window_intervals):
+
+        start = bisect_left(hours, interval[0])
+        end = bisect_right(hours, interval[-1])
+
+        count = cum_counts[end] - cum_counts[start]
+
+        if count == 0:
+            window_errors[i] = "NA"
+        else:
+            error = cum_errors[end] - cum_errors[start]
+            window_errors[i] = average(error, count, scale)
+
+    return window_errors
+
+
+def iter_window_runs(window, cumulative, average=get_average):
+    """get every window's error as runs of windows holding the same hours
+
+    Windows are slid with two pointers into the sorted hours. The hours in a
+    window only change where a window start passes an hour or a window end
+    reaches one, so there are at most two runs per hour present, however far
+    apart the hours are. A gap longer than the window is one run of "NA".
+
+    Args:
+        window (int): length of window interval
+        cumulative (tuple): from get_sparse_cumulative
+        average (callable, optional): get_average or get_average_cents
+
+    Yields:
+        tuple: first window start, last window start, error of those windows
+
+    Raises:
+        ValueError: Exception if window is 0 or larger than the data breadth
+    """
+    hours, cum_errors, cum_counts, shift = cumulative
+    scale = 1 << shift
+
+    if window == 0:
+        raise ValueError("Window cannot be 0")
+    if not hours or window > hours[-1] - hours[0] + 1:
+        raise ValueError("Window is larger than data breadth")
+
+    start = hours[0]
+    last_start = hours[-1] - window + 1
+    first = end = 0
+
+    while start <= last_start:
+
+        # hours[first:end] are the hours of the window starting at start
+        while hours[first] < start:
+            first += 1
+        while end < len(hours) and hours[end] < start + window:
+            end += 1
+
+        # next start at which an hour leaves or enters the window
+        next_start = hours[first] + 1
+        if end < len(hours):
+            next_start = min(next_start, hours[end] - window + 1)
+        run_end = min(next_start - 1, last_start)
+
+        count = cum_counts[end] - cum_counts[first]
+        if count == 0:
+            yield start, run_end, "NA"
+        else:
+            error = cum_errors[end] - cum_errors[first]
+            yield start, run_end, average(error, count, scale)
+
+        start = run_end + 1
+
+
+def format_window_run(window, first_start, last_start, error):
+    """format every window of a run for writing
+
+    Same lines as insight_processing.format_interval_error; the error is
+    formatted once for the whole run.
+
+    Args:
+        window (int): length of window interval
+        first_start (int): start of first window of the run
+        last_start (int): start of last window of the run
+        error (float, Decimal or str): error of every window of the run
+
+    Returns:
+        str: lines of the run
+    """
+    # everything after the interval of one formatted line, e.g. "1.23\n"
+    error_text = format_interval_error(error, range(0, 1)).split(DELIMITER, 2)[2]
+    template = "%d" + DELIMITER + "%d" + DELIMITER + error_text.replace("%", "%%")
+    starts = range(first_start, last_start + 1)
+    offset = window - 1
+
+    return "".join([template % (start, start + offset) for start in starts])
+
+
+def generate_output_runs(window, window_runs, output_fn, batch=OUTPUT_BATCH):
+    """write window runs, batch windows at a time
+
+    Args:
+        window (int): length of window interval
+        window_runs (iterable): from iter_window_runs
+        output_fn (str): name of file to write, "-" for stdout
+        batch (int, optional): most windows formatted per write
+    """
+    with open_output(output_fn) as f:
+
+        lines = []
+        size = 0
+
+        for first_start, last_start, error in window_runs:
+
+            # long runs of "NA" are cut so one write stays about batch lines
+            for start in range(first_start, last_start + 1, batch):
+                stop = min(start + batch - 1, last_start)
+                lines.append(format_window_run(window, start, stop, error))
+                size += stop - start + 1
+
+                if size >= batch:
+                    f.write("".join(lines))
+                    lines = []
+                    size = 0
+
+        f.write("".join(lines))
@@ -0,0 +1,145 @@
+import os
+import shutil
+import tempfile
+import unittest
+from functools import partial
+from unittest import mock
+
+import insight_binary as ib
+import insight_reconcile as ir
+from insight_processing import format_line_cents
+from insight_testing import fixture
+
+
+#                                _
+#                               | |
+#   ___ ___  _ ____   _____ _ __| |_
+#  / __/ _ \| '_ \ \ / / _ \ '__| __|
+# | (_| (_) | | | \ V /  __/ |  | |_
+#  \___\___/|_| |_|\_/ \___|_|   \__|
+class test_get_fixed_point_price(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        self.assertEqual(ib.get_fixed_point_price("12.3", 2), 1230)
+        self.assertEqual(ib.get_fixed_point_price("-0.05", 2), -5)
+        self.assertEqual(ib.get_fixed_point_price("7", 3), 7000)
+        self.assertEqual(ib.get_fixed_point_price("1_000.25", 2), 100025)
+
+    def test_with_bad_input(self):
+
+        for s in ("1.234", "1e3", "abc", ""):
+            self.assertRaises(ValueError, ib.get_fixed_point_price, s, 2)
+
+
+class test_convert_text_to_binary(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def convert(self, text_fn, name, places=ib.DEFAULT_PLACES):
+        binary_fn = os.path.join(self.dir, name + ".bin")
+        ib.convert_text_to_binary(text_fn, binary_fn, places)
+        return binary_fn
+
+    def test_round_trip(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            for name in ("actual", "predicted"):
+                text_fn = fixture(test, name)
+                binary_fn = self.convert(text_fn, name)
+
+                self.assertTrue(ib.is_binary_feed(binary_fn))
+                self.assertFalse(ib.is_binary_feed(text_fn))
+                hours_true = list(ir.group_hours(ir.read_file_rows(text_fn)))
+
+                self.assertEqual(list(ib.read_binary_hours(binary_fn)), hours_true)
+
+                # columns written and read a few rows at a time
+                with mock.patch.object(ib, "CHUNK_ROWS", 7):
+                    binary_fn = self.convert(text_fn, name + "_chunked")
+                    self.assertEqual(list(ib.read_binary_hours(binary_fn)), hours_true)
+
+    def test_with_more_places(self):
+
+        text_fn = os.path.join(self.dir, "actual.txt")
+        with open(text_fn, "w") as f:
+            f.write("1|A|1.125\n\n1|B|2\n3|A|0.1\n")
+
+        binary_fn = self.convert(text_fn, "actual", 3)
+
+        self.assertEqual(
+            list(ib.read_binary_hours(binary_fn)),
+            [(1, {"A": 1.125, "B": 2.0}), (3, {"A": 0.1})],
+        )
+        self.assertRaises(ValueError, list, ib.read_binary_hours(binary_fn, cents=True))
+        self.assertRaises(ValueError, self.convert, text_fn, "actual", 2)
+
+    def test_with_decreasing_hours(self):
+
+        text_fn = os.path.join(self.dir, "actual.txt")
+        with open(text_fn, "w") as f:
+            f.write("2|A|1.0\n1|A|1.0\n")
+
+        self.assertRaises(ValueError, self.convert, text_fn, "actual")
+
+
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+class test_process_input_binary(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def get_binary_fixture(self, test):
+        binary_fns = []
+        for name in ("actual", "predicted"):
+            binary_fn = os.path.join(self.dir, name + ".bin")
+            ib.convert_text_to_binary(fixture(test, name), binary_fn)
+            binary_fns.append(binary_fn)
+        return binary_fns
+
+    def test_matches_process_input_merged(self):
+
+        read_cents = partial(ir.read_file_rows, parse=format_line_cents)
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            actual, predicted = fixture(test, "actual"), fixture(test, "predicted")
+            binary_actual, binary_predicted = self.get_binary_fixture(test)
+
+            self.assertEqual(
+                ib.process_input_binary(binary_actual, binary_predicted),
+                ir.process_input_merged(actual, predicted),
+            )
+            self.assertEqual(
+                ib.process_input_binary(binary_actual, binary_predicted, cents=True),
+                ir.process_input_merged(actual, predicted, read_cents),
+            )
+
+    def test_with_hour_range(self):
+
+        actual, predicted = fixture("test_1", "actual"), fixture("test_1", "predicted")
+        binary_actual, binary_predicted = self.get_binary_fixture("test_1")
+
+        hour_errors = ir.process_input_merged(actual, predicted)
+        hour_errors_true = {
+            hour: errors for hour, errors in hour_errors.items() if 5 <= hour <= 9
+        }
+
+        self.assertEqual(
+            ib.process_input_binary(
+                binary_actual, binary_predicted, first_hour=5, last_hour=9
+            ),
+            hour_errors_true,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import insight_checkpoint as ic
+import insight_processing as ip
+from insight_reconcile import process_input_merged
+from insight_testing import fixture
+from insight_windows import get_average_cents
+from insight_windows import get_interval_errors_cumulative
+
+
+#      _
+#     | |
+#  ___| |_ ___  _ __ ___
+# / __| __/ _ \| '__/ _ \
+# \__ \ || (_) | | |  __/
+# |___/\__\___/|_|  \___|
+class test_load_store(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.store_fn = os.path.join(self.dir, "store.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_with_other_key(self):
+
+        store = ic.make_store(ic.get_store_key(2))
+        store["digest"] = "abc"
+        ic.save_store(store, self.store_fn)
+
+        key = ic.get_store_key(2, ip.format_line_cents, get_average_cents)
+        self.assertEqual(ic.load_store(self.store_fn, key), ic.make_store(key))
+        self.assertEqual(ic.load_store(self.store_fn, ic.get_store_key(2)), store)
+
+
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+class test_run_checkpointed(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.actual_fn = os.path.join(self.dir, "actual.txt")
+        self.predicted_fn = os.path.join(self.dir, "predicted.txt")
+        self.output_fn = os.path.join(self.dir, "comparison.txt")
+        self.full_fn = os.path.join(self.dir, "full.txt")
+        self.store_fn = os.path.join(self.dir, "store.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write_inputs(self, actual_lines, predicted_lines):
+        with open(self.actual_fn, "w") as f:
+            f.writelines(actual_lines)
+        with open(self.predicted_fn, "w") as f:
+            f.writelines(predicted_lines)
+
+    def run_checkpointed(self, window, parse=ip.format_line):
+        store = ic.load_store(self.store_fn, ic.get_store_key(window, parse))
+        resumed = ic.run_checkpointed(
+            self.actual_fn, self.predicted_fn, self.output_fn, store, parse
+        )
+        ic.save_store(store, self.store_fn)
+        with open(self.output_fn) as f:
+            return resumed, f.read()
+
+    def run_full(self, window):
+        hour_errors = process_input_merged(self.actual_fn, self.predicted_fn)
+        window_intervals = ip.get_window_intervals(window, hour_errors)
+        window_errors = get_interval_errors_cumulative(window_intervals, hour_errors)
+        ip.generate_output(window_intervals, window_errors, self.full_fn)
+        with open(self.full_fn) as f:
+            return f.read()
+
+    def test_incremental_matches_full(self):
+
+        for test in ("test_1", "your_own_test_3"):
+
+            with open(fixture(test, "actual")) as f:
+                actual_lines = f.readlines()
+            with open(fixture(test, "predicted")) as f:
+                predicted_lines = f.readlines()
+            window = ip.get_window(fixture(test, "window"))
+
+            if os.path.exists(self.store_fn):
+                os.remove(self.store_fn)
+
+            # first day, then the rest appended, then one early line edited
+            cut_actual = len(actual_lines) // 2
+            cut_predicted = len(predicted_lines) // 2
+            edited = list(predicted_lines)
+            hour, stock, price = edited[3].strip().split("|")
+            edited[3] = "{}|{}|{:.2f}\n".format(hour, stock, float(price) + 1)
+
+            resumed = []
+            for actual, predicted in (
+                (actual_lines[:cut_actual], predicted_lines[:cut_predicted]),
+                (actual_lines, predicted_lines),
+                (actual_lines, edited),
+            ):
+                self.write_inputs(actual, predicted)
+                run_resumed, output = self.run_checkpointed(window)
+                resumed.append(run_resumed)
+
+                self.assertEqual(output, self.run_full(window))
+
+            self.assertEqual(resumed, [False, True, False])
+
+    def test_unchanged_inputs_parse_nothing(self):
+
+        parsed = []
+
+        def format_line_counted(line):
+            parsed.append(line)
+            return ip.format_line(line)
+
+        self.write_inputs(
+            ["1|A|1.0\n", "2|A|1.0\n", "3|A|1.0\n"],
+            ["1|A|2.0\n", "2|A|4.0\n", "3|A|1.5\n"],
+        )
+        self.run_checkpointed(1, format_line_counted)
+        del parsed[:]
+
+        resumed, output = self.run_checkpointed(1, format_line_counted)
+
+        self.assertTrue(resumed)
+        self.assertEqual(output, "1|1|1.00\n2|2|3.00\n3|3|0.50\n")
+        # only the last hour, which neither input had moved past, is read again
+        self.assertEqual(set(parsed), {"3|A|1.0", "3|A|1.5"})
+
+    def test_store_holds_last_window_only(self):
+
+        hours = range(1, 201)
+        self.write_inputs(
+            ["{}|A|1.0\n".format(hour) for hour in hours],
+            ["{}|A|2.0\n".format(hour) for hour in hours],
+        )
+        self.run_checkpointed(4)
+
+        with open(self.store_fn) as f:
+            store = json.load(f)
+
+        self.assertLess(len(json.dumps(store["state"]["windows"])), 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
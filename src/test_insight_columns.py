@@ -0,0 +1,104 @@
+import unittest
+from array import array
+
+import insight_columns as icol
+
+
+#  _        _     _
+# | |      | |   | |
+# | |_ __ _| |__ | | ___
+# | __/ _` | '_ \| |/ _ \
+# | || (_| | |_) | |  __/
+#  \__\__,_|_.__/|_|\___|
+class test_get_stock_id(unittest.TestCase):
+    def test_interns_in_first_seen_order(self):
+
+        stock_ids = {}
+
+        self.assertEqual(
+            [icol.get_stock_id(stock_ids, stock) for stock in "BABC"], [0, 1, 0, 2]
+        )
+        self.assertEqual(stock_ids, {"B": 0, "A": 1, "C": 2})
+
+
+#            _
+#           | |
+#   ___ ___ | |_   _ _ __ ___  _ __  ___
+#  / __/ _ \| | | | | '_ ` _ \| '_ \/ __|
+# | (_| (_) | | |_| | | | | | | | | \__ \
+#  \___\___/|_|\__,_|_| |_| |_|_| |_|___/
+class test_add_stockline_to_columns(unittest.TestCase):
+    def test_add_multiple_to_columns(self):
+
+        hours = {}
+        icol.add_stockline_to_columns(hours, 1, 2, 5.0)
+        icol.add_stockline_to_columns(hours, 1, 0, 1.5)
+        icol.add_stockline_to_columns(hours, 1, 2, 6.0)
+        icol.add_stockline_to_columns(hours, 2, 1000, 3.0)
+
+        self.assertEqual(list(hours), [1, 2])
+        self.assertEqual(hours[1].ids, array("q", [2, 0, 2]))
+        self.assertEqual(hours[1].prices, array("d", [5.0, 1.5, 6.0]))
+        # sized by rows, not by the highest stock id
+        self.assertEqual(len(hours[2].prices), 1)
+
+    def test_keeps_cents_as_ints(self):
+
+        hours = {}
+        icol.add_stockline_to_columns(hours, 1, 0, 123456)
+
+        self.assertEqual(hours[1].prices, array("q", [123456]))
+        self.assertRaises(TypeError, icol.add_stockline_to_columns, hours, 1, 1, 1.5)
+
+
+class test_get_columns_error(unittest.TestCase):
+    def get_error(self, actual_rows, predicted_rows, ranks):
+
+        hours = {}
+        for stock_id, price in actual_rows:
+            icol.add_stockline_to_columns(hours, "actual", stock_id, price)
+        for stock_id, price in predicted_rows:
+            icol.add_stockline_to_columns(hours, "predicted", stock_id, price)
+
+        positions = array("q", bytes(8 * len(ranks)))
+        error = icol.get_columns_error(
+            hours.get("actual", icol.EMPTY_COLUMNS),
+            hours.get("predicted", icol.EMPTY_COLUMNS),
+            array("q", ranks),
+            positions,
+        )
+
+        self.assertEqual(positions, array("q", bytes(8 * len(ranks))))
+        return error
+
+    def test_makes_correct_output(self):
+
+        self.assertEqual(
+            self.get_error(
+                [(0, 1.0), (1, 2.0), (2, 3.0)],
+                [(1, 2.5), (3, 9.0), (0, 0.5)],
+                [2, 0, -1, 1],
+            ),
+            (1.0, 2),
+        )
+
+    def test_with_repeated_stock(self):
+
+        self.assertEqual(
+            self.get_error([(0, 1.0), (0, 2.0)], [(0, 9.0), (0, 3.0)], [0]), (1.0, 1)
+        )
+
+    def test_with_cents(self):
+
+        self.assertEqual(
+            self.get_error([(0, 100), (1, 250)], [(1, 200), (0, 101)], [1, 0]),
+            (51, 2),
+        )
+
+    def test_with_empty_hour(self):
+
+        self.assertEqual(self.get_error([(0, 1.0)], [], [-1]), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
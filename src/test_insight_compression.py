@@ -0,0 +1,135 @@
+import gzip
+import lzma
+import os
+import shutil
+import tempfile
+import unittest
+
+import insight_compression as ic
+import insight_processing as ip
+import insight_reconcile as ir
+from insight_testing import fixture
+
+
+class test_get_compression(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_detects_magic_bytes(self):
+
+        # names are deliberately misleading, only the contents count
+        plain_fn = os.path.join(self.dir, "plain.gz")
+        gzip_fn = os.path.join(self.dir, "gzip.txt")
+        xz_fn = os.path.join(self.dir, "xz.txt")
+
+        with open(plain_fn, "w") as f:
+            f.write("1|A|1.0\n")
+        with gzip.open(gzip_fn, "wt") as f:
+            f.write("1|A|1.0\n")
+        with lzma.open(xz_fn, "wt") as f:
+            f.write("1|A|1.0\n")
+
+        self.assertEqual(ic.get_compression(plain_fn), None)
+        self.assertEqual(ic.get_compression(gzip_fn), "gzip")
+        self.assertEqual(ic.get_compression(xz_fn), "xz")
+
+
+class test_background_line_reader(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, "actual.txt.gz")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_matches_plain_lines(self):
+
+        text = "1|A|1.0\n1|ÉTÉ|2.0\r\n\n2|B|3.5"
+        with gzip.open(self.fn, "wt", newline="") as f:
+            f.write(text)
+
+        # blocks smaller than a line, cutting characters in two
+        with ic.BackgroundLineReader(self.fn, gzip.open, block_size=3) as f:
+            lines = list(f)
+
+        self.assertEqual(lines, text.splitlines(keepends=True))
+
+    def test_raises_decompression_error(self):
+
+        with open(self.fn, "wb") as f:
+            f.write(gzip.compress(b"1|A|1.0\n" * 100)[:-10])
+
+        with ic.open_input(self.fn) as f:
+            self.assertRaises(EOFError, list, f)
+
+    def test_close_before_end(self):
+
+        with gzip.open(self.fn, "wt") as f:
+            f.write("1|A|1.0\n" * 10_000)
+
+        with ic.BackgroundLineReader(
+            self.fn, gzip.open, block_size=64, prefetch_blocks=1
+        ) as f:
+            next(iter(f))
+
+        self.assertFalse(f.thread.is_alive())
+
+
+class test_open_input(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def compress(self, fn, opener, suffix):
+        compressed_fn = os.path.join(self.dir, os.path.basename(fn) + suffix)
+        with open(fn, "rb") as f, opener(compressed_fn, "wb") as f_compressed:
+            shutil.copyfileobj(f, f_compressed)
+        return compressed_fn
+
+    def test_process_input_reads_compressed_files(self):
+
+        for test in ("test_1", "your_own_test_3"):
+            actual = fixture(test, "actual")
+            predicted = fixture(test, "predicted")
+            actual_gzip = self.compress(actual, gzip.open, ".gz")
+            predicted_xz = self.compress(predicted, lzma.open, ".xz")
+
+            self.assertEqual(
+                ip.process_input(actual_gzip, predicted_xz),
+                ip.process_input(actual, predicted),
+            )
+            self.assertEqual(
+                ir.process_input_merged(actual_gzip, predicted_xz),
+                ir.process_input_merged(actual, predicted),
+            )
+
+    def test_get_window_reads_compressed_file(self):
+
+        window = fixture("test_1", "window")
+
+        self.assertEqual(
+            ip.get_window(self.compress(window, gzip.open, ".gz")),
+            ip.get_window(window),
+        )
+
+    @unittest.skipIf(ic.zstandard is None, "zstandard is not installed")
+    def test_reads_zstd(self):
+
+        actual = fixture("test_1", "actual")
+        actual_zstd = os.path.join(self.dir, "actual.txt.zst")
+        with open(actual, "rb") as f, open(actual_zstd, "wb") as f_zstd:
+            f_zstd.write(ic.zstandard.ZstdCompressor().compress(f.read()))
+
+        self.assertEqual(ic.get_compression(actual_zstd), "zstd")
+        self.assertEqual(
+            list(ir.read_file_rows(actual_zstd)), list(ir.read_file_rows(actual))
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
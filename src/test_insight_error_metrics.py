@@ -0,0 +1,169 @@
+import math
+import random
+import unittest
+
+import insight_error_metrics as em
+import insight_processing as ip
+import insight_reconcile as ir
+from insight_testing import fixture
+
+
+#             _
+#            | |
+# __   ____ _| |_   _  ___  ___
+# \ \ / / _` | | | | |/ _ \/ __|
+#  \ V / (_| | | |_| |  __/\__ \
+#   \_/ \__,_|_|\__,_|\___||___/
+class test_get_percentage_error(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        self.assertEqual(em.get_percentage_error(4.0, 5.0), 25.0)
+
+    def test_with_zero(self):
+
+        self.assertIsNone(em.get_percentage_error(0, 5.0))
+
+
+class test_get_root_mean(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        self.assertEqual(em.get_root_mean(8, 2), 2.0)
+        self.assertEqual(em.get_root_mean(32, 2, scale=4), 2.0)
+
+
+#      _        _       _
+#     | |      | |     | |
+#  ___| | _____| |_ ___| |__
+# / __| |/ / _ \ __/ __| '_ \
+# \__ \   <  __/ || (__| | | |
+# |___/_|\_\___|\__\___|_| |_|
+class test_get_sketch_quantile(unittest.TestCase):
+    def test_within_accuracy(self):
+
+        values = [0.01 * i for i in range(1, 1000)]
+        summary = em.get_hour_summary("sketch", values)
+
+        median = em.get_sketch_quantile(*summary)
+        true_median = sorted(values)[(len(values) - 1) // 2]
+
+        self.assertLessEqual(
+            abs(median - true_median), em.SKETCH_ACCURACY * true_median
+        )
+
+    def test_with_zeros(self):
+
+        bins, count = em.get_hour_summary("sketch", [0, 0, 0, 5.0])
+
+        self.assertEqual(em.get_sketch_quantile(bins, count), 0.0)
+
+    def test_add_sketch(self):
+
+        bins = {1: 2, 2: 1}
+        em.add_sketch(bins, {1: 2, 3: 1}, -1)
+
+        self.assertEqual(bins, {2: 1, 3: -1})
+
+
+#           _           _
+#          (_)         | |
+# __      ___ _ __   __| | _____      _____
+# \ \ /\ / / | '_ \ / _` |/ _ \ \ /\ / / __|
+#  \ V  V /| | | | | (_| | (_) \ V  V /\__ \
+#   \_/\_/ |_|_| |_|\__,_|\___/ \_/\_/ |___/
+class test_get_interval_errors_max(unittest.TestCase):
+    def test_matches_every_hour_of_every_window(self):
+
+        rng = random.Random(0)
+        hour_summaries = {}
+        for hour in rng.sample(range(200), 120):
+            count = rng.choice([0, 1, 3])
+            hour_summaries[hour] = (rng.choice([0.5, 1.25, rng.random()]), count)
+
+        for window in (1, 2, 7, 50):
+            window_intervals = ip.get_window_intervals(window, hour_summaries)
+            window_errors = em.get_interval_errors_max(window_intervals, hour_summaries)
+
+            for i, hours in enumerate(window_intervals):
+                values = [
+                    hour_summaries[hour][0]
+                    for hour in hours
+                    if hour in hour_summaries and hour_summaries[hour][1]
+                ]
+                self.assertEqual(
+                    window_errors[i], round(max(values), 2) if values else "NA"
+                )
+
+
+class test_get_interval_errors_metric(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        summaries = {
+            "max": {1: (2.0, 2), 2: (0, 0), 3: (5.0, 1), 5: (1.0, 1)},
+            "median": {
+                1: em.get_hour_summary("sketch", [1.0, 2.0]),
+                2: em.get_hour_summary("sketch", []),
+                3: em.get_hour_summary("sketch", [0.0]),
+                5: em.get_hour_summary("sketch", [4.0]),
+            },
+            "bias": {1: (-3.0, 2), 2: (0, 0), 3: (1.0, 1), 5: (2.0, 1)},
+        }
+        window_intervals = ip.get_window_intervals(2, summaries["max"])
+
+        self.assertEqual(
+            em.get_interval_errors_metric("max", window_intervals, summaries["max"]),
+            {0: 2.0, 1: 5.0, 2: 5.0, 3: 1.0},
+        )
+        medians = em.get_interval_errors_metric(
+            "median", window_intervals, summaries["median"]
+        )
+        for i, median in {0: 1.0, 1: 0.0, 2: 0.0, 3: 4.0}.items():
+            self.assertAlmostEqual(
+                medians[i], median, delta=em.SKETCH_ACCURACY * median + 0.005
+            )
+        self.assertEqual(
+            em.get_interval_errors_metric("bias", window_intervals, summaries["bias"]),
+            {0: -1.5, 1: 1.0, 2: 1.0, 3: 2.0},
+        )
+
+
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+class test_process_input_metrics(unittest.TestCase):
+    def test_mae_matches_merged(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+
+            actual_fn = fixture(test, "actual")
+            predicted_fn = fixture(test, "predicted")
+
+            hour_summaries = em.process_input_metrics(
+                actual_fn, predicted_fn, list(em.ERROR_METRICS)
+            )
+
+            self.assertEqual(
+                hour_summaries["mae"], ir.process_input_merged(actual_fn, predicted_fn)
+            )
+
+    def test_rmse(self):
+
+        hour_summaries = em.process_input_metrics(
+            fixture("your_own_test_4", "actual"),
+            fixture("your_own_test_4", "predicted"),
+            ["mae", "rmse"],
+        )
+
+        for hour, (squared, count) in hour_summaries["rmse"].items():
+            error, _ = hour_summaries["mae"][hour]
+            if count:
+                # the root mean square is never below the mean
+                self.assertGreaterEqual(
+                    math.sqrt(squared / count) + 1e-9, error / count
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,231 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import insight_follow as ifo
+import insight_processing as ip
+from insight_reconcile import process_input_merged
+from insight_testing import fixture
+
+
+def write_output(window, hour_errors, output_fn):
+    window_intervals = ip.get_window_intervals(window, hour_errors)
+    window_errors = ip.get_interval_errors(window_intervals, hour_errors)
+    ip.generate_output(window_intervals, window_errors, output_fn)
+
+
+#   __       _ _
+#  / _|     | | |
+# | |_ ___  | | | _____      __
+# |  _/ _ \ | | |/ _ \ \ /\ / /
+# | || (_) || | | (_) \ V  V /
+# |_| \___/ |_|_|\___/ \_/\_/
+class test_get_last_hour(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, "actual.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_skips_partial_and_blank_lines(self):
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.0\n2|A|2.0\n\n3|A|3")
+
+        self.assertEqual(ifo.get_last_hour(self.fn, 0), 2)
+
+    def test_with_nothing_after_offset(self):
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.0\n2|A|2")
+
+        self.assertEqual(ifo.get_last_hour(self.fn, 8), None)
+
+
+class test_follow_once(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.actual_fn = os.path.join(self.dir, "actual.txt")
+        self.predicted_fn = os.path.join(self.dir, "predicted.txt")
+        self.output_fn = os.path.join(self.dir, "comparison.txt")
+        self.state_fn = os.path.join(self.dir, "state.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def get_test_files(self, test):
+        with open(fixture(test, "actual"), "rb") as f:
+            actual = f.read()
+        with open(fixture(test, "predicted"), "rb") as f:
+            predicted = f.read()
+        window = ip.get_window(fixture(test, "window"))
+        return actual, predicted, window
+
+    def follow_appends(self, actual, predicted, window, num_steps, restart):
+
+        for name in (self.actual_fn, self.predicted_fn, self.output_fn):
+            open(name, "wb").close()
+
+        state = ifo.load_follow_state(self.state_fn, window)
+
+        for step in range(1, num_steps + 1):
+
+            # appends cut lines anywhere, including mid-line
+            for fn, data in ((self.actual_fn, actual), (self.predicted_fn, predicted)):
+                start = len(data) * (step - 1) // num_steps
+                end = len(data) * step // num_steps
+                with open(fn, "ab") as f:
+                    f.write(data[start:end])
+
+            ifo.follow_once(state, self.actual_fn, self.predicted_fn, self.output_fn)
+            ifo.save_follow_state(state, self.state_fn)
+
+            if restart:
+                state = ifo.load_follow_state(self.state_fn, window)
+
+        ifo.follow_once(
+            state, self.actual_fn, self.predicted_fn, self.output_fn, final=True
+        )
+
+        with open(self.output_fn) as f:
+            return f.read()
+
+    def test_matches_batch_output(self):
+
+        for test in ("test_1", "your_own_test_3"):
+            actual, predicted, window = self.get_test_files(test)
+
+            hour_errors = process_input_merged(
+                fixture(test, "actual"), fixture(test, "predicted")
+            )
+            batch_fn = os.path.join(self.dir, "batch.txt")
+            write_output(window, hour_errors, batch_fn)
+            with open(batch_fn) as f:
+                batch = f.read()
+
+            for restart in (False, True):
+                if os.path.exists(self.state_fn):
+                    os.remove(self.state_fn)
+                self.assertEqual(
+                    self.follow_appends(actual, predicted, window, 7, restart), batch
+                )
+
+    def test_drops_windows_written_after_last_save(self):
+
+        actual = b"1|A|1.0\n2|A|1.0\n3|A|1.0\n4|A|1.0\n"
+        predicted = b"1|A|2.0\n2|A|3.0\n3|A|4.0\n4|A|5.0\n"
+
+        with open(self.actual_fn, "wb") as f:
+            f.write(actual)
+        with open(self.predicted_fn, "wb") as f:
+            f.write(predicted)
+        open(self.output_fn, "w").close()
+
+        state = ifo.make_follow_state(1)
+        ifo.save_follow_state(state, self.state_fn)
+
+        # this pass is "lost", its windows are written but the state is not
+        ifo.follow_once(state, self.actual_fn, self.predicted_fn, self.output_fn)
+
+        state = ifo.load_follow_state(self.state_fn, 1)
+        ifo.follow_once(
+            state, self.actual_fn, self.predicted_fn, self.output_fn, final=True
+        )
+
+        with open(self.output_fn) as f:
+            self.assertEqual(f.read(), "1|1|1.00\n2|2|2.00\n3|3|3.00\n4|4|4.00\n")
+
+    def test_drops_windows_when_resumed_pass_writes_none(self):
+
+        with open(self.actual_fn, "w") as f:
+            f.write("1|A|1.0\n2|A|1.0\n3|A|1.0\n")
+        with open(self.predicted_fn, "w") as f:
+            f.write("1|A|1.5\n2|A|1.5\n3|A|1.0\n")
+        open(self.output_fn, "w").close()
+
+        state = ifo.make_follow_state(1)
+        ifo.follow_once(state, self.actual_fn, self.predicted_fn, self.output_fn)
+        ifo.save_follow_state(state, self.state_fn)
+
+        # the final pass is "lost" after writing the last hour's window
+        ifo.follow_once(
+            state, self.actual_fn, self.predicted_fn, self.output_fn, final=True
+        )
+
+        # nothing new is complete, so the resumed pass writes no window
+        state = ifo.load_follow_state(self.state_fn, 1)
+        written = ifo.follow_once(
+            state, self.actual_fn, self.predicted_fn, self.output_fn
+        )
+        ifo.save_follow_state(state, self.state_fn)
+
+        self.assertEqual(written, 0)
+
+        state = ifo.load_follow_state(self.state_fn, 1)
+        ifo.follow_once(
+            state, self.actual_fn, self.predicted_fn, self.output_fn, final=True
+        )
+
+        with open(self.output_fn) as f:
+            self.assertEqual(f.read(), "1|1|0.50\n2|2|0.50\n3|3|0.00\n")
+
+    def test_waits_for_lagging_predicted(self):
+
+        with open(self.actual_fn, "w") as f:
+            f.write("1|A|1.0\n2|A|1.0\n3|A|1.0\n")
+        open(self.predicted_fn, "w").close()
+        open(self.output_fn, "w").close()
+
+        state = ifo.make_follow_state(1)
+
+        # nothing is known of "predicted", so no hour is complete yet
+        self.assertEqual(
+            ifo.follow_once(state, self.actual_fn, self.predicted_fn, self.output_fn),
+            0,
+        )
+
+        with open(self.predicted_fn, "w") as f:
+            f.write("1|A|1.5\n2|A|2.0\n")
+
+        # hours before "predicted" hour 2 are complete
+        self.assertEqual(
+            ifo.follow_once(state, self.actual_fn, self.predicted_fn, self.output_fn),
+            1,
+        )
+        ifo.follow_once(
+            state, self.actual_fn, self.predicted_fn, self.output_fn, final=True
+        )
+
+        with open(self.output_fn) as f:
+            self.assertEqual(f.read(), "1|1|0.50\n2|2|1.00\n3|3|NA\n")
+
+    def test_with_shrunk_input(self):
+
+        with open(self.actual_fn, "w") as f:
+            f.write("1|A|1.0\n")
+        with open(self.predicted_fn, "w") as f:
+            f.write("1|A|1.0\n")
+
+        state = ifo.make_follow_state(1)
+        state["actual_offset"] = 100
+
+        self.assertRaises(
+            ValueError,
+            ifo.follow_once,
+            state,
+            self.actual_fn,
+            self.predicted_fn,
+            self.output_fn,
+        )
+
+    def test_with_other_window(self):
+
+        ifo.save_follow_state(ifo.make_follow_state(2), self.state_fn)
+
+        self.assertRaises(ValueError, ifo.load_follow_state, self.state_fn, 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,131 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import insight_index as ix
+import insight_reconcile as ir
+from insight_testing import fixture
+
+
+#  _           _ _     _
+# | |         (_) |   | |
+# | |__  _   _ _| | __| |
+# | '_ \| | | | | |/ _` |
+# | |_) | |_| | | | (_| |
+# |_.__/ \__,_|_|_|\__,_|
+class test_build_hour_index(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, "actual.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_makes_correct_output(self):
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.0\n1|B|2.0\n\n3|A|3.0\n")
+
+        index = ix.build_hour_index(self.fn)
+
+        self.assertEqual(index["hours"], [1, 3])
+        self.assertEqual(index["offsets"], [0, 16])
+        self.assertEqual(index["size"], 25)
+
+    def test_with_decreasing_hours(self):
+
+        with open(self.fn, "w") as f:
+            f.write("2|A|1.0\n1|A|1.0\n")
+
+        self.assertRaises(ValueError, ix.build_hour_index, self.fn)
+
+    def test_rebuilds_stale_index(self):
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.0\n")
+        self.assertEqual(ix.load_hour_index(self.fn)["hours"], [1])
+        self.assertTrue(os.path.exists(self.fn + ix.INDEX_SUFFIX))
+
+        with open(self.fn, "a") as f:
+            f.write("2|A|1.0\n")
+
+        self.assertEqual(ix.load_hour_index(self.fn)["hours"], [1, 2])
+
+    def test_with_index_dir(self):
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.0\n")
+        index_dir = os.path.join(self.dir, "indexes")
+        os.mkdir(index_dir)
+
+        self.assertEqual(ix.load_hour_index(self.fn, index_dir)["hours"], [1])
+        self.assertTrue(os.path.exists(os.path.join(index_dir, "actual.txt.idx")))
+        self.assertFalse(os.path.exists(self.fn + ix.INDEX_SUFFIX))
+
+    def test_with_unwritable_index(self):
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.0\n2|A|1.0\n")
+        missing_dir = os.path.join(self.dir, "missing")
+
+        self.assertEqual(ix.load_hour_index(self.fn, missing_dir)["hours"], [1, 2])
+        self.assertEqual(os.listdir(self.dir), ["actual.txt"])
+
+
+#  _ __ __ _ _ __   __ _  ___
+# | '__/ _` | '_ \ / _` |/ _ \
+# | | | (_| | | | | (_| |  __/
+# |_|  \__,_|_| |_|\__, |\___|
+#                   __/ |
+#                  |___/
+class test_get_hour_range(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        index = {"size": 40, "hours": [1, 3, 4], "offsets": [0, 16, 24]}
+
+        self.assertEqual(ix.get_hour_range(index, 2, 3), (16, 24))
+        self.assertEqual(ix.get_hour_range(index, 3, None), (16, 40))
+        self.assertEqual(ix.get_hour_range(index, None, 1), (0, 16))
+        self.assertEqual(ix.get_hour_range(index, 5, 9), (0, 0))
+
+
+class test_process_input_range(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_matches_process_input_merged(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+
+            # sidecar indexes are written next to copies, not the fixtures
+            actual = os.path.join(self.dir, test + "_actual.txt")
+            predicted = os.path.join(self.dir, test + "_predicted.txt")
+            shutil.copy(fixture(test, "actual"), actual)
+            shutil.copy(fixture(test, "predicted"), predicted)
+
+            hour_errors = ir.process_input_merged(actual, predicted)
+            hours = sorted(hour_errors)
+
+            for first_hour, last_hour in (
+                (hours[0], hours[-1]),
+                (hours[1], hours[len(hours) // 2]),
+                (None, hours[2]),
+                (hours[-1] + 1, None),
+            ):
+                self.assertEqual(
+                    ix.process_input_range(actual, predicted, first_hour, last_hour),
+                    {
+                        hour: errors
+                        for hour, errors in hour_errors.items()
+                        if (first_hour is None or hour >= first_hour)
+                        and (last_hour is None or hour <= last_hour)
+                    },
+                )
+
+
+if __name__ == "__main__":
+    unittest.main()
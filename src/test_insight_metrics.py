@@ -0,0 +1,118 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+import insight_metrics as imt
+import insight_reconcile as ir
+from insight_testing import fixture
+
+
+#                             _
+#                            | |
+#  _ __ ___ _ __   ___  _ __| |_
+# | '__/ _ \ '_ \ / _ \| '__| __|
+# | | |  __/ |_) | (_) | |  | |_
+# |_|  \___| .__/ \___/|_|   \__|
+#          | |
+#          |_|
+class test_write_metrics(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, "metrics.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_makes_correct_output(self):
+
+        metrics = imt.make_metrics(self.fn)
+        with imt.measure_stage(metrics, "reconcile"):
+            pass
+        with imt.measure_stage(metrics, "reconcile"):
+            pass
+
+        imt.write_metrics(metrics, done=True)
+
+        with open(self.fn) as f:
+            report = json.load(f)
+
+        self.assertTrue(report["done"])
+        self.assertEqual(report["stages"]["reconcile"]["calls"], 2)
+        self.assertGreaterEqual(report["stages"]["reconcile"]["wall_s"], 0)
+        self.assertFalse(os.path.exists(self.fn + ".tmp"))
+
+    def test_uncounted_as_null(self):
+
+        metrics = imt.make_metrics(self.fn)
+        metrics["hours"]["flushed"] = 3
+
+        imt.write_metrics(metrics, done=True)
+
+        with open(self.fn) as f:
+            report = json.load(f)
+
+        self.assertEqual(report["rows"], {"actual": None, "predicted": None})
+        self.assertEqual(report["hours"]["flushed"], 3)
+        self.assertIsNone(report["hours"]["matched_stocks"])
+
+    def test_measure_stage_when_off(self):
+
+        with imt.measure_stage(None, "reconcile"):
+            pass
+
+
+#  _
+# | |
+# | |__   ___  _   _ _ __ ___
+# | '_ \ / _ \| | | | '__/ __|
+# | | | | (_) | |_| | |  \__ \
+# |_| |_|\___/ \__,_|_|  |___/
+class test_count_hours(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        metrics = imt.make_metrics("unused.json")
+        merged_hours = [
+            (1, {"A": 1.0, "B": 2.0}, {"A": 1.5}),
+            (2, {"A": 1.0}, {"A": 1.0, "C": 3.0}),
+        ]
+
+        self.assertEqual(list(imt.count_hours(metrics, merged_hours)), merged_hours)
+        self.assertEqual(
+            metrics["hours"],
+            {
+                "flushed": 2,
+                "matched_stocks": 2,
+                "unmatched_actual_stocks": 1,
+                "unmatched_predicted_stocks": 1,
+                "max_unmatched_per_hour": 1,
+                "peak_buffered_stocks": 3,
+            },
+        )
+
+
+class test_iter_input_hour_errors_counted(unittest.TestCase):
+    def test_matches_merged(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+
+            actual_fn = fixture(test, "actual")
+            predicted_fn = fixture(test, "predicted")
+            metrics = imt.make_metrics("unused.json")
+
+            hour_errors = dict(
+                imt.iter_input_hour_errors_counted(actual_fn, predicted_fn, metrics)
+            )
+
+            self.assertEqual(
+                hour_errors, ir.process_input_merged(actual_fn, predicted_fn)
+            )
+            self.assertEqual(metrics["hours"]["flushed"], len(hour_errors))
+            with open(actual_fn) as f:
+                rows = sum(1 for line in f if line.strip())
+            self.assertEqual(metrics["rows"]["actual"], rows)
+
+
+if __name__ == "__main__":
+    unittest.main()
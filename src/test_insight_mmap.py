@@ -0,0 +1,74 @@
+import os
+import tempfile
+import unittest
+
+import insight_mmap as im
+import insight_reconcile as ir
+from insight_testing import fixture
+
+
+def write_lines(lines):
+    fd, fn = tempfile.mkstemp()
+    with os.fdopen(fd, "w") as f:
+        f.writelines(lines)
+    return fn
+
+
+#                                                   _
+#                                                  | |
+#  _ __ ___  _ __ ___   __ _ _ __    _ __ _____      _____
+# | '_ ` _ \| '_ ` _ \ / _` | '_ \  | '__/ _ \ \ /\ / / __|
+# | | | | | | | | | | | (_| | |_) | | | | (_) \ V  V /\__ \
+# |_| |_| |_|_| |_| |_|\__,_| .__/  |_|  \___/ \_/\_/ |___/
+#                           | |
+#                           |_|
+class test_read_mmap_rows(unittest.TestCase):
+    def test_matches_read_file_rows(self):
+
+        for test in ("test_1", "your_own_test_3"):
+            for name in ("actual", "predicted"):
+                fn = fixture(test, name)
+                self.assertEqual(
+                    [list(row) for row in im.read_mmap_rows(fn)],
+                    list(ir.read_file_rows(fn)),
+                )
+
+    def test_skips_blank_lines(self):
+
+        fn = write_lines(["1|NASDAQ|-1234.56\n", "\n", "  \n", "2|ABCDEF|789.10"])
+        try:
+            rows = list(im.read_mmap_rows(fn))
+        finally:
+            os.remove(fn)
+
+        self.assertEqual(rows, [(1, "NASDAQ", -1234.56), (2, "ABCDEF", 789.10)])
+
+    def test_interns_stocks(self):
+
+        fn = write_lines(["1|NASDAQ|1.00\n", "2|NASDAQ|2.00\n"])
+        try:
+            rows = list(im.read_mmap_rows(fn))
+        finally:
+            os.remove(fn)
+
+        self.assertIs(rows[0][1], rows[1][1])
+
+    def test_with_wrong_delimiter(self):
+
+        fn = write_lines(["1,NASDAQ,1234.56\n"])
+        try:
+            self.assertRaises(ValueError, list, im.read_mmap_rows(fn))
+        finally:
+            os.remove(fn)
+
+    def test_with_empty_file(self):
+
+        fn = write_lines([])
+        try:
+            self.assertEqual(list(im.read_mmap_rows(fn)), [])
+        finally:
+            os.remove(fn)
+
+
+if __name__ == "__main__":
+    unittest.main()
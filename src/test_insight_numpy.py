@@ -0,0 +1,107 @@
+import unittest
+from unittest import mock
+
+import insight_numpy as inp
+import insight_processing as ip
+from insight_testing import fixture
+
+
+#            _
+#           | |
+#   ___ ___ | |_   _ _ __ ___  _ __  ___
+#  / __/ _ \| | | | | '_ ` _ \| '_ \/ __|
+# | (_| (_) | | |_| | | | | | | | | \__ \
+#  \___\___/|_|\__,_|_| |_| |_|_| |_|___/
+@unittest.skipIf(inp.np is None, "NumPy not installed")
+class test_parse_block(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        stock_codes = inp.make_stock_codes()
+        block = b"1|A|1.50\n\n1|B|-2.25\n2|A|100_000.00\n"
+        hours, codes, prices = inp.parse_block(block, stock_codes)
+
+        self.assertEqual(hours.tolist(), [1, 1, 2])
+        self.assertEqual(codes.tolist(), [0, 1, 0])
+        self.assertEqual(prices.tolist(), [1.5, -2.25, 100_000.0])
+
+    def test_delimiter_is_pipe(self):
+
+        stock_codes = inp.make_stock_codes()
+        self.assertRaises(ValueError, inp.parse_block, b"1,A,1.50\n", stock_codes)
+
+
+@unittest.skipIf(inp.np is None, "NumPy not installed")
+class test_iter_hour_chunks(unittest.TestCase):
+    def test_does_not_split_hours(self):
+
+        stock_codes = inp.make_stock_codes()
+        chunks = [
+            inp.parse_block(b"1|A|1.0\n2|A|2.0\n", stock_codes),
+            inp.parse_block(b"2|B|2.0\n3|A|3.0\n", stock_codes),
+        ]
+        hours = [chunk[0].tolist() for chunk in inp.iter_hour_chunks(chunks)]
+
+        self.assertEqual(hours, [[1], [2, 2], [3]])
+
+
+#    _       _
+#   (_)     (_)
+#    _  ___  _ _ __
+#   | |/ _ \| | '_ \
+#   | | (_) | | | | |
+#   | |\___/|_|_| |_|
+#  _/ |
+# |__/
+@unittest.skipIf(inp.np is None, "NumPy not installed")
+class test_get_join_errors(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        stock_codes = inp.make_stock_codes()
+        actual = inp.parse_block(b"1|A|1.0\n1|B|2.0\n3|A|3.0\n", stock_codes)
+        predicted = inp.parse_block(b"0|A|9.0\n1|A|1.5\n1|A|1.25\n", stock_codes)
+        hour_errors = inp.get_join_errors(actual, predicted, len(stock_codes))
+
+        self.assertEqual(hour_errors, {1: (0.25, 1), 3: (0.0, 0)})
+
+
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+class test_process_input_numpy(unittest.TestCase):
+    def assertHourErrorsAlmostEqual(self, hour_errors, hour_errors_true):
+
+        self.assertEqual(list(hour_errors), list(hour_errors_true))
+        for hour in hour_errors:
+            self.assertAlmostEqual(hour_errors[hour][0], hour_errors_true[hour][0])
+            self.assertEqual(hour_errors[hour][1], hour_errors_true[hour][1])
+
+    def test_matches_process_input(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            actual = fixture(test, "actual")
+            predicted = fixture(test, "predicted")
+            hour_errors_true = ip.process_input(actual, predicted)
+
+            # small chunks so hours span several reads
+            for chunk_bytes in (1 << 10, inp.CHUNK_BYTES):
+                hour_errors = inp.process_input_numpy(actual, predicted, chunk_bytes)
+                self.assertHourErrorsAlmostEqual(hour_errors, hour_errors_true)
+
+    def test_falls_back_without_numpy(self):
+
+        actual = fixture("your_own_test_3", "actual")
+        predicted = fixture("your_own_test_3", "predicted")
+
+        with mock.patch.object(inp, "np", None):
+            hour_errors = inp.process_input_numpy(actual, predicted)
+
+        self.assertHourErrorsAlmostEqual(
+            hour_errors, ip.process_input(actual, predicted)
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+from functools import partial
+
+import insight_parallel as ipar
+import insight_processing as ip
+import insight_reconcile as ir
+from insight_testing import fixture
+
+
+#       _                   _
+#      | |                 | |
+#  ___ | |__   __ _ _ __ __| |___
+# / __|| '_ \ / _` | '__/ _` / __|
+# \__ \| | | | (_| | | | (_| \__ \
+# |___/|_| |_|\__,_|_|  \__,_|___/
+class test_find_hour_offset(unittest.TestCase):
+    def setUp(self):
+
+        lines = ["1|A|1.00\n", "1|B|2.00\n", "\n", "3|A|3.00\n", "4|A|4.00\n"]
+        fd, self.fn = tempfile.mkstemp()
+        with os.fdopen(fd, "w") as f:
+            f.writelines(lines)
+        self.size = os.path.getsize(self.fn)
+
+    def tearDown(self):
+
+        os.remove(self.fn)
+
+    def test_makes_correct_output(self):
+
+        with open(self.fn, "rb") as f:
+            self.assertEqual(ipar.find_hour_offset(f, 0, self.size), 0)
+            self.assertEqual(ipar.find_hour_offset(f, 1, self.size), 0)
+            self.assertEqual(ipar.find_hour_offset(f, 2, self.size), 18)
+            # blank lines belong to the hour after them
+            self.assertEqual(ipar.find_hour_offset(f, 3, self.size), 18)
+            self.assertEqual(ipar.find_hour_offset(f, 4, self.size), 28)
+            self.assertEqual(ipar.find_hour_offset(f, 5, self.size), self.size)
+
+    def test_byte_ranges_cover_file(self):
+
+        ranges = ipar.get_byte_ranges(self.fn, [2, 4])
+
+        self.assertEqual(ranges, [(0, 18), (18, 28), (28, self.size)])
+
+
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+class test_process_input_parallel(unittest.TestCase):
+    def test_matches_process_input_merged(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            actual = fixture(test, "actual")
+            predicted = fixture(test, "predicted")
+            hour_errors_true = ir.process_input_merged(actual, predicted)
+
+            for workers in (1, 3):
+                hour_errors = ipar.process_input_parallel(actual, predicted, workers)
+                self.assertEqual(
+                    list(hour_errors.items()), list(hour_errors_true.items())
+                )
+
+    def test_cents_match_process_input_merged(self):
+
+        actual = fixture("test_1", "actual")
+        predicted = fixture("test_1", "predicted")
+        read_rows = partial(ir.read_file_rows, parse=ip.format_line_cents)
+        hour_errors_true = ir.process_input_merged(actual, predicted, read_rows)
+
+        hour_errors = ipar.process_input_parallel(
+            actual, predicted, 3, ip.format_line_cents
+        )
+        self.assertEqual(hour_errors, hour_errors_true)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,146 @@
+import filecmp
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+import insight_pipeline as pl
+import insight_reconcile as ir
+import insight_windows as iw
+from insight_testing import fixture
+
+
+#      _
+#     | |
+#  ___| |_ __ _  __ _  ___
+# / __| __/ _` |/ _` |/ _ \
+# \__ \ || (_| | (_| |  __/
+# |___/\__\__,_|\__, |\___|
+#                __/ |
+#               |___/
+class test_Stage(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        self.assertEqual(list(pl.Stage(iter(range(100)), maxsize=2)), list(range(100)))
+
+    def test_raises_error_of_thread(self):
+        def items():
+            yield 1
+            raise ValueError("bad item")
+
+        stage = pl.Stage(items())
+
+        self.assertRaises(ValueError, list, stage)
+
+    def test_close(self):
+
+        stage = pl.Stage(iter(range(100)), maxsize=2)
+        stage.close()
+        stage.thread.join()
+
+        self.assertFalse(stage.thread.is_alive())
+
+
+#                     _
+#                    | |
+#  _ __ ___  __ _  __| |
+# | '__/ _ \/ _` |/ _` |
+# | | |  __/ (_| | (_| |
+# |_|  \___|\__,_|\__,_|
+class test_read_blocks(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, "actual.txt")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_makes_correct_output(self):
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.0\n1|BB|2.0\n2|A|3.0")
+
+        blocks = list(pl.read_blocks(self.fn, block_size=5))
+
+        self.assertEqual(b"".join(blocks), b"1|A|1.0\n1|BB|2.0\n2|A|3.0")
+        for block in blocks[:-1]:
+            self.assertTrue(block.endswith(b"\n"))
+
+    def test_parse_blocks(self):
+
+        blocks = [b"1|A|1.0\n\n", b"2|B|2.5\n"]
+
+        self.assertEqual(
+            list(pl.parse_blocks(blocks)), [[[1, "A", 1.0]], [[2, "B", 2.5]]]
+        )
+
+
+#        _            _ _
+#       (_)          | (_)
+#  _ __  _ _ __   ___| |_ _ __   ___
+# | '_ \| | '_ \ / _ \ | | '_ \ / _ \
+# | |_) | | |_) |  __/ | | | | |  __/
+# | .__/|_| .__/ \___|_|_|_| |_|\___|
+# | |     | |
+# |_|     |_|
+class test_run_pipeline(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_matches_stream(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+
+            actual_fn = fixture(test, "actual")
+            predicted_fn = fixture(test, "predicted")
+            window = 2
+            stream_fn = os.path.join(self.dir, "stream.txt")
+            pipeline_fn = os.path.join(self.dir, "pipeline.txt")
+
+            iw.generate_output_stream(
+                iw.iter_window_errors(
+                    window, ir.iter_input_hour_errors(actual_fn, predicted_fn)
+                ),
+                stream_fn,
+            )
+            pl.run_pipeline(
+                window, actual_fn, predicted_fn, pipeline_fn, block_size=1000
+            )
+
+            self.assertTrue(filecmp.cmp(stream_fn, pipeline_fn, shallow=False))
+
+    def test_with_compressed_input(self):
+
+        actual_fn = os.path.join(self.dir, "actual.txt.gz")
+        with open(fixture("test_1", "actual"), "rb") as f:
+            with gzip.open(actual_fn, "wb") as f_gzip:
+                f_gzip.write(f.read())
+        plain_fn = os.path.join(self.dir, "plain.txt")
+        gzip_fn = os.path.join(self.dir, "gzip.txt")
+
+        predicted_fn = fixture("test_1", "predicted")
+        pl.run_pipeline(2, fixture("test_1", "actual"), predicted_fn, plain_fn)
+        pl.run_pipeline(2, actual_fn, predicted_fn, gzip_fn)
+
+        self.assertTrue(filecmp.cmp(plain_fn, gzip_fn, shallow=False))
+
+    def test_with_too_large_window(self):
+
+        output_fn = os.path.join(self.dir, "comparison.txt")
+
+        self.assertRaises(
+            ValueError,
+            pl.run_pipeline,
+            100000,
+            fixture("test_1", "actual"),
+            fixture("test_1", "predicted"),
+            output_fn,
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
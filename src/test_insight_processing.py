@@ -1,4 +1,9 @@
+import os
+import sys
+import tempfile
 import unittest
+from decimal import Decimal
+from unittest import mock
 
 import insight_processing as ip
 
@@ -108,6 +113,43 @@ class test_get_price(unittest.TestCase):
         self.assertEqual(100_000_000_000_000.00, ip.get_price(s))
 
 
+#             _                    _
+#            | |                  | |
+#   __ _  ___| |_     ___ ___ _ __ | |_ ___
+#  / _` |/ _ \ __|   / __/ _ \ '_ \| __/ __|
+# | (_| |  __/ |_   | (_|  __/ | | | |_\__ \
+#  \__, |\___|\__|   \___\___|_| |_|\__|___/
+#   __/ |      ______
+#  |___/      |______|
+class test_get_cents(unittest.TestCase):
+    def test_with_str_str(self):
+
+        s = "one"
+        self.assertRaises(ValueError, ip.get_cents, s)
+
+    def test_with_str_Nan(self):
+
+        s = "nan"
+        self.assertRaises(ValueError, ip.get_cents, s)
+
+    def test_with_fraction_of_cent(self):
+
+        s = "1.005"
+        self.assertRaises(ValueError, ip.get_cents, s)
+
+    def test_str_negative_float_makes_correct_input(self):
+
+        s = "-100_000_000_000_000.01"
+        self.assertEqual(-10_000_000_000_000_001, ip.get_cents(s))
+
+    def test_str_float_makes_correct_output(self):
+
+        self.assertEqual(1234, ip.get_cents("12.34"))
+        self.assertEqual(1230, ip.get_cents("12.3"))
+        self.assertEqual(1200, ip.get_cents("12"))
+        self.assertEqual(50, ip.get_cents(".5"))
+
+
 #   __                           _     _ _
 #  / _|                         | |   | (_)
 # | |_ ___  _ __ _ __ ___   __ _| |_  | |_ _ __   ___
@@ -122,6 +164,30 @@ class test_format_line(unittest.TestCase):
         line = "1|NASDAQ|-1234.56"
         self.assertEqual([1, "NASDAQ", -1234.56], ip.format_line(line))
 
+    def test_cents_makes_correct_output(self):
+
+        line = "1|NASDAQ|-1234.56"
+        self.assertEqual([1, "NASDAQ", -123456], ip.format_line_cents(line))
+
+    def test_trusted_makes_correct_output(self):
+
+        line = "1|NASDAQ|-1234.56"
+        self.assertEqual([1, "NASDAQ", -1234.56], ip.format_line_trusted(line))
+        self.assertEqual([1, "NASDAQ", -123456], ip.format_line_cents_trusted(line))
+
+    def test_trusted_with_malformed_line(self):
+
+        self.assertRaises(ValueError, ip.format_line_trusted, "1|NASDAQ")
+        self.assertRaises(ValueError, ip.format_line_trusted, "one|NASDAQ|1.0")
+        self.assertRaises(ValueError, ip.format_line_cents_trusted, "1|NASDAQ|x")
+
+    def test_cents_trusted_with_more_than_two_places(self):
+
+        self.assertEqual(ip.get_cents_trusted("12.3\n"), 1230)
+        self.assertRaises(ValueError, ip.get_cents_trusted, "0.125")
+        self.assertRaises(ValueError, ip.get_cents_trusted, "0.125\n")
+        self.assertRaises(ValueError, ip.format_line_cents_trusted, "1|NASDAQ|0.125")
+
 
 #            _     _       _             _    _ _
 #           | |   | |     | |           | |  | (_)
@@ -272,6 +338,44 @@ class test_get_window(unittest.TestCase):
             self.fail("get_window raised ExceptionType unexpectedly!")
 
 
+class test_get_windows(unittest.TestCase):
+    def setUp(self):
+        f, self.window_fn = tempfile.mkstemp()
+        os.close(f)
+
+    def tearDown(self):
+        os.remove(self.window_fn)
+
+    def test_makes_correct_output(self):
+
+        with open(self.window_fn, "w") as f:
+            f.write("24\n\n1\n168\n24\n")
+
+        self.assertEqual(ip.get_windows(self.window_fn), [24, 1, 168])
+
+    def test_with_empty_file(self):
+
+        self.assertRaises(ValueError, ip.get_windows, self.window_fn)
+
+
+class test_get_window_output_fn(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        self.assertEqual(
+            ip.get_window_output_fn("./output/comparison.txt", 24),
+            "./output/comparison_24.txt",
+        )
+
+
+class test_get_model_output_fn(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        self.assertEqual(
+            ip.get_model_output_fn("./output/comparison.txt", "./input/model_a.txt"),
+            "./output/comparison_model_a.txt",
+        )
+
+
 #           _           _               _       _                       _
 #          (_)         | |             (_)     | |                     | |
 # __      ___ _ __   __| | _____      ___ _ __ | |_ ___ _ ____   ____ _| |___
@@ -350,6 +454,13 @@ class test_format_interval_error(unittest.TestCase):
 
         self.assertEqual(formatted_interval_error, formatted_interval_error_true)
 
+        interval = range(1, 2)
+        error = Decimal("0.50")
+        formatted_interval_error = ip.format_interval_error(error, interval)
+        formatted_interval_error_true = "1|1|0.50\n"
+
+        self.assertEqual(formatted_interval_error, formatted_interval_error_true)
+
         interval = range(1, 3)
         error = "NA"
         formatted_interval_error = ip.format_interval_error(error, interval)
@@ -384,6 +495,45 @@ class test_generate_output(unittest.TestCase):
         except:
             self.fail("generate_output failed unexpectely")
 
+    def test_makes_correct_output(self):
+
+        window_intervals = [range(hour, hour + 2) for hour in range(1, 8)]
+        window_errors = {
+            0: 0.25,
+            1: "NA",
+            2: Decimal("0.50"),
+            3: 7,
+            4: 2.675,
+            5: 1e17,
+            6: "NA",
+        }
+        output_true = "".join(
+            ip.format_interval_error(error, window_intervals[i])
+            for i, error in window_errors.items()
+        )
+
+        with tempfile.TemporaryDirectory() as directory:
+            output_fn = os.path.join(directory, "comparison.txt")
+
+            # batches smaller than the output, with a partial last one
+            ip.generate_output(window_intervals, window_errors, output_fn, batch=3)
+
+            with open(output_fn) as f:
+                self.assertEqual(f.read(), output_true)
+
+    def test_writes_to_stdout(self):
+
+        window_intervals = [range(1, 3)]
+        window_errors = {0: 1.5}
+
+        with tempfile.TemporaryFile(mode="w+") as f:
+
+            with mock.patch.object(sys, "stdout", f):
+                ip.generate_output(window_intervals, window_errors, ip.STDOUT)
+
+            f.seek(0)
+            self.assertEqual(f.read(), "1|2|1.50\n")
+
 
 if __name__ == "__main__":
     unittest.main()
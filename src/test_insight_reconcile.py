@@ -0,0 +1,322 @@
+import unittest
+
+import insight_processing as ip
+import insight_reconcile as ir
+from insight_testing import fixture
+
+
+#  _            __  __
+# | |          / _|/ _|
+# | |__  _   _| |_| |_ ___ _ __
+# | '_ \| | | |  _|  _/ _ \ '__|
+# | |_) | |_| | | | ||  __/ |
+# |_.__/ \__,_|_| |_| \___|_|
+class test_add_stockline_to_hours(unittest.TestCase):
+    def test_add_multiple_to_dict(self):
+
+        d = {}
+        ir.add_stockline_to_hours(d, 1, "NASDAQ", -1234.56)
+        ir.add_stockline_to_hours(d, 1, "ABCDEF", 789.10)
+        ir.add_stockline_to_hours(d, 2, "NASDAQ", 1.0)
+
+        d_true = {1: {"NASDAQ": -1234.56, "ABCDEF": 789.10}, 2: {"NASDAQ": 1.0}}
+        self.assertEqual(d, d_true)
+
+
+class test_get_buffer_error(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        actual = {"SLKWVA": 94.51, "CMWTQH": 81.27, "ATAYJP": 25.74, "HVIWZR": 22.81}
+        predicted = {"ATAYJP": 25.71, "HVIWZR": 22.80, "SLKWVA": 94.49, "XXX": 1.0}
+
+        error, count = ir.get_buffer_error(actual, predicted)
+
+        self.assertAlmostEqual(error, 0.06)
+        self.assertEqual(count, 3)
+
+    def test_stock_ranks_set_order(self):
+
+        actual = {"A": 0.0, "B": 0.0, "C": 0.0}
+        predicted = {"A": 0.1, "B": 0.2, "C": 0.3}
+        stock_ranks = {"C": 0, "B": 1, "A": 2}
+
+        error, count = ir.get_buffer_error(actual, predicted, stock_ranks)
+
+        self.assertEqual(error, 0.3 + 0.2 + 0.1)
+        self.assertEqual(count, 3)
+
+
+class test_drop_hours_before(unittest.TestCase):
+    def test_deletes_in_place(self):
+
+        d = {1: {"A": 1.0}, 2: {"A": 2.0}, 3: {"A": 3.0}}
+        ir.drop_hours_before(d, 3)
+
+        self.assertEqual(d, {3: {"A": 3.0}})
+
+
+#  _ __ ___   ___ _ __ __ _  ___
+# | '_ ` _ \ / _ \ '__/ _` |/ _ \
+# | | | | | |  __/ | | (_| |  __/
+# |_| |_| |_|\___|_|  \__, |\___|
+#                      __/ |
+#                     |___/
+class test_read_lines(unittest.TestCase):
+    def test_skips_blank_lines(self):
+
+        lines = ["1|NASDAQ|-1234.56\n", "\n", "  2|ABCDEF|789.10  \n"]
+        rows = list(ir.read_lines(lines))
+
+        self.assertEqual(rows, [[1, "NASDAQ", -1234.56], [2, "ABCDEF", 789.10]])
+
+
+class test_read_lines_trusted(unittest.TestCase):
+    def test_matches_read_lines(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            for name in ("actual", "predicted"):
+                with open(fixture(test, name)) as f:
+                    lines = f.readlines()
+
+                self.assertEqual(
+                    list(ir.read_lines_trusted(lines)),
+                    [tuple(row) for row in ir.read_lines(lines)],
+                )
+
+    def test_with_blank_lines(self):
+
+        lines = ["1|NASDAQ|-1234.56\n", "\n", "  2|ABCDEF|789.10  \n"]
+        rows = list(ir.read_lines_trusted(lines))
+
+        self.assertEqual(rows, [[1, "NASDAQ", -1234.56], [2, "ABCDEF", 789.10]])
+
+    def test_with_cents(self):
+
+        lines = ["1|NASDAQ|-1234.56\n", "2|ABCDEF|789.10\n"]
+        rows = list(ir.read_lines_trusted(lines, get_price=ip.get_cents_trusted))
+
+        self.assertEqual(rows, [(1, "NASDAQ", -123456), (2, "ABCDEF", 78910)])
+
+        lines = ["1|NASDAQ|0.125\n"]
+        rows = ir.read_lines_trusted(
+            lines, ip.format_line_cents_trusted, ip.get_cents_trusted
+        )
+        self.assertRaises(ValueError, list, rows)
+
+    def test_with_misaligned_lines(self):
+
+        lines = ["1|A|2.0|3.0\n", "4|5.0\n"]
+
+        self.assertRaises(ValueError, list, ir.read_lines_trusted(lines))
+
+
+class test_group_hours(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        rows = [(1, "A", 1.0), (1, "B", 2.0), (3, "A", 3.0)]
+        hours = list(ir.group_hours(rows))
+
+        self.assertEqual(hours, [(1, {"A": 1.0, "B": 2.0}), (3, {"A": 3.0})])
+
+    def test_with_decreasing_hour(self):
+
+        rows = [(2, "A", 1.0), (1, "B", 2.0)]
+        self.assertRaises(ValueError, list, ir.group_hours(rows))
+
+
+class test_reorder_hours(unittest.TestCase):
+    def test_matches_group_hours(self):
+
+        rows = [(1, "A", 1.0), (1, "B", 2.0), (3, "A", 3.0), (3, "A", 4.0)]
+
+        for horizon in (0, 1, 5):
+            self.assertEqual(
+                list(ir.reorder_hours(rows, horizon)), list(ir.group_hours(rows))
+            )
+
+    def test_with_late_rows(self):
+
+        rows = [(2, "A", 2.0), (3, "A", 3.0), (1, "B", 1.0), (5, "A", 5.0)]
+        rows += [(2, "B", 2.5), (4, "B", 4.0), (1, "C", 1.5)]
+        late = ir.make_late_rows()
+        hours = list(ir.reorder_hours(rows, 2, late))
+
+        self.assertEqual(
+            hours,
+            [
+                (1, {"B": 1.0}),
+                (2, {"A": 2.0}),
+                (3, {"A": 3.0}),
+                (4, {"B": 4.0}),
+                (5, {"A": 5.0}),
+            ],
+        )
+        self.assertEqual(late, {"rows": 2, "max_hours_late": 2})
+
+    def test_holds_horizon_hours(self):
+
+        held = []
+
+        def rows():
+            for hour in range(100):
+                yield hour, "A", float(hour)
+                held.append(hour + 1 - len(finalized))
+
+        finalized = []
+        for hour, buffer in ir.reorder_hours(rows(), 3):
+            finalized.append(hour)
+
+        self.assertEqual(finalized, list(range(100)))
+        self.assertLessEqual(max(held), 4)
+
+
+class test_merge_hours(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        actual_hours = [(1, {"A": 1.0}), (2, {"A": 2.0}), (4, {"A": 4.0})]
+        predicted_hours = [(0, {"A": 0.0}), (2, {"A": 2.5}), (3, {"A": 3.5})]
+
+        merged = list(ir.merge_hours(actual_hours, predicted_hours))
+        merged_true = [
+            (1, {"A": 1.0}, {}),
+            (2, {"A": 2.0}, {"A": 2.5}),
+            (4, {"A": 4.0}, {}),
+        ]
+
+        self.assertEqual(merged, merged_true)
+
+    def test_reads_predicted_lazily(self):
+
+        def predicted_hours():
+            yield 1, {"A": 1.5}
+            raise AssertionError("read past the last actual hour")
+
+        merged = list(ir.merge_hours([(1, {"A": 1.0})], predicted_hours()))
+
+        self.assertEqual(merged, [(1, {"A": 1.0}, {"A": 1.5})])
+
+
+class test_merge_hours_many(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        actual_hours = [(1, {"A": 1.0}), (2, {"A": 2.0})]
+        predicted_hours_list = [
+            [(2, {"A": 2.5})],
+            [(1, {"A": 1.5}), (2, {"A": 2.5})],
+            [],
+        ]
+
+        merged = list(ir.merge_hours_many(actual_hours, predicted_hours_list))
+        merged_true = [
+            (1, {"A": 1.0}, [{}, {"A": 1.5}, {}]),
+            (2, {"A": 2.0}, [{"A": 2.5}, {"A": 2.5}, {}]),
+        ]
+
+        self.assertEqual(merged, merged_true)
+
+
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+class test_process_input_buffered(unittest.TestCase):
+    def test_matches_process_input(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            actual = fixture(test, "actual")
+            predicted = fixture(test, "predicted")
+            self.assertEqual(
+                ir.process_input_buffered(actual, predicted),
+                ip.process_input(actual, predicted),
+            )
+
+
+class test_process_input_merged(unittest.TestCase):
+    def test_matches_process_input(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            actual = fixture(test, "actual")
+            predicted = fixture(test, "predicted")
+            hour_errors = ir.process_input_merged(actual, predicted)
+            hour_errors_true = ip.process_input(actual, predicted)
+
+            self.assertEqual(hour_errors.keys(), hour_errors_true.keys())
+            for hour in hour_errors:
+                self.assertAlmostEqual(hour_errors[hour][0], hour_errors_true[hour][0])
+                self.assertEqual(hour_errors[hour][1], hour_errors_true[hour][1])
+
+
+class test_process_input_reordered(unittest.TestCase):
+    def test_matches_process_input_merged(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            actual = fixture(test, "actual")
+            predicted = fixture(test, "predicted")
+
+            self.assertEqual(
+                ir.process_input_reordered(actual, predicted, 3),
+                ir.process_input_merged(actual, predicted),
+            )
+
+    def test_with_late_rows(self):
+
+        actual = fixture("test_1", "actual")
+        predicted = fixture("test_1", "predicted")
+
+        def read_rows(fn):
+            rows = list(ir.read_file_rows(fn))
+            # move the first hour's rows to after the second hour's
+            first = [row for row in rows if row[0] == rows[0][0]]
+            second = [row for row in rows if row[0] == rows[0][0] + 1]
+            return second + first + rows[len(first) + len(second):]
+
+        late = {"actual": ir.make_late_rows(), "predicted": ir.make_late_rows()}
+        hour_errors = ir.process_input_reordered(actual, predicted, 1, late, read_rows)
+
+        self.assertEqual(hour_errors, ir.process_input_merged(actual, predicted))
+        self.assertEqual(late["actual"]["rows"], 0)
+
+        hour_errors = ir.process_input_reordered(actual, predicted, 0, late, read_rows)
+
+        self.assertNotIn(1, hour_errors)
+        self.assertGreater(late["actual"]["rows"], 0)
+        self.assertGreater(late["predicted"]["rows"], 0)
+
+
+class test_process_input_many(unittest.TestCase):
+    def test_matches_process_input_merged(self):
+
+        tests = ("test_1", "your_own_test_3", "your_own_test_4")
+        predicted_list = [fixture(test, "predicted") for test in tests]
+
+        for test in tests:
+            actual = fixture(test, "actual")
+            hour_errors_list = ir.process_input_many(actual, predicted_list)
+
+            self.assertEqual(
+                hour_errors_list,
+                [
+                    ir.process_input_merged(actual, predicted)
+                    for predicted in predicted_list
+                ],
+            )
+
+    def test_reads_actual_once(self):
+
+        actual = fixture("test_1", "actual")
+        predicted = fixture("test_1", "predicted")
+        reads = []
+
+        def read_rows(fn):
+            reads.append(fn)
+            return ir.read_file_rows(fn)
+
+        ir.process_input_many(actual, [predicted] * 3, read_rows)
+
+        self.assertEqual(reads.count(actual), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
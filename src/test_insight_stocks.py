@@ -0,0 +1,99 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import insight_reconcile as ir
+import insight_stocks as ist
+from insight_testing import fixture
+
+
+#  _        _     _
+# | |      | |   | |
+# | |_ __ _| |__ | | ___
+# | __/ _` | '_ \| |/ _ \
+# | || (_| | |_) | |  __/
+#  \__\__,_|_.__/|_|\___|
+class test_get_top_stocks(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        report = ist.make_stock_report(2, 2, "unused.txt")
+        ist.add_to_stock_table(report, {"A": 1.0, "B": 4.0})
+        ist.add_to_stock_table(report, {"A": 2.5, "C": 0.5})
+
+        self.assertEqual(
+            ist.get_top_stocks(report), [("B", 4.0, 1, 4.0), ("A", 3.5, 2, 2.5)]
+        )
+
+    def test_with_zero(self):
+
+        self.assertRaises(ValueError, ist.make_stock_report, 0, 2, "unused.txt")
+
+
+#           _           _
+#          (_)         | |
+# __      ___ _ __   __| | _____      _____
+# \ \ /\ / / | '_ \ / _` |/ _ \ \ /\ / / __|
+#  \ V  V /| | | | | (_| | (_) \ V  V /\__ \
+#   \_/\_/ |_|_| |_|\__,_|\___/ \_/\_/ |___/
+class test_add_hour_to_stock_report(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        report = ist.make_stock_report(2, 2, "unused.txt")
+
+        ist.add_hour_to_stock_report(report, 1, {"A": 1.0, "B": 4.0})
+        ist.add_hour_to_stock_report(report, 2, {"A": 3.5, "C": 0.5})
+        ist.add_hour_to_stock_report(report, 5, {"C": 2.0})
+
+        self.assertEqual(
+            report["lines"],
+            [
+                "1|2|A|4.50\n",
+                "1|2|B|4.00\n",
+                "2|3|A|3.50\n",
+                "2|3|C|0.50\n",
+                "4|5|C|2.00\n",
+            ],
+        )
+
+
+#  _ __  _ __ ___   ___ ___  ___ ___
+# | '_ \| '__/ _ \ / __/ _ \/ __/ __|
+# | |_) | | | (_) | (_|  __/\__ \__ \
+# | .__/|_|  \___/ \___\___||___/___/
+# | |
+# |_|
+class test_iter_input_hour_errors_by_stock(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_matches_merged(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+
+            actual_fn = fixture(test, "actual")
+            predicted_fn = fixture(test, "predicted")
+            window_report_fn = os.path.join(self.dir, "window_stocks.txt")
+            report = ist.make_stock_report(2, 3, window_report_fn)
+
+            hour_errors = dict(
+                ist.iter_input_hour_errors_by_stock(actual_fn, predicted_fn, report)
+            )
+
+            self.assertEqual(
+                hour_errors, ir.process_input_merged(actual_fn, predicted_fn)
+            )
+            self.assertEqual(
+                sum(report["counts"]), sum(count for _, count in hour_errors.values())
+            )
+            with open(window_report_fn) as f:
+                for line in f:
+                    start, end, stock, error = line.split("|")
+                    self.assertEqual(int(end) - int(start), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+import insight_processing as ip
+import insight_validate as iv
+from insight_testing import fixture
+
+
+class test_iter_malformed_lines(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.fn = os.path.join(self.dir, "actual.txt")
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.0\n\n1|B|nan\n2|C\n2|D|2.0\n3|E|1e3\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_reports_line_numbers(self):
+
+        line_numbers = [line[0] for line in iv.iter_malformed_lines(self.fn)]
+
+        self.assertEqual(line_numbers, [3, 4, 6])
+
+    def test_with_first_lines(self):
+
+        line_numbers = [
+            line[0] for line in iv.iter_malformed_lines(self.fn, first_lines=3)
+        ]
+
+        self.assertEqual(line_numbers, [3])
+
+    def test_with_every(self):
+
+        line_numbers = [
+            line[0]
+            for line in iv.iter_malformed_lines(self.fn, first_lines=1, every=2)
+        ]
+
+        self.assertEqual(line_numbers, [4, 6])
+
+    def test_with_cents(self):
+
+        with open(self.fn, "w") as f:
+            f.write("1|A|1.00\n1|B|1.005\n")
+
+        line_numbers = [
+            line[0] for line in iv.iter_malformed_lines(self.fn, ip.format_line_cents)
+        ]
+
+        self.assertEqual(line_numbers, [2])
+
+
+class test_validate_inputs(unittest.TestCase):
+    def test_fixtures_are_well_formed(self):
+
+        for test in ("test_1", "your_own_test_3", "your_own_test_4"):
+            fns = [fixture(test, "actual"), fixture(test, "predicted")]
+
+            self.assertEqual(iv.validate_inputs(fns), [])
+
+    def test_reports_file_and_line(self):
+
+        directory = tempfile.mkdtemp()
+        fn = os.path.join(directory, "predicted.txt")
+        try:
+            with open(fn, "w") as f:
+                f.write("1|A|1.0\n1|B|x\n")
+
+            report = iv.validate_inputs([fn])
+        finally:
+            shutil.rmtree(directory)
+
+        self.assertEqual(len(report), 1)
+        self.assertTrue(report[0].startswith("{}:2: ".format(fn)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,286 @@
+import filecmp
+import os
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+
+import insight_processing as ip
+import insight_windows as iw
+
+
+#                                   _       _   _
+#                                  | |     | | (_)
+#   ___ _   _ _ __ ___  _   _ _   _| | __ _| |_ ___   _____
+#  / __| | | | '_ ` _ \| | | | | | | |/ _` | __| \ \ / / _ \
+# | (__| |_| | | | | | | |_| | |_| | | (_| | |_| |\ V /  __/
+#  \___|\__,_|_| |_| |_|\__,_|\__,_|_|\__,_|\__|_| \_/ \___|
+class test_get_cumulative_errors(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        hour_errors = {1: (0.5, 2), 3: (0.25, 1)}
+        cum_errors, cum_counts, shift = iw.get_cumulative_errors(hour_errors, 1, 3)
+
+        self.assertEqual(shift, 2)
+        self.assertEqual(cum_errors, [0, 2, 2, 3])
+        self.assertEqual(cum_counts, [0, 2, 2, 3])
+
+    def test_large_totals_keep_small_windows(self):
+
+        hour_errors = {1: (1e17, 1), 2: (0.01, 1)}
+        cum_errors, cum_counts, shift = iw.get_cumulative_errors(hour_errors, 1, 2)
+
+        self.assertEqual((cum_errors[2] - cum_errors[1]) / (1 << shift), 0.01)
+
+
+class test_get_interval_errors_cumulative(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        hour_errors = {1: (0.5, 2), 5: (0.1, 5)}
+
+        window = 2
+        window_intervals = ip.get_window_intervals(window, hour_errors)
+        interval_errors = iw.get_interval_errors_cumulative(
+            window_intervals, hour_errors
+        )
+        interval_errors_true = {0: 0.5 / 2, 1: "NA", 2: "NA", 3: 0.1 / 5}
+
+        self.assertEqual(interval_errors, interval_errors_true)
+
+    def test_matches_get_interval_errors(self):
+
+        hour_errors = {
+            hour: (round(hour * 0.37 % 5, 2), hour % 4) for hour in range(3, 60)
+        }
+
+        for window in (1, 2, 7, 57):
+            window_intervals = ip.get_window_intervals(window, hour_errors)
+            self.assertEqual(
+                iw.get_interval_errors_cumulative(window_intervals, hour_errors),
+                ip.get_interval_errors(window_intervals, hour_errors),
+            )
+
+    def test_rounds_exact_sum_on_ties(self):
+
+        # 0.1 + 0.3 + 0.7 is 1.1 in floats but just below it exactly, so the
+        # mean of a .xx5 tie can round one cent lower than the direct engine
+        hour_errors = {1: (0.1, 1), 2: (0.3, 1), 3: (0.7, 2)}
+        window_intervals = ip.get_window_intervals(3, hour_errors)
+
+        self.assertEqual(
+            iw.get_interval_errors_cumulative(window_intervals, hour_errors), {0: 0.27}
+        )
+        self.assertEqual(
+            ip.get_interval_errors(window_intervals, hour_errors), {0: 0.28}
+        )
+
+
+class test_get_average_cents(unittest.TestCase):
+    def test_rounds_half_up(self):
+
+        self.assertEqual(str(iw.get_average_cents(5, 2)), "0.03")
+        self.assertEqual(str(iw.get_average_cents(4, 2)), "0.02")
+        self.assertEqual(str(iw.get_average_cents(656820, 328)), "20.03")
+        self.assertEqual(str(iw.get_average_cents(0, 7)), "0.00")
+
+    def test_with_scale(self):
+
+        self.assertEqual(str(iw.get_average_cents(5 << 3, 2, 1 << 3)), "0.03")
+
+    def test_cents_window_errors(self):
+
+        hour_errors = {1: (1, 2), 2: (0, 0), 3: (2, 1)}
+        window_intervals = ip.get_window_intervals(2, hour_errors)
+        interval_errors = iw.get_interval_errors_cumulative(
+            window_intervals, hour_errors, iw.get_average_cents
+        )
+
+        self.assertEqual(interval_errors, {0: Decimal("0.01"), 1: Decimal("0.02")})
+
+
+class test_get_interval_errors_many(unittest.TestCase):
+    def test_matches_one_window_at_a_time(self):
+
+        hour_errors = {
+            hour: (round(hour * 0.37 % 5, 2), hour % 4) for hour in range(3, 60)
+        }
+        windows = [1, 2, 7, 57]
+
+        results = iw.get_interval_errors_many(windows, hour_errors)
+
+        self.assertEqual(list(results), windows)
+        for window in windows:
+            window_intervals = ip.get_window_intervals(window, hour_errors)
+            self.assertEqual(
+                results[window],
+                (
+                    window_intervals,
+                    iw.get_interval_errors_cumulative(window_intervals, hour_errors),
+                ),
+            )
+
+    def test_with_window_larger_than_data_breadth(self):
+
+        hour_errors = {1: (0.5, 2), 2: (0.1, 5)}
+
+        self.assertRaises(ValueError, iw.get_interval_errors_many, [1, 3], hour_errors)
+
+
+#      _                            _
+#     | |                          (_)
+#  ___| |_ _ __ ___  __ _ _ __ ___  _ _ __   __ _
+# / __| __| '__/ _ \/ _` | '_ ` _ \| | '_ \ / _` |
+# \__ \ |_| | |  __/ (_| | | | | | | | | | | (_| |
+# |___/\__|_|  \___|\__,_|_| |_| |_|_|_| |_|\__, |
+#                                            __/ |
+#                                           |___/
+class test_iter_window_errors(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        hour_errors = {1: (0.5, 2), 5: (0.1, 5)}
+        window_errors = list(iw.iter_window_errors(2, iter(hour_errors.items())))
+        window_errors_true = [
+            (range(1, 3), 0.5 / 2),
+            (range(2, 4), "NA"),
+            (range(3, 5), "NA"),
+            (range(4, 6), 0.1 / 5),
+        ]
+
+        self.assertEqual(window_errors, window_errors_true)
+
+    def test_matches_get_interval_errors_cumulative(self):
+
+        hour_errors = {
+            hour: (round(hour * 0.37 % 5, 2), hour % 4)
+            for hour in range(3, 60)
+            if hour % 7
+        }
+
+        for window in (1, 2, 7, 57):
+            window_intervals = ip.get_window_intervals(window, hour_errors)
+            window_errors = iw.get_interval_errors_cumulative(
+                window_intervals, hour_errors
+            )
+            self.assertEqual(
+                list(iw.iter_window_errors(window, iter(hour_errors.items()))),
+                [(window_intervals[i], window_errors[i]) for i in window_errors],
+            )
+
+    def test_emits_window_when_last_hour_is_known(self):
+
+        def hour_errors():
+            yield 1, (1.0, 1)
+            yield 2, (2.0, 1)
+            raise AssertionError("read past the last hour of the window")
+
+        window_errors = iw.iter_window_errors(2, hour_errors())
+
+        self.assertEqual(next(window_errors), (range(1, 3), 1.5))
+
+    def test_with_window_larger_than_data_breadth(self):
+
+        hour_errors = {1: (0.5, 2), 2: (0.1, 5)}
+        window_errors = iw.iter_window_errors(3, iter(hour_errors.items()))
+
+        self.assertRaises(ValueError, list, window_errors)
+
+    def test_with_zero(self):
+
+        window_errors = iw.iter_window_errors(0, iter({1: (0.5, 2)}.items()))
+
+        self.assertRaises(ValueError, list, window_errors)
+
+
+#  ___ _ __   __ _ _ __ ___  ___
+# / __| '_ \ / _` | '__/ __|/ _ \
+# \__ \ |_) | (_| | |  \__ \  __/
+# |___/ .__/ \__,_|_|  |___/\___|
+#     | |
+#     |_|
+class test_get_interval_errors_sparse(unittest.TestCase):
+    def test_matches_cumulative(self):
+
+        hour_errors = {
+            hour: (hour * 0.37, hour % 4) for hour in range(1000, 1300, 3) if hour % 7
+        }
+
+        for window in (1, 2, 7, 57):
+            window_intervals = ip.get_window_intervals(window, hour_errors)
+            self.assertEqual(
+                iw.get_interval_errors_sparse(window_intervals, hour_errors),
+                iw.get_interval_errors_cumulative(window_intervals, hour_errors),
+            )
+
+
+class test_iter_window_runs(unittest.TestCase):
+    def test_makes_correct_output(self):
+
+        hour_errors = {10: (1.0, 1), 11: (3.0, 1), 1000: (5.0, 2)}
+        cumulative = iw.get_sparse_cumulative(hour_errors)
+
+        self.assertEqual(
+            list(iw.iter_window_runs(2, cumulative)),
+            [(10, 10, 2.0), (11, 11, 3.0), (12, 998, "NA"), (999, 999, 2.5)],
+        )
+
+    def test_matches_cumulative(self):
+
+        hour_errors = {
+            hour: (hour * 0.37, hour % 4) for hour in range(1000, 1300, 3) if hour % 7
+        }
+        cumulative = iw.get_sparse_cumulative(hour_errors)
+
+        for window in (1, 2, 7, 57):
+            window_intervals = ip.get_window_intervals(window, hour_errors)
+            window_errors = iw.get_interval_errors_cumulative(
+                window_intervals, hour_errors
+            )
+            runs = iw.iter_window_runs(window, cumulative)
+            self.assertEqual(
+                [
+                    error
+                    for first, last, error in runs
+                    for _ in range(first, last + 1)
+                ],
+                [window_errors[i] for i in window_errors],
+            )
+
+    def test_with_window_larger_than_data_breadth(self):
+
+        cumulative = iw.get_sparse_cumulative({1: (0.5, 2), 2: (0.1, 5)})
+
+        self.assertRaises(ValueError, list, iw.iter_window_runs(3, cumulative))
+
+    def test_with_zero(self):
+
+        cumulative = iw.get_sparse_cumulative({1: (0.5, 2)})
+
+        self.assertRaises(ValueError, list, iw.iter_window_runs(0, cumulative))
+
+
+class test_generate_output_runs(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_matches_generate_output(self):
+
+        hour_errors = {10: (1.0, 1), 11: (3.0, 1), 500: (5.0, 2), 502: (0.0, 0)}
+        window = 3
+        expected_fn = os.path.join(self.dir, "expected.txt")
+        output_fn = os.path.join(self.dir, "comparison.txt")
+
+        window_intervals = ip.get_window_intervals(window, hour_errors)
+        window_errors = iw.get_interval_errors_cumulative(window_intervals, hour_errors)
+        ip.generate_output(window_intervals, window_errors, expected_fn)
+
+        window_runs = iw.iter_window_runs(window, iw.get_sparse_cumulative(hour_errors))
+        iw.generate_output_runs(window, window_runs, output_fn, batch=100)
+
+        self.assertTrue(filecmp.cmp(expected_fn, output_fn, shallow=False))
+
+
+if __name__ == "__main__":
+    unittest.main()